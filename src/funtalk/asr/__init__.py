@@ -1,4 +1,6 @@
+from ._mock import MockASR
+from ._registry import create_asr
 from ._whisper import WhisperASR
 from .base import BaseASR
 
-__all__ = ["BaseASR", "WhisperASR"]
+__all__ = ["BaseASR", "MockASR", "WhisperASR", "create_asr"]
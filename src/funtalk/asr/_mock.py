@@ -0,0 +1,20 @@
+import time
+
+from .base import BaseASR
+
+
+class MockASR(BaseASR):
+    """
+    本地模拟识别，不加载模型，直接返回预设文本，用于测试与压测
+    """
+
+    def __init__(self, name="mock", text="", latency=0.0, *args, **kwargs):
+        super().__init__(*args, **kwargs)
+        self.name = name
+        self.text = text
+        self.latency = latency
+
+    def transcribe(self, audio, language="ZH", *args, **kwargs):
+        if self.latency:
+            time.sleep(self.latency)
+        return {"text": self.text, "segments": [], "language": language}
@@ -0,0 +1,15 @@
+import importlib
+
+from .base import BaseASR
+
+ASR_ENGINES = {
+    "whisper": "funtalk.asr._whisper:WhisperASR",
+    "mock": "funtalk.asr._mock:MockASR",
+}
+
+
+def create_asr(engine: str = "whisper", *args, **kwargs) -> BaseASR:
+    if engine not in ASR_ENGINES:
+        raise ValueError(f"unknown asr engine: {engine}")
+    module_name, class_name = ASR_ENGINES[engine].split(":")
+    return getattr(importlib.import_module(module_name), class_name)(*args, **kwargs)
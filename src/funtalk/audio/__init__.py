@@ -0,0 +1,62 @@
+from ._concat import AudioAppender, concat_audio
+from ._format import (
+    OUTPUT_FORMATS,
+    OutputFormat,
+    Transcoder,
+    get_output_format,
+    wav_header,
+)
+from ._mp3 import (
+    FrameHeader,
+    iter_frames,
+    parse_frame_header,
+    read_xing_frames,
+    skip_id3,
+)
+from ._post import (
+    PostProcess,
+    apply_fade,
+    loudness_gain,
+    trim_bounds,
+)
+from ._probe import AudioInfo, FrameIndex, scan_audio
+from ._sink import (
+    AudioSink,
+    FileSink,
+    MemorySink,
+    ObjectStoreSink,
+    PipeSink,
+    open_sink,
+)
+from ._stretch import decode_pcm, stretch_pcm, time_stretch
+
+__all__ = [
+    "AudioAppender",
+    "AudioInfo",
+    "AudioSink",
+    "FileSink",
+    "FrameHeader",
+    "FrameIndex",
+    "MemorySink",
+    "ObjectStoreSink",
+    "OUTPUT_FORMATS",
+    "OutputFormat",
+    "PipeSink",
+    "PostProcess",
+    "Transcoder",
+    "apply_fade",
+    "concat_audio",
+    "decode_pcm",
+    "get_output_format",
+    "iter_frames",
+    "loudness_gain",
+    "open_sink",
+    "parse_frame_header",
+    "read_xing_frames",
+    "scan_audio",
+    "skip_id3",
+    "stretch_pcm",
+    "time_stretch",
+    "trim_bounds",
+    "wav_header",
+]
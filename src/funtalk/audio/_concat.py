@@ -0,0 +1,168 @@
+import mmap
+from typing import List, Union
+
+from ._format import get_output_format, wav_header
+from ._mp3 import parse_frame_header
+from ._probe import AudioInfo, scan_audio
+from ._sink import open_sink
+
+
+def _read_head(source: str, info: AudioInfo) -> bytes:
+    with open(source, "rb") as file:
+        file.seek(info.data_start)
+        return file.read(4)
+
+
+def _silence(seconds: float, info: AudioInfo, head: bytes):
+    """
+    与 info 同规格的静音，返回 (数据, AudioInfo)
+    mp3 复用参考帧的帧头，去掉 CRC 与填充位，帧体全零（side info 为零，解码为静音）
+    """
+    if info.container in ("wav", "pcm"):
+        samples = round(seconds * info.sample_rate)
+        data = bytes(samples * 2 * max(1, info.channels))
+    elif info.container == "mp3":
+        header = parse_frame_header(head) if len(head) == 4 else None
+        if header is None:
+            raise ValueError("can not build mp3 silence without a reference frame")
+        head = bytes((head[0], head[1] | 0x01, head[2] & 0xFD, head[3]))
+        header = parse_frame_header(head)
+        frames = round(seconds * header.sample_rate / header.samples)
+        samples = frames * header.samples
+        data = (head + bytes(header.size - 4)) * frames
+    else:
+        raise ValueError(f"silence is not supported for {info.container}")
+    duration = samples / info.sample_rate
+    return data, info._replace(
+        duration=duration, samples=samples, data_start=0, data_end=len(data), index=None
+    )
+
+
+def concat_audio(
+    sources: List[Union[str, float]], output, output_format: str = None
+) -> List[AudioInfo]:
+    """
+    按顺序拼接同一格式的音频文件，不重新编码：mp3 按帧拼接（去掉 ID3 与 Xing 头），
+    wav 合并 data 块并重写文件头，裸 PCM 直接拼接
+    sources 中的数字表示插入该秒数的静音，规格与第一个文件一致（mp3 精确到帧）
+    output: 文件路径或 AudioSink；返回每段的 AudioInfo，按 samples / sample_rate 累加即为各段的起始时间
+    """
+    container = get_output_format(output_format).container if output_format else None
+    # 完整扫描帧头，data_start 才会跳过 Xing/Info 帧
+    infos = [
+        (
+            None
+            if isinstance(source, (int, float))
+            else scan_audio(source, build_index=True, output_format=output_format)
+        )
+        for source in sources
+    ]
+    for source, info in zip(sources, infos):
+        if info is None and not isinstance(source, (int, float)):
+            raise ValueError(f"unsupported audio format: {source}")
+    reference = next((index for index, info in enumerate(infos) if info), None)
+    if reference is None:
+        raise ValueError("at least one audio file is required")
+    first = infos[reference]
+    head = b""
+    if first.container == "mp3" and first.data_end > first.data_start:
+        head = _read_head(sources[reference], first)
+    silences = {}
+    for index, source in enumerate(sources):
+        if infos[index] is None:
+            silences[index], infos[index] = _silence(source, first, head)
+    with open_sink(output) as sink:
+        if first.container == "wav":
+            size = sum(info.data_end - info.data_start for info in infos)
+            sink.write(wav_header(first.sample_rate, size, first.channels))
+        for index, (source, info) in enumerate(zip(sources, infos)):
+            if container != "pcm" and first.sample_rate != info.sample_rate:
+                raise ValueError(
+                    f"sample rate mismatch: {source}, {info.sample_rate} != {first.sample_rate}"
+                )
+            if info.data_end <= info.data_start:
+                continue
+            if index in silences:
+                sink.write(silences[index])
+                continue
+            with open(source, "rb") as file:
+                with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as data:
+                    with memoryview(data) as view:
+                        with view[info.data_start : info.data_end] as chunk:
+                            sink.write(chunk)
+    return infos
+
+
+# 长度未知时写入的 wav 数据块大小，与 ffmpeg 等流式输出一致
+_WAV_UNKNOWN_SIZE = 0xFFFFFFFF - 36
+
+
+class AudioAppender:
+    """
+    逐段追加同一格式的音频到一个输出，不重新编码，只保留当前一段在内存中
+    mp3 去掉每段的 ID3 与 Xing 头按帧追加；裸 PCM 直接追加；
+    wav 先写入长度未知的文件头，输出可 seek 时（如 FileSink）提交前回填实际长度
+    """
+
+    def __init__(self, output, output_format: str = None):
+        self.sink = open_sink(output)
+        self.output_format = output_format
+        self.container = None
+        self.sample_rate = 0
+        self.channels = 1
+        self.samples = 0
+        self.size = 0
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        if exc_type is None:
+            self.commit()
+        else:
+            self.abort()
+
+    @property
+    def duration(self) -> float:
+        return self.samples / self.sample_rate if self.sample_rate else 0.0
+
+    def append(self, data) -> AudioInfo:
+        """
+        追加一段完整的音频（bytes/bytearray），返回该段的 AudioInfo
+        """
+        info = scan_audio(data, build_index=True, output_format=self.output_format)
+        if info is None:
+            raise ValueError(
+                "unsupported audio format, only mp3/wav/pcm can be appended"
+            )
+        if info.data_end <= info.data_start:
+            return info
+        if self.container is None:
+            self.container = info.container
+            self.sample_rate = info.sample_rate
+            self.channels = max(1, info.channels)
+            if info.container == "wav":
+                self.sink.write(
+                    wav_header(self.sample_rate, _WAV_UNKNOWN_SIZE, self.channels)
+                )
+        elif (info.container, info.sample_rate) != (self.container, self.sample_rate):
+            raise ValueError(
+                f"format mismatch: {info.container}/{info.sample_rate} != "
+                f"{self.container}/{self.sample_rate}"
+            )
+        with memoryview(data) as view:
+            with view[info.data_start : info.data_end] as chunk:
+                self.sink.write(chunk)
+        self.samples += info.samples
+        self.size += info.data_end - info.data_start
+        return info
+
+    def commit(self):
+        if self.container == "wav" and self.sink.seekable():
+            self.sink.seek(0)
+            self.sink.write(wav_header(self.sample_rate, self.size, self.channels))
+            self.sink.seek(0, 2)
+        self.sink.commit()
+
+    def abort(self):
+        self.sink.abort()
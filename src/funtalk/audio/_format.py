@@ -0,0 +1,176 @@
+import struct
+import subprocess
+import threading
+from typing import NamedTuple, Optional, Union
+
+from funutil import getLogger
+
+logger = getLogger("funtalk")
+
+
+class OutputFormat(NamedTuple):
+    name: str
+    container: str
+    sample_rate: int
+    bitrate: int
+    azure: str
+    edge: Optional[str] = None
+
+    @property
+    def mime(self) -> str:
+        if self.container == "mp3":
+            return "audio/mpeg"
+        if self.container == "ogg":
+            return "audio/ogg"
+        if self.container == "wav":
+            return "audio/wav"
+        return f"audio/L16;rate={self.sample_rate};channels=1"
+
+    @property
+    def extension(self) -> str:
+        return self.container
+
+
+def _entry(name, container, sample_rate, bitrate, azure, edge=None):
+    return name, OutputFormat(name, container, sample_rate, bitrate, azure, edge)
+
+
+# azure 为 SpeechSynthesisOutputFormat 成员名，edge 为 edge 服务原生支持的格式
+OUTPUT_FORMATS = dict(
+    [
+        _entry("mp3-16k-32kbps", "mp3", 16000, 32, "Audio16Khz32KBitRateMonoMp3"),
+        _entry("mp3-16k-64kbps", "mp3", 16000, 64, "Audio16Khz64KBitRateMonoMp3"),
+        _entry(
+            "mp3-24k-48kbps",
+            "mp3",
+            24000,
+            48,
+            "Audio24Khz48KBitRateMonoMp3",
+            "audio-24khz-48kbitrate-mono-mp3",
+        ),
+        _entry("mp3-24k-96kbps", "mp3", 24000, 96, "Audio24Khz96KBitRateMonoMp3"),
+        _entry("mp3-48k-96kbps", "mp3", 48000, 96, "Audio48Khz96KBitRateMonoMp3"),
+        _entry("mp3-48k-192kbps", "mp3", 48000, 192, "Audio48Khz192KBitRateMonoMp3"),
+        _entry("opus-16k", "ogg", 16000, 0, "Ogg16Khz16BitMonoOpus"),
+        _entry("opus-24k", "ogg", 24000, 0, "Ogg24Khz16BitMonoOpus"),
+        _entry("opus-48k", "ogg", 48000, 0, "Ogg48Khz16BitMonoOpus"),
+        _entry("pcm-8k", "pcm", 8000, 0, "Raw8Khz16BitMonoPcm"),
+        _entry("pcm-16k", "pcm", 16000, 0, "Raw16Khz16BitMonoPcm"),
+        _entry("pcm-24k", "pcm", 24000, 0, "Raw24Khz16BitMonoPcm"),
+        _entry("pcm-48k", "pcm", 48000, 0, "Raw48Khz16BitMonoPcm"),
+        _entry("wav-8k", "wav", 8000, 0, "Riff8Khz16BitMonoPcm"),
+        _entry("wav-16k", "wav", 16000, 0, "Riff16Khz16BitMonoPcm"),
+        _entry("wav-24k", "wav", 24000, 0, "Riff24Khz16BitMonoPcm"),
+        _entry("wav-48k", "wav", 48000, 0, "Riff48Khz16BitMonoPcm"),
+    ]
+)
+
+
+def get_output_format(name: Union[str, OutputFormat]) -> OutputFormat:
+    if isinstance(name, OutputFormat):
+        return name
+    if name not in OUTPUT_FORMATS:
+        raise ValueError(
+            f"unknown output format: {name}, supported: {', '.join(OUTPUT_FORMATS)}"
+        )
+    return OUTPUT_FORMATS[name]
+
+
+def wav_header(sample_rate: int, data_size: int, channels: int = 1, bits: int = 16):
+    block_align = channels * bits // 8
+    return struct.pack(
+        "<4sI4s4sIHHIIHH4sI",
+        b"RIFF",
+        36 + data_size,
+        b"WAVE",
+        b"fmt ",
+        16,
+        1,
+        channels,
+        sample_rate,
+        sample_rate * block_align,
+        block_align,
+        bits,
+        b"data",
+        data_size,
+    )
+
+
+class Transcoder:
+    """
+    流式转码：合成过程中逐块写入源音频，经 ffmpeg 管道实时转成目标格式写入 output，
+    用于引擎不支持的输出格式，不需要合成结束后再单独转一遍
+    """
+
+    def __init__(
+        self,
+        output_format,
+        output,
+        input_format: str = "mp3",
+        input_sample_rate: int = None,
+    ):
+        """
+        input_format 为 s16le 等裸 PCM 时需要指定 input_sample_rate
+        """
+        self.output_format = get_output_format(output_format)
+        self._own = isinstance(output, str)
+        self._file = open(output, "wb") if self._own else output
+        self._size = 0
+        args = ["ffmpeg", "-hide_banner", "-loglevel", "error"]
+        args += ["-f", input_format]
+        if input_sample_rate:
+            args += ["-ar", str(input_sample_rate), "-ac", "1"]
+        args += ["-i", "pipe:0", "-ac", "1"]
+        args += ["-ar", str(self.output_format.sample_rate)]
+        if self.output_format.container == "mp3":
+            args += ["-b:a", f"{self.output_format.bitrate}k", "-f", "mp3"]
+        elif self.output_format.container == "ogg":
+            args += ["-c:a", "libopus", "-f", "ogg"]
+        else:
+            args += ["-f", "s16le"]
+        args.append("pipe:1")
+        if self.output_format.container == "wav":
+            self._file.write(wav_header(self.output_format.sample_rate, 0))
+        self._process = subprocess.Popen(
+            args, stdin=subprocess.PIPE, stdout=subprocess.PIPE
+        )
+        self._reader = threading.Thread(target=self._pump, daemon=True)
+        self._reader.start()
+
+    def _pump(self):
+        for chunk in iter(lambda: self._process.stdout.read(65536), b""):
+            self._file.write(chunk)
+            self._size += len(chunk)
+
+    def write(self, chunk):
+        self._process.stdin.write(chunk)
+
+    def close(self):
+        try:
+            self._process.stdin.close()
+        except BrokenPipeError:
+            pass
+        self._reader.join()
+        code = self._process.wait()
+        if self.output_format.container == "wav" and self._file.seekable():
+            position = self._file.tell()
+            self._file.seek(0)
+            self._file.write(wav_header(self.output_format.sample_rate, self._size))
+            self._file.seek(position)
+        if self._own:
+            self._file.close()
+        if code:
+            raise Exception(f"failed, ffmpeg exit code: {code}")
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        if exc_type is None:
+            self.close()
+            return
+        self._process.kill()
+        try:
+            self.close()
+        except Exception as e:
+            logger.error(f"failed, error: {str(e)}")
@@ -0,0 +1,148 @@
+from functools import lru_cache
+from typing import Iterator, NamedTuple, Optional
+
+# kbps，按 (是否 MPEG-1, layer) 索引
+_BITRATES = {
+    (True, 1): (0, 32, 64, 96, 128, 160, 192, 224, 256, 288, 320, 352, 384, 416, 448),
+    (True, 2): (0, 32, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320, 384),
+    (True, 3): (0, 32, 40, 48, 56, 64, 80, 96, 112, 128, 160, 192, 224, 256, 320),
+    (False, 1): (0, 32, 48, 56, 64, 80, 96, 112, 128, 144, 160, 176, 192, 224, 256),
+    (False, 2): (0, 8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160),
+    (False, 3): (0, 8, 16, 24, 32, 40, 48, 56, 64, 80, 96, 112, 128, 144, 160),
+}
+# 按 header 中的 version 位索引：0 MPEG-2.5，2 MPEG-2，3 MPEG-1
+_SAMPLE_RATES = {
+    0: (11025, 12000, 8000),
+    2: (22050, 24000, 16000),
+    3: (44100, 48000, 32000),
+}
+
+
+class FrameHeader(NamedTuple):
+    size: int
+    samples: int
+    sample_rate: int
+    bitrate: int
+    channels: int
+    mpeg1: bool
+
+
+def parse_frame_header(data, pos: int = 0) -> Optional[FrameHeader]:
+    if len(data) < pos + 4 or data[pos] != 0xFF or data[pos + 1] & 0xE0 != 0xE0:
+        return None
+    return _decode_header(data[pos + 1], data[pos + 2], data[pos + 3])
+
+
+@lru_cache(maxsize=1024)
+def _decode_header(b1: int, b2: int, b3: int) -> Optional[FrameHeader]:
+    # 同一文件中的帧头几乎完全相同，缓存解码结果
+    version = (b1 >> 3) & 0x03
+    layer = 4 - ((b1 >> 1) & 0x03)
+    bitrate_index = b2 >> 4
+    sample_rate_index = (b2 >> 2) & 0x03
+    if version == 1 or layer == 4 or bitrate_index in (0, 15) or sample_rate_index == 3:
+        return None
+    mpeg1 = version == 3
+    bitrate = _BITRATES[(mpeg1, layer)][bitrate_index] * 1000
+    sample_rate = _SAMPLE_RATES[version][sample_rate_index]
+    padding = (b2 >> 1) & 0x01
+    if layer == 1:
+        samples = 384
+        size = (12 * bitrate // sample_rate + padding) * 4
+    elif layer == 2 or mpeg1:
+        samples = 1152
+        size = 144 * bitrate // sample_rate + padding
+    else:
+        samples = 576
+        size = 72 * bitrate // sample_rate + padding
+    channels = 1 if (b3 >> 6) == 3 else 2
+    return FrameHeader(size, samples, sample_rate, bitrate, channels, mpeg1)
+
+
+def _xing_position(pos: int, header: FrameHeader) -> int:
+    if header.mpeg1:
+        side_info = 17 if header.channels == 1 else 32
+    else:
+        side_info = 9 if header.channels == 1 else 17
+    return pos + 4 + side_info
+
+
+def _is_info_frame(data, pos: int, header: FrameHeader) -> bool:
+    # Xing/Info/VBRI 头帧只携带元信息，不计入时长
+    tag = bytes(data[_xing_position(pos, header) : _xing_position(pos, header) + 4])
+    return tag in (b"Xing", b"Info") or bytes(data[pos + 36 : pos + 40]) == b"VBRI"
+
+
+def read_xing_frames(data, pos: int = None) -> Optional[int]:
+    """
+    读取 Xing/Info 头中记录的帧数，没有该信息时返回 None
+    """
+    if pos is None:
+        pos = skip_id3(data)
+    header = parse_frame_header(data, pos)
+    if header is None:
+        return None
+    tag = _xing_position(pos, header)
+    if bytes(data[tag : tag + 4]) not in (b"Xing", b"Info"):
+        return None
+    if not data[tag + 7] & 0x01:
+        return None
+    return int.from_bytes(bytes(data[tag + 8 : tag + 12]), "big")
+
+
+def skip_id3(data) -> int:
+    if bytes(data[:3]) != b"ID3" or len(data) < 10:
+        return 0
+    size = 0
+    for byte in data[6:10]:
+        size = (size << 7) | (byte & 0x7F)
+    return 10 + size + (10 if data[5] & 0x10 else 0)
+
+
+# 重新同步时需要连续这么多个合法帧才认定找到了 mp3 帧，避免把其他格式中的 0xFF 当作帧头
+_SYNC_FRAMES = 3
+
+
+def _is_synced(data, pos: int, header: FrameHeader) -> bool:
+    length = len(data)
+    for _ in range(_SYNC_FRAMES - 1):
+        pos += header.size
+        if pos + 4 > length:
+            # 数据在帧边界（或尾部不足一个帧头的残余）处结束
+            return True
+        following = parse_frame_header(data, pos)
+        if following is None or following.sample_rate != header.sample_rate:
+            return False
+        header = following
+    return True
+
+
+def iter_frames(data, pos: int = None) -> Iterator[tuple]:
+    """
+    遍历 mp3 数据中的音频帧，返回 (字节偏移, FrameHeader)，跳过 ID3 标签与 Xing/Info 帧
+    开头与每次跳过无效数据后，需要连续 _SYNC_FRAMES 个合法帧才继续
+    """
+    if pos is None:
+        pos = skip_id3(data)
+    length = len(data)
+    first = True
+    synced = False
+    while pos + 4 <= length:
+        header = parse_frame_header(data, pos)
+        if (
+            header is None
+            or header.size < 4
+            or not (synced or _is_synced(data, pos, header))
+        ):
+            synced = False
+            pos = data.find(b"\xff", pos + 1)
+            if pos < 0:
+                break
+            continue
+        if pos + header.size > length:
+            break
+        synced = True
+        if not (first and _is_info_frame(data, pos, header)):
+            yield pos, header
+        first = False
+        pos += header.size
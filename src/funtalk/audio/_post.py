@@ -0,0 +1,122 @@
+from typing import NamedTuple, Optional, Tuple
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+# 计算电平的分析窗长度
+_WINDOW_MS = 10
+
+
+def _window_db(x, sample_rate: int):
+    """
+    每 10ms 一个窗口的 RMS 电平（dBFS），x 为 [-1, 1] 的浮点采样
+    """
+    window = max(1, sample_rate * _WINDOW_MS // 1000)
+    count = len(x) // window
+    if count == 0:
+        return np.zeros(0, dtype=np.float32), window
+    frames = x[: count * window].reshape(count, window)
+    power = np.einsum("ij,ij->i", frames, frames) / window
+    return 10 * np.log10(np.maximum(power, 1e-12)), window
+
+
+def trim_bounds(
+    samples, sample_rate: int, threshold_db: float = -50.0, padding: float = 0.05
+) -> Tuple[int, int]:
+    """
+    首尾静音之外的采样区间 [start, end)，保留 padding 秒的余量；全是静音时返回 (0, 0)
+    """
+    if np is None:
+        raise ImportError("trim_bounds requires numpy, run: pip install numpy")
+    x = np.asarray(samples, dtype=np.float32) / 32768.0
+    levels, window = _window_db(x, sample_rate)
+    voiced = np.flatnonzero(levels > threshold_db)
+    if len(voiced) == 0:
+        return (0, 0) if len(levels) else (0, len(x))
+    pad = int(padding * sample_rate)
+    start = max(0, int(voiced[0]) * window - pad)
+    end = min(len(x), (int(voiced[-1]) + 1) * window + pad)
+    return start, end
+
+
+def loudness_gain(
+    samples,
+    sample_rate: int,
+    target_db: float = -20.0,
+    peak_db: float = -1.0,
+    gate_db: float = -50.0,
+) -> float:
+    """
+    使有声部分的平均 RMS 达到 target_db 所需的线性增益，峰值不超过 peak_db
+    低于 gate_db 的窗口（停顿）不参与计算，避免停顿多的片段被过度放大
+    """
+    if np is None:
+        raise ImportError("loudness_gain requires numpy, run: pip install numpy")
+    x = np.asarray(samples, dtype=np.float32) / 32768.0
+    levels, _ = _window_db(x, sample_rate)
+    voiced = levels[levels > gate_db]
+    if len(voiced) == 0:
+        return 1.0
+    # 在功率域平均再换算回 dB
+    current = 10 * np.log10(np.mean(np.power(10.0, voiced / 10)))
+    gain = 10 ** ((target_db - current) / 20)
+    peak = float(np.max(np.abs(x))) if len(x) else 0.0
+    if peak > 0:
+        gain = min(gain, 10 ** (peak_db / 20) / peak)
+    return float(gain)
+
+
+def apply_fade(samples, sample_rate: int, fade_in: float = 0.0, fade_out: float = 0.0):
+    """
+    线性淡入淡出，返回 float32 采样
+    """
+    if np is None:
+        raise ImportError("apply_fade requires numpy, run: pip install numpy")
+    x = np.array(samples, dtype=np.float32)
+    size = len(x)
+    fade_in = min(size, int(fade_in * sample_rate))
+    fade_out = min(size, int(fade_out * sample_rate))
+    if fade_in:
+        x[:fade_in] *= np.linspace(0.0, 1.0, fade_in, endpoint=False, dtype=np.float32)
+    if fade_out:
+        x[size - fade_out :] *= np.linspace(1.0, 0.0, fade_out, dtype=np.float32)
+    return x
+
+
+class PostProcess(NamedTuple):
+    """
+    合成后的 PCM 后处理：裁掉首尾静音、响度归一、淡入淡出，全部在进程内以 numpy 向量化完成
+    trim: 裁剪首尾低于 threshold_db 的静音，保留 padding 秒
+    loudness: 目标响度（dBFS，按有声部分的 RMS），None 不调整；峰值限制在 peak_db
+    fade_in, fade_out: 淡入淡出秒数，0 关闭
+    """
+
+    trim: bool = True
+    threshold_db: float = -50.0
+    padding: float = 0.05
+    loudness: Optional[float] = -20.0
+    peak_db: float = -1.0
+    fade_in: float = 0.01
+    fade_out: float = 0.02
+
+    def process(self, pcm, sample_rate: int) -> Tuple[bytes, int]:
+        """
+        处理 16bit 单声道 PCM，返回 (处理后的 PCM, 开头裁掉的采样数)
+        """
+        if np is None:
+            raise ImportError("post processing requires numpy, run: pip install numpy")
+        samples = np.frombuffer(pcm, dtype="<i2", count=len(pcm) // 2)
+        start, end = 0, len(samples)
+        if self.trim:
+            start, end = trim_bounds(
+                samples, sample_rate, self.threshold_db, self.padding
+            )
+            samples = samples[start:end]
+        x = apply_fade(samples, sample_rate, self.fade_in, self.fade_out)
+        if self.loudness is not None:
+            x *= loudness_gain(
+                samples, sample_rate, self.loudness, self.peak_db, self.threshold_db
+            )
+        return np.clip(np.rint(x), -32768, 32767).astype("<i2").tobytes(), start
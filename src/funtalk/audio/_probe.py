@@ -0,0 +1,197 @@
+import bisect
+import mmap
+import os
+import struct
+from array import array
+from typing import NamedTuple, Optional
+
+from ._format import get_output_format
+from ._mp3 import iter_frames, read_xing_frames, skip_id3
+
+
+class FrameIndex:
+    """
+    mp3 帧索引：每帧的字节偏移与起始采样位置，用于按时间定位与按帧拼接
+    """
+
+    __slots__ = ("offsets", "positions", "sample_rate", "end")
+
+    def __init__(self, sample_rate: int):
+        self.offsets = array("q")
+        self.positions = array("q")
+        self.sample_rate = sample_rate
+        self.end = 0
+
+    def __len__(self) -> int:
+        return len(self.offsets)
+
+    def frame_at(self, seconds: float) -> int:
+        """
+        包含该时间点的帧序号
+        """
+        position = round(seconds * self.sample_rate)
+        return max(0, bisect.bisect_right(self.positions, position) - 1)
+
+    def seek(self, seconds: float) -> int:
+        """
+        该时间点所在帧的字节偏移
+        """
+        if not self.offsets:
+            return self.end
+        return self.offsets[self.frame_at(seconds)]
+
+    def byte_range(self, start: int, stop: int = None):
+        """
+        第 start 到 stop（不含）帧对应的字节区间
+        """
+        stop = len(self.offsets) if stop is None else stop
+        begin = self.offsets[start] if start < len(self.offsets) else self.end
+        end = self.offsets[stop] if stop < len(self.offsets) else self.end
+        return begin, end
+
+
+class AudioInfo(NamedTuple):
+    container: str
+    duration: float
+    sample_rate: int
+    channels: int
+    bitrate: int
+    samples: int
+    data_start: int
+    data_end: int
+    index: Optional[FrameIndex] = None
+
+
+def scan_audio(
+    path, build_index: bool = True, output_format: str = None
+) -> Optional[AudioInfo]:
+    """
+    通过帧头（mp3）或 RIFF 头（wav）计算精确时长、码率与帧索引，不解码音频
+    path 为文件路径时以 mmap 方式读取，也可以直接传入 bytes/bytearray
+    build_index=False 且 mp3 带 Xing 帧数时为 O(1)
+    output_format 为 pcm 格式时按裸 PCM 计算；其他格式（如 ogg/opus）或无法识别的数据返回 None
+    """
+    container = get_output_format(output_format).container if output_format else None
+    if container not in (None, "mp3", "wav", "pcm"):
+        return None
+    in_memory = not isinstance(path, (str, os.PathLike))
+    if isinstance(path, memoryview):
+        path = path.tobytes()
+    size = len(path) if in_memory else os.path.getsize(path)
+    if container == "pcm":
+        sample_rate = get_output_format(output_format).sample_rate
+        samples = size // 2
+        return AudioInfo(
+            "pcm",
+            samples / sample_rate,
+            sample_rate,
+            1,
+            sample_rate * 16,
+            samples,
+            0,
+            size,
+        )
+    if size == 0:
+        return AudioInfo(
+            "mp3", 0.0, 0, 0, 0, 0, 0, 0, FrameIndex(0) if build_index else None
+        )
+    if in_memory:
+        return _scan(path, build_index, container)
+    with open(path, "rb") as file:
+        with mmap.mmap(file.fileno(), 0, access=mmap.ACCESS_READ) as data:
+            return _scan(data, build_index, container)
+
+
+def _scan(data, build_index: bool, container: str = None) -> Optional[AudioInfo]:
+    if data[:4] == b"RIFF" and data[8:12] == b"WAVE":
+        return _scan_wav(data)
+    if container == "wav":
+        return None
+    info = _scan_mp3(data, build_index)
+    # 未声明格式时，找不到任何 mp3 帧的数据（如 ogg、webm）不当作 mp3
+    if container is None and not info.samples:
+        return None
+    return info
+
+
+# 0：ffmpeg 写入不可 seek 的输出；0xFFFFFFFF 及减去 RIFF 头后的值：常见的流式占位
+_WAV_UNKNOWN_SIZES = (0, 0xFFFFFFFF, 0xFFFFFFFF - 36)
+
+
+def _scan_wav(data) -> AudioInfo:
+    pos = 12
+    channels = sample_rate = bits = 0
+    while pos + 8 <= len(data):
+        chunk_id = data[pos : pos + 4]
+        chunk_size = struct.unpack_from("<I", data, pos + 4)[0]
+        if chunk_id == b"fmt ":
+            channels, sample_rate, _, _, bits = struct.unpack_from(
+                "<HIIHH", data, pos + 10
+            )
+        elif chunk_id == b"data":
+            start = pos + 8
+            # 流式写出的 wav 未回填长度时为 0 或 0xFFFFFFFF 附近的占位值，此时数据延续到文件末尾
+            if chunk_size in _WAV_UNKNOWN_SIZES or start + chunk_size > len(data):
+                end = len(data)
+            else:
+                end = start + chunk_size
+            frame_size = max(1, channels * bits // 8)
+            samples = (end - start) // frame_size
+            duration = samples / sample_rate if sample_rate else 0.0
+            bitrate = sample_rate * frame_size * 8
+            return AudioInfo(
+                "wav", duration, sample_rate, channels, bitrate, samples, start, end
+            )
+        pos += 8 + chunk_size + (chunk_size & 1)
+    raise ValueError("invalid wav file: data chunk not found")
+
+
+def _scan_mp3(data, build_index: bool) -> AudioInfo:
+    start = skip_id3(data)
+    if not build_index:
+        frames = read_xing_frames(data, start)
+        if frames is not None:
+            for _, header in iter_frames(data, start):
+                samples = frames * header.samples
+                duration = samples / header.sample_rate
+                bitrate = round((len(data) - start) * 8 / duration) if duration else 0
+                return AudioInfo(
+                    "mp3",
+                    duration,
+                    header.sample_rate,
+                    header.channels,
+                    bitrate,
+                    samples,
+                    start,
+                    len(data),
+                )
+
+    offsets, positions = array("q"), array("q")
+    samples = 0
+    sample_rate = channels = 0
+    data_start = data_end = start
+    for pos, header in iter_frames(data, start):
+        if not samples:
+            sample_rate, channels, data_start = header.sample_rate, header.channels, pos
+        if build_index:
+            offsets.append(pos)
+            positions.append(samples)
+        samples += header.samples
+        data_end = pos + header.size
+    index = None
+    if build_index:
+        index = FrameIndex(sample_rate)
+        index.offsets, index.positions, index.end = offsets, positions, data_end
+    duration = samples / sample_rate if sample_rate else 0.0
+    bitrate = round((data_end - data_start) * 8 / duration) if duration else 0
+    return AudioInfo(
+        "mp3",
+        duration,
+        sample_rate,
+        channels,
+        bitrate,
+        samples,
+        data_start,
+        data_end,
+        index,
+    )
@@ -0,0 +1,235 @@
+import hashlib
+import json
+import os
+import socket
+import threading
+import uuid
+
+from funutil import getLogger
+
+logger = getLogger("funtalk")
+
+
+class AudioSink:
+    """
+    音频输出目标：write 接收 bytes/memoryview 分块，commit 提交，abort 丢弃已写内容
+    作为上下文管理器使用时，正常退出自动 commit，异常退出自动 abort
+    """
+
+    location = None
+
+    def write(self, chunk) -> int:
+        raise NotImplementedError()
+
+    def commit(self):
+        pass
+
+    def abort(self):
+        pass
+
+    def seekable(self) -> bool:
+        return False
+
+    def __repr__(self):
+        return f"{type(self).__name__}({self.location!r})"
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        if exc_type is None:
+            self.commit()
+        else:
+            self.abort()
+
+
+class FileSink(AudioSink):
+    """
+    写入同目录下的临时文件，commit 时原子重命名为目标文件，失败不会留下半截文件
+    buffer_size: 0 表示不缓冲，分块直接写入文件
+    fsync: None 不同步，"commit" 提交前同步一次，"always" 每次写入后同步
+    """
+
+    def __init__(self, path: str, buffer_size: int = 0, fsync: str = None):
+        self.path = self.location = path
+        self.buffer_size = buffer_size
+        self.fsync = fsync
+        self._file = None
+        self._tmp_path = None
+
+    def _open(self):
+        directory = os.path.dirname(os.path.abspath(self.path))
+        os.makedirs(directory, exist_ok=True)
+        self._tmp_path = os.path.join(
+            directory,
+            f".{os.path.basename(self.path)}.{os.getpid()}.{threading.get_ident()}.tmp",
+        )
+        self._file = open(self._tmp_path, "wb", buffering=self.buffer_size)
+
+    def write(self, chunk) -> int:
+        if self._file is None:
+            self._open()
+        view = memoryview(chunk)
+        size = len(view)
+        # 不缓冲时底层 write 可能只写入部分数据
+        while view:
+            view = view[self._file.write(view) :]
+        if self.fsync == "always":
+            self._file.flush()
+            os.fsync(self._file.fileno())
+        return size
+
+    def seekable(self) -> bool:
+        return True
+
+    def seek(self, offset: int, whence: int = 0) -> int:
+        return self._file.seek(offset, whence)
+
+    def tell(self) -> int:
+        return self._file.tell()
+
+    def commit(self):
+        if self._file is None:
+            self._open()
+        self._file.flush()
+        if self.fsync:
+            os.fsync(self._file.fileno())
+        self._file.close()
+        os.replace(self._tmp_path, self.path)
+        if self.fsync:
+            _fsync_directory(os.path.dirname(os.path.abspath(self.path)))
+        self._file = self._tmp_path = None
+
+    def abort(self):
+        if self._file is None:
+            return
+        self._file.close()
+        try:
+            os.remove(self._tmp_path)
+        except OSError:
+            pass
+        self._file = self._tmp_path = None
+
+
+def _fsync_directory(directory: str):
+    try:
+        fd = os.open(directory, os.O_RDONLY)
+    except OSError:
+        return
+    try:
+        os.fsync(fd)
+    except OSError:
+        pass
+    finally:
+        os.close(fd)
+
+
+class MemorySink(AudioSink):
+    """
+    写入内存缓冲区，abort 时清空，便于重试
+    """
+
+    def __init__(self):
+        self.buffer = bytearray()
+
+    def write(self, chunk) -> int:
+        self.buffer += chunk
+        return len(chunk)
+
+    def abort(self):
+        del self.buffer[:]
+
+    def getbuffer(self) -> memoryview:
+        return memoryview(self.buffer)
+
+    def getvalue(self) -> bytes:
+        return bytes(self.buffer)
+
+
+class PipeSink(AudioSink):
+    """
+    直接写入管道、socket、文件描述符或文件对象，数据实时发出，abort 无法撤回已发送内容
+    """
+
+    def __init__(self, target, close: bool = False):
+        self.target = target
+        self._owns = close
+
+    def write(self, chunk) -> int:
+        if isinstance(self.target, socket.socket):
+            self.target.sendall(chunk)
+        elif isinstance(self.target, int):
+            view = memoryview(chunk)
+            while view:
+                view = view[os.write(self.target, view) :]
+        else:
+            self.target.write(chunk)
+        return len(chunk)
+
+    def commit(self):
+        if hasattr(self.target, "flush"):
+            self.target.flush()
+        self._close()
+
+    def abort(self):
+        self._close()
+
+    def _close(self):
+        if not self._owns:
+            return
+        if isinstance(self.target, int):
+            os.close(self.target)
+        else:
+            self.target.close()
+
+
+class ObjectStoreSink(AudioSink):
+    """
+    本地对象存储替身：root 下按 key 存放对象，commit 时原子写入并生成包含大小与 etag 的元数据
+    """
+
+    def __init__(self, root: str, key: str, content_type: str = "audio/mpeg"):
+        self.root = root
+        self.key = key
+        self.content_type = content_type
+        self.path = self.location = os.path.join(root, key)
+        self._file = FileSink(self.path)
+        self._hash = hashlib.md5()
+        self._size = 0
+
+    def write(self, chunk) -> int:
+        self._hash.update(chunk)
+        self._size += len(chunk)
+        return self._file.write(chunk)
+
+    def commit(self):
+        self._file.commit()
+        meta = FileSink(self.path + ".meta.json")
+        meta.write(
+            json.dumps(
+                {
+                    "key": self.key,
+                    "size": self._size,
+                    "etag": self._hash.hexdigest(),
+                    "content_type": self.content_type,
+                    "version": uuid.uuid4().hex,
+                }
+            ).encode("utf-8")
+        )
+        meta.commit()
+
+    def abort(self):
+        self._file.abort()
+        self._hash = hashlib.md5()
+        self._size = 0
+
+
+def open_sink(target, **kwargs) -> AudioSink:
+    """
+    将文件路径、socket、文件描述符或文件对象包装为 AudioSink，已是 AudioSink 时原样返回
+    """
+    if isinstance(target, AudioSink):
+        return target
+    if isinstance(target, (str, os.PathLike)):
+        return FileSink(os.fspath(target), **kwargs)
+    return PipeSink(target, **kwargs)
@@ -0,0 +1,81 @@
+import subprocess
+
+try:
+    import numpy as np
+    from numpy.lib.stride_tricks import sliding_window_view
+except ImportError:
+    np = None
+
+
+def decode_pcm(data, sample_rate: int, input_format: str = "mp3") -> bytes:
+    """
+    经 ffmpeg 将编码后的音频解码为 16bit 单声道 PCM
+    """
+    args = ["ffmpeg", "-hide_banner", "-loglevel", "error"]
+    args += ["-f", input_format, "-i", "pipe:0", "-ac", "1", "-ar", str(sample_rate)]
+    args += ["-f", "s16le", "pipe:1"]
+    result = subprocess.run(args, input=bytes(data), stdout=subprocess.PIPE)
+    if result.returncode:
+        raise Exception(f"failed, ffmpeg exit code: {result.returncode}")
+    return result.stdout
+
+
+def time_stretch(
+    samples,
+    rate: float,
+    sample_rate: int,
+    frame_ms: float = 40.0,
+    tolerance_ms: float = 10.0,
+):
+    """
+    WSOLA 变速不变调：rate > 1 加快，输出长度约为 len(samples) / rate
+    每个输出帧在标称位置附近 tolerance_ms 内寻找与上一帧自然延续最相似的输入片段，
+    候选片段的互相关一次矩阵乘法算完，再以 50% 重叠的 Hann 窗叠加
+    """
+    if np is None:
+        raise ImportError("time_stretch requires numpy, run: pip install numpy")
+    x = np.asarray(samples, dtype=np.float32)
+    if rate == 1.0 or len(x) == 0:
+        return x.copy()
+    frame = max(2, int(sample_rate * frame_ms / 1000) // 2 * 2)
+    hop = frame // 2
+    tolerance = max(1, int(sample_rate * tolerance_ms / 1000))
+    window = np.hanning(frame + 1)[:-1].astype(np.float32)
+
+    length = int(round(len(x) / rate))
+    count = length // hop + 1
+    # 前后补零，保证每个候选区间都完整
+    tail = frame + hop + 2 * tolerance + int(np.ceil(hop * rate))
+    padded = np.pad(x, (tolerance, tail))
+    output = np.zeros(count * hop + frame, dtype=np.float32)
+    weight = np.zeros_like(output)
+
+    previous = 0
+    for k in range(count):
+        nominal = min(int(round(k * hop * rate)), len(x))
+        if k == 0:
+            position = nominal
+        else:
+            begin = previous + hop + tolerance
+            template = padded[begin : begin + frame]
+            candidates = sliding_window_view(
+                padded[nominal : nominal + 2 * tolerance + frame], frame
+            )
+            position = nominal - tolerance + int(np.argmax(candidates @ template))
+        segment = padded[position + tolerance : position + tolerance + frame]
+        output[k * hop : k * hop + frame] += window * segment
+        weight[k * hop : k * hop + frame] += window
+        previous = position
+    np.divide(output, weight, out=output, where=weight > 1e-3)
+    return output[:length]
+
+
+def stretch_pcm(pcm, rate: float, sample_rate: int, **kwargs) -> bytes:
+    """
+    对 16bit 单声道 PCM 做 time_stretch，返回同格式 PCM
+    """
+    if np is None:
+        raise ImportError("stretch_pcm requires numpy, run: pip install numpy")
+    samples = np.frombuffer(pcm, dtype="<i2", count=len(pcm) // 2)
+    result = time_stretch(samples, rate, sample_rate, **kwargs)
+    return np.clip(np.rint(result), -32768, 32767).astype("<i2").tobytes()
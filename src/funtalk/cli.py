@@ -0,0 +1,117 @@
+import argparse
+import sys
+
+
+def _serve(args):
+    from funtalk.server import SpeechServer
+
+    SpeechServer(
+        host=args.host,
+        port=args.port,
+        engine=args.engine,
+        voice_name=args.voice_name,
+        asr_engine=args.asr_engine,
+        asr_model=args.asr_model,
+        workers=args.workers,
+        max_queue=args.max_queue,
+        pool_size=args.pool_size,
+    ).run()
+
+
+def _worker(args):
+    from funtalk.jobs import JobQueue, Worker
+
+    queue = JobQueue(args.db, lease=args.lease, journal_mode=args.journal_mode)
+    if args.retry_failed:
+        queue.retry_failed(args.batch)
+    Worker(
+        queue,
+        engine=args.engine,
+        voice_name=args.voice_name,
+        asr_engine=args.asr_engine,
+        asr_model=args.asr_model,
+    ).run(batch=args.batch, stop_when_empty=not args.forever)
+    print(queue.counts(args.batch))
+
+
+def _manifest(args):
+    from funtalk.jobs import run_manifest
+
+    if args.command == "tts":
+        options = {"engine": args.engine, "voice_name": args.voice_name}
+    else:
+        options = {"asr_engine": args.engine, "asr_model": args.model}
+    counts = run_manifest(
+        args.command,
+        args.manifest,
+        args.results or f"{args.manifest}.results.jsonl",
+        concurrency=args.concurrency,
+        processes=args.processes,
+        progress=not args.quiet,
+        **options,
+    )
+    print(counts)
+    return 1 if counts["failed"] else 0
+
+
+def _add_manifest_arguments(parser):
+    parser.add_argument("manifest", help="jsonl file, one job spec per line")
+    parser.add_argument(
+        "--results", default=None, help="default: <manifest>.results.jsonl"
+    )
+    parser.add_argument("--concurrency", type=int, default=8)
+    parser.add_argument(
+        "--processes", type=int, default=0, help="use process workers if > 0"
+    )
+    parser.add_argument("--quiet", action="store_true", help="hide progress")
+    parser.set_defaults(func=_manifest)
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(prog="funtalk")
+    commands = parser.add_subparsers(dest="command")
+    commands.required = True
+
+    serve = commands.add_parser("serve", help="start the local speech service")
+    serve.add_argument("--host", default="127.0.0.1")
+    serve.add_argument("--port", type=int, default=8000)
+    serve.add_argument("--engine", default="edge", help="edge, azure or mock")
+    serve.add_argument("--voice-name", default=None)
+    serve.add_argument("--asr-engine", default="whisper", help="whisper or mock")
+    serve.add_argument("--asr-model", default="turbo")
+    serve.add_argument("--workers", type=int, default=4)
+    serve.add_argument("--max-queue", type=int, default=64)
+    serve.add_argument("--pool-size", type=int, default=4)
+    serve.set_defaults(func=_serve)
+
+    worker = commands.add_parser("worker", help="run jobs from a sqlite job queue")
+    worker.add_argument("--db", required=True)
+    worker.add_argument("--batch", default=None)
+    worker.add_argument("--engine", default="edge", help="edge, azure or mock")
+    worker.add_argument("--voice-name", default=None)
+    worker.add_argument("--asr-engine", default="whisper", help="whisper or mock")
+    worker.add_argument("--asr-model", default="turbo")
+    worker.add_argument("--lease", type=float, default=300.0)
+    worker.add_argument(
+        "--journal-mode", default="wal", help="wal, or delete for shared storage"
+    )
+    worker.add_argument("--forever", action="store_true", help="keep polling")
+    worker.add_argument("--retry-failed", action="store_true")
+    worker.set_defaults(func=_worker)
+
+    tts = commands.add_parser("tts", help="synthesize a jsonl manifest")
+    _add_manifest_arguments(tts)
+    tts.add_argument("--engine", default="edge", help="edge, azure or mock")
+    tts.add_argument("--voice-name", default=None)
+
+    asr = commands.add_parser("asr", help="transcribe a jsonl manifest")
+    _add_manifest_arguments(asr)
+    asr.add_argument("--engine", default="whisper", help="whisper or mock")
+    asr.add_argument("--model", default="turbo")
+
+    args = parser.parse_args(argv)
+    return args.func(args)
+
+
+if __name__ == "__main__":
+    sys.exit(main())
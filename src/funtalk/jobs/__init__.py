@@ -0,0 +1,19 @@
+from ._manifest import Progress, read_manifest, read_results, run_manifest
+from ._queue import DONE, FAILED, PENDING, RUNNING, Job, JobQueue
+from ._worker import ASR, TTS, Worker
+
+__all__ = [
+    "ASR",
+    "DONE",
+    "FAILED",
+    "Job",
+    "JobQueue",
+    "PENDING",
+    "Progress",
+    "RUNNING",
+    "TTS",
+    "Worker",
+    "read_manifest",
+    "read_results",
+    "run_manifest",
+]
@@ -0,0 +1,180 @@
+import json
+import os
+import sys
+import time
+from concurrent.futures import (
+    FIRST_COMPLETED,
+    ProcessPoolExecutor,
+    ThreadPoolExecutor,
+    wait,
+)
+from typing import Iterator, Tuple
+
+from funutil import getLogger
+
+from ._queue import DONE, FAILED
+from ._worker import Worker
+
+logger = getLogger("funtalk")
+
+_worker = None
+
+
+def read_manifest(path: str) -> Iterator[Tuple[str, dict]]:
+    """
+    逐行读取 JSONL 清单，返回 (id, spec)；条目没有 id 时使用行号
+    """
+    with open(path, "r", encoding="utf-8") as file:
+        for line_no, line in enumerate(file, 1):
+            line = line.strip()
+            if not line:
+                continue
+            spec = json.loads(line)
+            yield str(spec.pop("id", line_no)), spec
+
+
+def read_results(path: str) -> set:
+    """
+    已完成条目的 id；中断时最后一行可能只写了一半，直接忽略
+    """
+    done = set()
+    if not os.path.exists(path):
+        return done
+    with open(path, "r", encoding="utf-8") as file:
+        for line in file:
+            try:
+                result = json.loads(line)
+            except ValueError:
+                continue
+            if result.get("status") == DONE:
+                done.add(str(result["id"]))
+    return done
+
+
+class Progress:
+    """
+    在 stderr 上刷新进度：完成数、失败数、吞吐与预计剩余时间
+    """
+
+    def __init__(self, total: int, stream=None, interval: float = 0.5):
+        self.total = total
+        self.stream = stream or sys.stderr
+        self.interval = interval
+        self.done = 0
+        self.failed = 0
+        self.started = time.monotonic()
+        self._shown = 0.0
+
+    def update(self, status: str):
+        if status == DONE:
+            self.done += 1
+        else:
+            self.failed += 1
+        now = time.monotonic()
+        if now - self._shown >= self.interval or self.finished:
+            self._shown = now
+            self.show(now)
+
+    @property
+    def finished(self) -> bool:
+        return self.done + self.failed >= self.total
+
+    def show(self, now: float = None):
+        elapsed = (now or time.monotonic()) - self.started
+        count = self.done + self.failed
+        rate = count / elapsed if elapsed > 0 else 0.0
+        eta = (self.total - count) / rate if rate > 0 else 0.0
+        self.stream.write(
+            f"\r{count}/{self.total}, {self.failed} failed, "
+            f"{rate:.2f} items/s, elapsed {_clock(elapsed)}, eta {_clock(eta)}"
+        )
+        if self.finished:
+            self.stream.write("\n")
+        self.stream.flush()
+
+
+def _clock(seconds: float) -> str:
+    minutes, seconds = divmod(int(seconds), 60)
+    hours, minutes = divmod(minutes, 60)
+    return f"{hours:d}:{minutes:02d}:{seconds:02d}"
+
+
+def _init_process(options: dict):
+    global _worker
+    _worker = Worker(None, **options)
+
+
+def _run_item(kind: str, spec: dict, worker: Worker = None) -> dict:
+    started = time.perf_counter()
+    try:
+        output = (worker or _worker).process(kind, spec)
+    except Exception as e:
+        return {"status": FAILED, "error": str(e)}
+    return {
+        "status": DONE,
+        "output": output,
+        "elapsed": round(time.perf_counter() - started, 3),
+    }
+
+
+def run_manifest(
+    kind: str,
+    manifest: str,
+    results: str,
+    concurrency: int = 4,
+    processes: int = 0,
+    progress: bool = True,
+    **options,
+) -> dict:
+    """
+    执行 JSONL 清单中的 tts/asr 任务（每行一个 spec，格式同 Worker），结果逐行追加到 results
+    results 中已成功的条目会被跳过，中断后用同样的参数重新执行即可续跑，失败的条目会重试
+    concurrency: 同时执行的条目数；processes > 0 时使用多进程，每个进程各自持有引擎实例，
+        适合本地 ASR 等 CPU 密集的任务，网络合成用线程即可；
+        使用线程时所有 ASR 条目共用一个模型实例，不会按并发数重复加载
+    options: 传给 Worker 的参数，如 engine、voice_name、asr_engine、asr_model
+    """
+    finished = read_results(results)
+    items = [(id, spec) for id, spec in read_manifest(manifest) if id not in finished]
+    counts = {"skipped": len(finished), DONE: 0, FAILED: 0}
+    if not items:
+        return counts
+    if processes > 0:
+        executor = ProcessPoolExecutor(
+            max_workers=processes, initializer=_init_process, initargs=(options,)
+        )
+        worker = None
+        concurrency = max(concurrency, processes)
+    else:
+        executor = ThreadPoolExecutor(max_workers=concurrency)
+        worker = Worker(None, pool_size=concurrency, **options)
+    tracker = Progress(len(items)) if progress else None
+    pending = {}
+    items = iter(items)
+    with executor, open(results, "a+", encoding="utf-8") as output:
+        # 上次中断留下的半行单独成行，不影响后续结果
+        if output.tell() > 0:
+            output.seek(output.tell() - 1)
+            if output.read(1) != "\n":
+                output.write("\n")
+        while True:
+            # 只保持 concurrency 个在途条目，避免大清单一次性全部提交
+            for id, spec in items:
+                future = executor.submit(_run_item, kind, spec, worker)
+                pending[future] = id
+                if len(pending) >= concurrency:
+                    break
+            if not pending:
+                break
+            completed, _ = wait(pending, return_when=FIRST_COMPLETED)
+            for future in completed:
+                result = dict(id=pending.pop(future), kind=kind, **future.result())
+                output.write(json.dumps(result, ensure_ascii=False, default=str))
+                output.write("\n")
+                output.flush()
+                counts[result["status"]] += 1
+                if result["status"] == FAILED:
+                    logger.error(f"item {result['id']} failed: {result['error']}")
+                if tracker is not None:
+                    tracker.update(result["status"])
+    return counts
@@ -0,0 +1,321 @@
+import json
+import os
+import sqlite3
+import threading
+import time
+from typing import Iterable, Iterator, List, NamedTuple, Optional
+
+from funutil import getLogger
+
+from funtalk.tts._scheduler import PRIORITY_BULK
+
+logger = getLogger("funtalk")
+
+PENDING = "pending"
+RUNNING = "running"
+DONE = "done"
+FAILED = "failed"
+
+_SCHEMA = """
+CREATE TABLE IF NOT EXISTS jobs (
+    id INTEGER PRIMARY KEY AUTOINCREMENT,
+    batch TEXT NOT NULL DEFAULT '',
+    key TEXT,
+    kind TEXT NOT NULL,
+    spec TEXT NOT NULL,
+    priority INTEGER NOT NULL DEFAULT 10,
+    status TEXT NOT NULL DEFAULT 'pending',
+    attempts INTEGER NOT NULL DEFAULT 0,
+    max_attempts INTEGER NOT NULL DEFAULT 3,
+    worker TEXT,
+    lease_until REAL,
+    output TEXT,
+    error TEXT,
+    created REAL NOT NULL,
+    updated REAL NOT NULL,
+    UNIQUE (batch, key)
+);
+CREATE INDEX IF NOT EXISTS jobs_claim ON jobs (status, priority, id);
+CREATE INDEX IF NOT EXISTS jobs_batch ON jobs (batch, status);
+"""
+
+_COLUMNS = (
+    "id, batch, key, kind, spec, priority, status, attempts, max_attempts, "
+    "worker, lease_until, output, error"
+)
+
+
+class Job(NamedTuple):
+    id: int
+    batch: str
+    key: Optional[str]
+    kind: str
+    spec: dict
+    priority: int
+    status: str
+    attempts: int
+    max_attempts: int
+    worker: Optional[str]
+    lease_until: Optional[float]
+    output: Optional[dict]
+    error: Optional[str]
+
+    @classmethod
+    def from_row(cls, row) -> "Job":
+        row = list(row)
+        row[4] = json.loads(row[4])
+        row[11] = None if row[11] is None else json.loads(row[11])
+        return cls(*row)
+
+
+class JobQueue:
+    """
+    基于 SQLite 的持久化任务队列：保存任务参数、租约、重试次数与产出
+    worker 通过 claim 领取任务并持有 lease 秒的租约，执行期间 heartbeat 续租；
+    worker 崩溃后租约到期，任务自动回到可领取状态，超过 max_attempts 次后标记为失败
+    同一 batch 内 key 唯一，重复提交整批任务时已存在的条目被忽略，已完成的不会重做
+    journal_mode: 默认 WAL，适合同一台机器上的多个进程；WAL 依赖共享内存，
+        多台机器通过网络文件系统共享数据库时使用 "delete"
+    """
+
+    def __init__(
+        self,
+        path: str,
+        lease: float = 300.0,
+        journal_mode: str = "wal",
+        timeout: float = 30.0,
+    ):
+        self.path = path
+        self.lease = lease
+        self.journal_mode = journal_mode
+        self.timeout = timeout
+        self._local = threading.local()
+        directory = os.path.dirname(os.path.abspath(path))
+        os.makedirs(directory, exist_ok=True)
+        self._connection().executescript(_SCHEMA)
+
+    def _connection(self) -> sqlite3.Connection:
+        connection = getattr(self._local, "connection", None)
+        if connection is None:
+            # isolation_level=None 时由代码显式开启事务，领取任务使用 BEGIN IMMEDIATE 加写锁
+            connection = sqlite3.connect(
+                self.path, timeout=self.timeout, isolation_level=None
+            )
+            connection.execute(f"PRAGMA journal_mode={self.journal_mode}")
+            connection.execute("PRAGMA synchronous=NORMAL")
+            self._local.connection = connection
+        return connection
+
+    def _transaction(self):
+        return _Transaction(self._connection())
+
+    def close(self):
+        connection = getattr(self._local, "connection", None)
+        if connection is not None:
+            connection.close()
+            self._local.connection = None
+
+    def submit(
+        self,
+        kind: str,
+        spec: dict,
+        key: str = None,
+        batch: str = "",
+        priority: int = PRIORITY_BULK,
+        max_attempts: int = 3,
+    ) -> Optional[int]:
+        """
+        提交一个任务，返回任务 id；batch 内已存在相同 key 时不重复提交，返回 None
+        """
+        now = time.time()
+        with self._transaction() as connection:
+            cursor = connection.execute(
+                "INSERT OR IGNORE INTO jobs "
+                "(batch, key, kind, spec, priority, max_attempts, created, updated) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                (batch, key, kind, json.dumps(spec), priority, max_attempts, now, now),
+            )
+            return cursor.lastrowid if cursor.rowcount else None
+
+    def submit_many(
+        self,
+        jobs: Iterable[dict],
+        batch: str = "",
+        priority: int = PRIORITY_BULK,
+        max_attempts: int = 3,
+    ) -> int:
+        """
+        在一个事务中批量提交，jobs 中每项包含 kind、spec 与可选的 key，返回新增的任务数
+        """
+        now = time.time()
+        rows = (
+            (
+                batch,
+                job.get("key"),
+                job["kind"],
+                json.dumps(job["spec"]),
+                job.get("priority", priority),
+                max_attempts,
+                now,
+                now,
+            )
+            for job in jobs
+        )
+        with self._transaction() as connection:
+            before = connection.total_changes
+            connection.executemany(
+                "INSERT OR IGNORE INTO jobs "
+                "(batch, key, kind, spec, priority, max_attempts, created, updated) "
+                "VALUES (?, ?, ?, ?, ?, ?, ?, ?)",
+                rows,
+            )
+            return connection.total_changes - before
+
+    def claim(
+        self, worker: str, limit: int = 1, kinds: List[str] = None, batch: str = None
+    ) -> List[Job]:
+        """
+        领取最多 limit 个可执行的任务（未开始，或租约已过期），按优先级与提交顺序
+        """
+        now = time.time()
+        conditions = [
+            "(status = ? OR (status = ? AND lease_until < ?))",
+            "attempts < max_attempts",
+        ]
+        params = [PENDING, RUNNING, now]
+        if kinds:
+            conditions.append(f"kind IN ({', '.join('?' * len(kinds))})")
+            params.extend(kinds)
+        if batch is not None:
+            conditions.append("batch = ?")
+            params.append(batch)
+        with self._transaction() as connection:
+            # 租约过期且次数已用完的任务不再重试
+            connection.execute(
+                "UPDATE jobs SET status = ?, error = 'lease expired', updated = ? "
+                "WHERE status = ? AND lease_until < ? AND attempts >= max_attempts",
+                (FAILED, now, RUNNING, now),
+            )
+            ids = [
+                row[0]
+                for row in connection.execute(
+                    f"SELECT id FROM jobs WHERE {' AND '.join(conditions)} "
+                    "ORDER BY priority, id LIMIT ?",
+                    params + [limit],
+                )
+            ]
+            if not ids:
+                return []
+            marks = ", ".join("?" * len(ids))
+            connection.execute(
+                "UPDATE jobs SET status = ?, worker = ?, lease_until = ?, "
+                f"attempts = attempts + 1, updated = ? WHERE id IN ({marks})",
+                [RUNNING, worker, now + self.lease, now] + ids,
+            )
+            rows = connection.execute(
+                f"SELECT {_COLUMNS} FROM jobs WHERE id IN ({marks}) "
+                "ORDER BY priority, id",
+                ids,
+            ).fetchall()
+        return [Job.from_row(row) for row in rows]
+
+    def _update_owned(self, job_id: int, worker: str, sql: str, params: list) -> bool:
+        # 只有仍持有租约的 worker 才能更新任务，租约被他人接手后的迟到结果会被丢弃
+        with self._transaction() as connection:
+            cursor = connection.execute(
+                f"UPDATE jobs SET {sql}, updated = ? "
+                "WHERE id = ? AND worker = ? AND status = ?",
+                params + [time.time(), job_id, worker, RUNNING],
+            )
+            return cursor.rowcount > 0
+
+    def heartbeat(self, job_id: int, worker: str) -> bool:
+        return self._update_owned(
+            job_id, worker, "lease_until = ?", [time.time() + self.lease]
+        )
+
+    def complete(self, job_id: int, worker: str, output: dict = None) -> bool:
+        return self._update_owned(
+            job_id,
+            worker,
+            "status = ?, output = ?, error = NULL, lease_until = NULL",
+            [DONE, json.dumps(output)],
+        )
+
+    def fail(self, job_id: int, worker: str, error: str, retry: bool = True) -> bool:
+        """
+        记录失败；retry 且未用完次数时回到待领取状态
+        """
+        return self._update_owned(
+            job_id,
+            worker,
+            "status = CASE WHEN ? AND attempts < max_attempts THEN ? ELSE ? END, "
+            "error = ?, lease_until = NULL",
+            [int(retry), PENDING, FAILED, error],
+        )
+
+    def retry_failed(self, batch: str = None) -> int:
+        """
+        将失败的任务重置为待领取，返回重置的数量
+        """
+        sql = "UPDATE jobs SET status = ?, attempts = 0, error = NULL, updated = ? WHERE status = ?"
+        params = [PENDING, time.time(), FAILED]
+        if batch is not None:
+            sql += " AND batch = ?"
+            params.append(batch)
+        with self._transaction() as connection:
+            return connection.execute(sql, params).rowcount
+
+    def get(self, job_id: int) -> Optional[Job]:
+        row = (
+            self._connection()
+            .execute(f"SELECT {_COLUMNS} FROM jobs WHERE id = ?", (job_id,))
+            .fetchone()
+        )
+        return None if row is None else Job.from_row(row)
+
+    def jobs(self, batch: str = None, status: str = None) -> Iterator[Job]:
+        conditions, params = [], []
+        if batch is not None:
+            conditions.append("batch = ?")
+            params.append(batch)
+        if status is not None:
+            conditions.append("status = ?")
+            params.append(status)
+        where = f"WHERE {' AND '.join(conditions)}" if conditions else ""
+        for row in self._connection().execute(
+            f"SELECT {_COLUMNS} FROM jobs {where} ORDER BY id", params
+        ):
+            yield Job.from_row(row)
+
+    def counts(self, batch: str = None) -> dict:
+        """
+        各状态的任务数，租约过期的 running 任务计入 pending
+        """
+        sql = (
+            "SELECT CASE WHEN status = ? AND lease_until < ? THEN ? ELSE status END, "
+            "COUNT(*) FROM jobs"
+        )
+        params = [RUNNING, time.time(), PENDING]
+        if batch is not None:
+            sql += " WHERE batch = ?"
+            params.append(batch)
+        sql += " GROUP BY 1"
+        counts = {PENDING: 0, RUNNING: 0, DONE: 0, FAILED: 0}
+        counts.update(dict(self._connection().execute(sql, params).fetchall()))
+        return counts
+
+
+class _Transaction:
+    def __init__(self, connection: sqlite3.Connection):
+        self.connection = connection
+
+    def __enter__(self) -> sqlite3.Connection:
+        self.connection.execute("BEGIN IMMEDIATE")
+        return self.connection
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        if exc_type is None:
+            self.connection.execute("COMMIT")
+        else:
+            self.connection.execute("ROLLBACK")
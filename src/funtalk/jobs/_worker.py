@@ -0,0 +1,166 @@
+import json
+import os
+import socket
+import threading
+import time
+from typing import Optional
+
+from funutil import getLogger
+
+from funtalk.asr import create_asr
+from funtalk.audio import FileSink
+from funtalk.tts import (
+    DEFAULT_VOICES,
+    PRIORITY_BULK,
+    EnginePool,
+    create_engine,
+    probe_audio,
+)
+
+from ._queue import Job, JobQueue
+
+logger = getLogger("funtalk")
+
+TTS = "tts"
+ASR = "asr"
+
+
+class Worker:
+    """
+    从 JobQueue 领取并执行 tts/asr 任务，执行期间后台线程定时续租
+    tts 任务的 spec：text、voice_file，可选 engine、voice_name、voice_rate、subtitle_file、output_format
+    asr 任务的 spec：audio，可选 engine、model、language、output_file（识别结果写为 json）
+    输出文件都是原子写入，重新领取时输出已存在的任务直接记为完成，不会重复合成
+    queue 为 None 时只通过 process 直接执行任务（如 run_manifest）
+    """
+
+    def __init__(
+        self,
+        queue: Optional[JobQueue],
+        engine: str = "edge",
+        voice_name: str = None,
+        asr_engine: str = "whisper",
+        asr_model: str = "turbo",
+        name: str = None,
+        poll: float = 1.0,
+        pool_size: int = 1,
+    ):
+        self.queue = queue
+        self.engine = engine
+        self.voice_name = voice_name
+        self.asr_engine = asr_engine
+        self.asr_model = asr_model
+        self.name = name or f"{socket.gethostname()}:{os.getpid()}"
+        self.poll = poll
+        self.tts_pool = EnginePool(create_engine, size=pool_size, shared=True)
+        # 本地识别模型每个实例各占一份模型内存，线程间只共用一个，并行识别用多进程
+        self.asr_pool = EnginePool(create_asr, size=1)
+        self.stats = {"done": 0, "failed": 0, "skipped": 0}
+
+    def run(
+        self, batch: str = None, stop_when_empty: bool = True, max_jobs: int = None
+    ):
+        """
+        循环领取任务直到队列为空（stop_when_empty）或执行完 max_jobs 个
+        """
+        handled = 0
+        while max_jobs is None or handled < max_jobs:
+            jobs = self.queue.claim(self.name, limit=1, batch=batch)
+            if not jobs:
+                if stop_when_empty:
+                    break
+                time.sleep(self.poll)
+                continue
+            self.execute(jobs[0])
+            handled += 1
+        logger.info(f"worker {self.name} finished, stats: {self.stats}")
+        return self.stats
+
+    def execute(self, job: Job):
+        stop = threading.Event()
+        heartbeat = threading.Thread(
+            target=self._heartbeat, args=(job.id, stop), daemon=True
+        )
+        heartbeat.start()
+        try:
+            output = self.handle(job)
+        except Exception as e:
+            logger.error(f"job {job.id} failed, attempt {job.attempts}: {str(e)}")
+            self.stats["failed"] += 1
+            self.queue.fail(job.id, self.name, str(e))
+        else:
+            if not self.queue.complete(job.id, self.name, output):
+                logger.warning(f"job {job.id} lease lost, result discarded")
+            self.stats["done"] += 1
+        finally:
+            stop.set()
+            heartbeat.join()
+
+    def _heartbeat(self, job_id: int, stop: threading.Event):
+        interval = max(1.0, self.queue.lease / 3)
+        while not stop.wait(interval):
+            if not self.queue.heartbeat(job_id, self.name):
+                logger.warning(f"job {job_id} lease lost")
+                return
+
+    def handle(self, job: Job) -> dict:
+        return self.process(job.kind, job.spec)
+
+    def process(self, kind: str, spec: dict) -> dict:
+        if kind == TTS:
+            return self._tts(spec)
+        if kind == ASR:
+            return self._asr(spec)
+        raise ValueError(f"unknown job kind: {kind}")
+
+    def _tts(self, spec: dict) -> dict:
+        voice_file = spec["voice_file"]
+        subtitle_file = spec.get("subtitle_file")
+        output_format = spec.get("output_format")
+        if os.path.exists(voice_file) and (
+            not subtitle_file or os.path.exists(subtitle_file)
+        ):
+            info = probe_audio(voice_file, output_format, build_index=False)
+            self.stats["skipped"] += 1
+            return {
+                "voice_file": voice_file,
+                "subtitle_file": subtitle_file,
+                "duration": info.duration if info else None,
+            }
+        engine = spec.get("engine") or self.engine
+        voice_name = (
+            spec.get("voice_name") or self.voice_name or DEFAULT_VOICES.get(engine)
+        )
+        with self.tts_pool.acquire(engine, voice_name) as client:
+            result = client.create_tts(
+                text=spec["text"],
+                voice_rate=spec.get("voice_rate", 1.0),
+                voice_file=voice_file,
+                subtitle_file=subtitle_file,
+                output_format=output_format,
+                tenant=spec.get("tenant"),
+                priority=spec.get("priority", PRIORITY_BULK),
+            )
+        if result is None:
+            raise Exception(f"failed, voice_name: {voice_name}")
+        return {
+            "voice_file": voice_file,
+            "subtitle_file": subtitle_file,
+            "duration": result.duration,
+        }
+
+    def _asr(self, spec: dict) -> dict:
+        output_file = spec.get("output_file")
+        if output_file and os.path.exists(output_file):
+            self.stats["skipped"] += 1
+            return {"output_file": output_file}
+        engine = spec.get("engine") or self.asr_engine
+        model = spec.get("model") or self.asr_model
+        with self.asr_pool.acquire(engine, model) as asr:
+            result = asr.transcribe(spec["audio"], language=spec.get("language", "ZH"))
+        if output_file:
+            with FileSink(output_file) as sink:
+                sink.write(
+                    json.dumps(result, ensure_ascii=False, default=str).encode("utf-8")
+                )
+        return {"output_file": output_file, "text": result.get("text")}
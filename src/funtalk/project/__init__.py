@@ -0,0 +1,5 @@
+from ._assemble import Clip, assemble
+from ._dialogue import Turn, render_dialogue
+from ._project import Project, ProjectBuild
+
+__all__ = ["Clip", "Project", "ProjectBuild", "Turn", "assemble", "render_dialogue"]
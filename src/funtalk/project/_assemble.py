@@ -0,0 +1,205 @@
+import json
+import os
+import time
+from typing import Iterable, List, NamedTuple, Optional, Union
+from xml.sax.saxutils import unescape
+
+from edge_tts import SubMaker
+from funutil import getLogger
+
+from funtalk.audio import FileSink, concat_audio, wav_header
+from funtalk.tts import SubtitleAligner, TTSResult, WordTimeline, parse_srt
+from funtalk.tts._subtitle import SubtitleCue
+
+logger = getLogger("funtalk")
+
+# 只有词边界时按停顿与行长分行：词间停顿至少 300ms 或一行超过 24 个字符时换行
+_CUE_PAUSE = 3000000
+_CUE_CHARS = 24
+
+
+def _timeline_cues(timeline: WordTimeline) -> List[SubtitleCue]:
+    cues = []
+    line, start, end = "", 0, 0
+    for word_start, word_end, word in timeline:
+        word = unescape(word)
+        if line and (
+            word_start - end >= _CUE_PAUSE or len(line) + len(word) > _CUE_CHARS
+        ):
+            cues.append(SubtitleCue(len(cues) + 1, start, end, line))
+            line = ""
+        if not line:
+            start = word_start
+        elif line[-1].isascii() and word[:1].isascii():
+            line += " "
+        line += word
+        end = word_end
+    if line:
+        cues.append(SubtitleCue(len(cues) + 1, start, end, line))
+    return cues
+
+
+class Clip(NamedTuple):
+    """
+    待拼接的一段音频
+    timeline: 词边界，WordTimeline 或 SubMaker
+    subtitle_file: 该段已有的字幕文件，优先使用；否则提供 text 时由 timeline 对齐生成，
+        都没有时（如 from_result 且合成时未生成字幕）按词间停顿把 timeline 分行
+    title: 章节标题，默认为文件名
+    """
+
+    voice_file: str
+    timeline: Union[WordTimeline, SubMaker, None] = None
+    subtitle_file: Optional[str] = None
+    text: Optional[str] = None
+    title: Optional[str] = None
+
+    @classmethod
+    def from_result(cls, result: TTSResult, title: str = None) -> "Clip":
+        return cls(
+            result.voice_file, result.timeline, result.subtitle_file, title=title
+        )
+
+    def word_timeline(self) -> WordTimeline:
+        if self.timeline is None:
+            return WordTimeline()
+        if isinstance(self.timeline, SubMaker):
+            return WordTimeline.from_submaker(self.timeline)
+        return self.timeline
+
+    def cues(self, timeline: WordTimeline) -> List[SubtitleCue]:
+        if self.subtitle_file and os.path.exists(self.subtitle_file):
+            with open(self.subtitle_file, "r", encoding="utf-8") as file:
+                return list(parse_srt(file.read()))
+        if self.text and timeline:
+            aligner = SubtitleAligner(self.text)
+            aligner.feed_timeline(timeline)
+            if aligner.complete:
+                return aligner.cues
+        return _timeline_cues(timeline)
+
+
+def _seek_offset(info, seconds: float) -> int:
+    # 片段内某时间点相对 data_start 的字节偏移，mp3 对齐到帧，PCM 对齐到采样
+    if info.index is not None:
+        return info.index.seek(seconds) - info.data_start
+    if info.container in ("wav", "pcm"):
+        frame_size = 2 * max(1, info.channels)
+        return min(round(seconds * info.sample_rate), info.samples) * frame_size
+    return 0
+
+
+def assemble(
+    clips: Iterable[Union[Clip, TTSResult]],
+    voice_file: str,
+    subtitle_file: str = None,
+    index_file: str = None,
+    output_format: str = None,
+    gap: float = 0.0,
+    seek_interval: float = 10.0,
+) -> TTSResult:
+    """
+    将大量已合成的片段按帧拼接为一个音频文件，不重新编码，耗时与输出大小成线性
+    字幕按每段在整体中的起点平移后合并为一个 SRT；index_file 写入 JSON 章节与定位索引：
+    chapters 为每段的标题、起始秒数、时长与字节区间，seek 为每隔 seek_interval 秒的 [秒, 字节偏移]，
+    可直接用于 HTTP Range 请求定位
+    gap: 片段之间插入的静音秒数
+    """
+    started = time.perf_counter()
+    clips = [
+        clip if isinstance(clip, Clip) else Clip.from_result(clip) for clip in clips
+    ]
+    if not clips:
+        raise ValueError("no clips to assemble")
+    sources = []
+    for index, clip in enumerate(clips):
+        if index and gap > 0:
+            sources.append(gap)
+        sources.append(clip.voice_file)
+    infos = concat_audio(sources, voice_file, output_format)
+
+    # 字节偏移从输出文件开头算起，wav 需要跳过文件头
+    first = infos[0]
+    offset = len(wav_header(first.sample_rate, 0)) if first.container == "wav" else 0
+    position = 0
+    chapters, seek, timelines, starts = [], [], [], []
+    next_seek = 0.0
+    clip_iter = iter(clips)
+    subtitle_sink = FileSink(subtitle_file) if subtitle_file else None
+    cue_index = 0
+    try:
+        for source, info in zip(sources, infos):
+            size = info.data_end - info.data_start
+            ticks = round(info.samples * 10000000 / info.sample_rate)
+            end = (position + ticks) / 10000000
+            while seek_interval > 0 and next_seek < end:
+                seconds = next_seek - position / 10000000
+                seek.append([round(next_seek, 3), offset + _seek_offset(info, seconds)])
+                next_seek += seek_interval
+            if not isinstance(source, (int, float)):
+                clip = next(clip_iter)
+                timeline = clip.word_timeline()
+                timelines.append(timeline)
+                starts.append(position)
+                chapters.append(
+                    {
+                        "title": clip.title or os.path.basename(clip.voice_file),
+                        "start": round(position / 10000000, 3),
+                        "duration": round(info.duration, 3),
+                        "offset": offset,
+                        "size": size,
+                    }
+                )
+                if subtitle_sink is not None:
+                    cues = clip.cues(timeline)
+                    if not cues and ticks:
+                        logger.warning(
+                            f"no subtitle source for clip: {clip.voice_file}, "
+                            "provide subtitle_file, text or timeline"
+                        )
+                    for cue in cues:
+                        cue_index += 1
+                        cue = SubtitleCue(
+                            cue_index,
+                            cue.start + position,
+                            cue.end + position,
+                            cue.text,
+                        )
+                        subtitle_sink.write((cue.format() + "\n").encode("utf-8"))
+            position += ticks
+            offset += size
+    except BaseException:
+        if subtitle_sink is not None:
+            subtitle_sink.abort()
+        raise
+    if subtitle_sink is not None:
+        subtitle_sink.commit()
+
+    duration = position / 10000000
+    if index_file:
+        with FileSink(index_file) as sink:
+            sink.write(
+                json.dumps(
+                    {
+                        "voice_file": voice_file,
+                        "duration": round(duration, 3),
+                        "size": offset,
+                        "chapters": chapters,
+                        "seek": seek,
+                    },
+                    ensure_ascii=False,
+                ).encode("utf-8")
+            )
+    elapsed = time.perf_counter() - started
+    logger.info(
+        f"assembled {len(clips)} clips, duration: {duration:.1f}s, "
+        f"size: {offset} bytes, cost: {elapsed:.2f}s"
+    )
+    return TTSResult(
+        voice_file,
+        WordTimeline.concatenate(timelines, starts),
+        duration,
+        output_format,
+        subtitle_file,
+        {"assemble": elapsed},
+    )
@@ -0,0 +1,149 @@
+import os
+import re
+import tempfile
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import Iterable, List, NamedTuple, Optional
+
+from funutil import getLogger
+
+from funtalk.audio import FileSink, concat_audio, get_output_format
+from funtalk.text import split_sentences
+from funtalk.tts import (
+    PRIORITY_BULK,
+    EnginePool,
+    TTSResult,
+    WordTimeline,
+    create_engine,
+)
+from funtalk.tts.base import BaseTTS
+
+from ._project import _format_srt
+
+logger = getLogger("funtalk")
+
+_NON_WORD = re.compile(r"\W+")
+
+
+class Turn(NamedTuple):
+    """
+    对话中的一轮：说话人、音色与文本
+    gap: 与上一轮之间的停顿秒数，None 时使用 render_dialogue 的 gap
+    """
+
+    speaker: str
+    voice_name: str
+    text: str
+    engine: str = "edge"
+    voice_rate: float = 1.0
+    gap: Optional[float] = None
+
+
+def _sentence_spans(timeline: WordTimeline, sentences: List[str]):
+    """
+    按字数把词边界依次分配给每个句子，返回 (开始, 结束, 句子)
+    """
+    words = list(timeline)
+    spans, index = [], 0
+    for number, sentence in enumerate(sentences):
+        size = len(_NON_WORD.sub("", sentence))
+        first = index
+        taken = 0
+        while index < len(words) and (taken < size or number == len(sentences) - 1):
+            taken += len(_NON_WORD.sub("", words[index][2]))
+            index += 1
+        if index > first:
+            spans.append((words[first][0], words[index - 1][1], sentence))
+    return spans
+
+
+def render_dialogue(
+    turns: Iterable[Turn],
+    voice_file: str,
+    subtitle_file: str = None,
+    gap: float = 0.3,
+    output_format: str = None,
+    workers: int = 8,
+    pool: EnginePool = None,
+    tenant: str = "default",
+) -> TTSResult:
+    """
+    并发合成多人对话的每一轮（可跨引擎与音色），按顺序放到同一条时间轴上
+    各轮之间插入 gap 秒静音，输出单个音频文件；字幕按句子切分并标注说话人，
+    时间来自各轮的词边界加上该轮在整段音频中的精确起点
+    总耗时取决于最慢的几轮，而不是所有轮次之和
+    """
+    turns = list(turns)
+    if not turns:
+        raise ValueError("dialogue is empty")
+    output_format = output_format or BaseTTS.default_output_format
+    extension = get_output_format(output_format).extension
+    pool = pool or EnginePool(create_engine, size=1, shared=True)
+    started = time.perf_counter()
+    with tempfile.TemporaryDirectory(prefix="funtalk-dialogue-") as directory:
+        files = [
+            os.path.join(directory, f"turn-{index}.{extension}")
+            for index in range(len(turns))
+        ]
+
+        def synthesize(index: int) -> WordTimeline:
+            turn = turns[index]
+            with pool.acquire(turn.engine, turn.voice_name) as client:
+                result = client.create_tts(
+                    text=turn.text,
+                    voice_rate=turn.voice_rate,
+                    voice_file=files[index],
+                    output_format=output_format,
+                    priority=PRIORITY_BULK,
+                    tenant=tenant,
+                )
+            if result is None:
+                raise Exception(
+                    f"failed to synthesize turn {index}, speaker: {turn.speaker}"
+                )
+            return result.timeline
+
+        with ThreadPoolExecutor(max_workers=workers) as executor:
+            timelines = list(executor.map(synthesize, range(len(turns))))
+        synthesized = time.perf_counter()
+
+        sources = []
+        for index, (turn, path) in enumerate(zip(turns, files)):
+            pause = gap if turn.gap is None else turn.gap
+            if index > 0 and pause > 0:
+                sources.append(pause)
+            sources.append(path)
+        infos = concat_audio(sources, voice_file, output_format)
+
+    # 静音段穿插在各轮之间，按所有段的采样数累加出每一轮的起点
+    offsets, position = [], 0
+    for source, info in zip(sources, infos):
+        if not isinstance(source, (int, float)):
+            offsets.append(position)
+        position += round(info.samples * 10000000 / info.sample_rate)
+    timeline = WordTimeline.concatenate(timelines, offsets)
+    if subtitle_file:
+        entries = []
+        for turn, turn_timeline, offset in zip(turns, timelines, offsets):
+            for start, end, sentence in _sentence_spans(
+                turn_timeline, split_sentences(turn.text)
+            ):
+                entries.append(
+                    (offset + start, offset + end, f"{turn.speaker}: {sentence}")
+                )
+        with FileSink(subtitle_file) as sink:
+            sink.write(_format_srt(entries).encode("utf-8"))
+    logger.info(
+        f"dialogue rendered: {len(turns)} turns, "
+        f"synthesis {synthesized - started:.2f}s, output file: {voice_file}"
+    )
+    return TTSResult.create(
+        voice_file,
+        timeline,
+        output_format,
+        subtitle_file,
+        {
+            "synthesis": synthesized - started,
+            "stitch": time.perf_counter() - synthesized,
+        },
+    )
@@ -0,0 +1,227 @@
+import difflib
+import hashlib
+import json
+import os
+import time
+from concurrent.futures import ThreadPoolExecutor
+from typing import List, NamedTuple
+
+from edge_tts.submaker import mktimestamp
+from funutil import getLogger
+
+from funtalk.audio import FileSink, concat_audio, get_output_format
+from funtalk.text import split_full_sentences, split_sentences
+from funtalk.tts import SubtitleAligner, TTSResult, WordTimeline
+from funtalk.tts.base import BaseTTS
+
+logger = getLogger("funtalk")
+
+MANIFEST = "manifest.json"
+
+
+class ProjectBuild(NamedTuple):
+    result: TTSResult
+    reused: int
+    synthesized: int
+    removed: int
+
+
+def _write_json(path: str, data):
+    with FileSink(path) as sink:
+        sink.write(json.dumps(data, ensure_ascii=False).encode("utf-8"))
+
+
+def _read_json(path: str):
+    try:
+        with open(path, "r", encoding="utf-8") as file:
+            return json.load(file)
+    except (OSError, ValueError):
+        return None
+
+
+def _format_srt(entries) -> str:
+    """
+    entries: (开始, 结束, 文本) 序列，时间单位 100ns
+    """
+    items = []
+    for index, (start, end, text) in enumerate(entries, 1):
+        start_t = mktimestamp(start).replace(".", ",")
+        end_t = mktimestamp(end).replace(".", ",")
+        items.append(f"{index}\n{start_t} --> {end_t}\n{text}\n")
+    return "\n".join(items) + "\n" if items else ""
+
+
+def _subtitle_lines(sentence: str, timeline: WordTimeline) -> List[tuple]:
+    """
+    一句的字幕行：按逗号等停顿拆成不含标点的短行，与词边界对不齐时整句一行
+    """
+    if not timeline:
+        return []
+    aligner = SubtitleAligner(sentence)
+    aligner.feed_timeline(timeline)
+    if aligner.complete:
+        return [(cue.start, cue.end, cue.text) for cue in aligner.cues]
+    line = " ".join(split_sentences(sentence))
+    return [(timeline.starts[0], timeline.duration, line)]
+
+
+class Project:
+    """
+    按句子保存音频与时间轴的工程目录，脚本修改后只重新合成有变化的句子
+    句子按句末标点切分并保留标点（合成与哈希都带标点，语调与停顿不丢失），只有字幕行去掉标点
+    每句的音频按 (引擎, 音色, 语速, 格式, 后处理, 变速方式, 句子) 的哈希存放在 segments 下，manifest.json 记录当前版本的句子顺序；
+    build 时与 manifest 比对，已有的句子直接复用，再按帧拼接出完整音频，时间轴与字幕按每段的精确时长平移
+    """
+
+    def __init__(
+        self,
+        directory: str,
+        client: BaseTTS,
+        voice_rate: float = 1.0,
+        output_format: str = None,
+        workers: int = 4,
+    ):
+        self.directory = directory
+        self.client = client
+        self.voice_rate = voice_rate
+        self.output_format = output_format or client.default_output_format
+        self.workers = workers
+        self.segment_dir = os.path.join(directory, "segments")
+        os.makedirs(self.segment_dir, exist_ok=True)
+
+    @property
+    def manifest_file(self) -> str:
+        return os.path.join(self.directory, MANIFEST)
+
+    def load_manifest(self) -> dict:
+        return _read_json(self.manifest_file) or {"segments": []}
+
+    def _key(self, sentence: str) -> str:
+        parts = (
+            self.client.engine,
+            self.client.voice_name,
+            self.voice_rate,
+            self.output_format,
+            self.client.post_process,
+            self.client.render_cache is not None,
+            sentence,
+        )
+        return hashlib.sha1("\x00".join(map(str, parts)).encode("utf-8")).hexdigest()
+
+    def _audio_file(self, key: str) -> str:
+        extension = get_output_format(self.output_format).extension
+        return os.path.join(self.segment_dir, f"{key}.{extension}")
+
+    def _timeline_file(self, key: str) -> str:
+        return os.path.join(self.segment_dir, f"{key}.json")
+
+    def _exists(self, key: str) -> bool:
+        return os.path.exists(self._audio_file(key)) and os.path.exists(
+            self._timeline_file(key)
+        )
+
+    def diff(self, text: str) -> List[tuple]:
+        """
+        新脚本与 manifest 中句子序列的差异，返回 difflib 的 opcodes
+        """
+        old = [segment["text"] for segment in self.load_manifest()["segments"]]
+        return difflib.SequenceMatcher(
+            None, old, split_full_sentences(text), autojunk=False
+        ).get_opcodes()
+
+    def _synthesize(self, key: str, sentence: str):
+        result = self.client.create_tts(
+            text=sentence,
+            voice_rate=self.voice_rate,
+            voice_file=self._audio_file(key),
+            output_format=self.output_format,
+        )
+        if result is None:
+            raise Exception(f"failed to synthesize: {sentence}")
+        _write_json(self._timeline_file(key), result.timeline.to_dict())
+
+    def build(
+        self, text: str, voice_file: str, subtitle_file: str = None, prune: bool = True
+    ) -> ProjectBuild:
+        """
+        合成脚本中新增或修改的句子，拼接出完整音频与字幕
+        prune: 删除不再被引用的句子文件
+        脚本中没有任何句子时抛出 ValueError，不改动已有的输出与工程目录
+        """
+        started = time.perf_counter()
+        sentences = split_full_sentences(text)
+        if not sentences:
+            raise ValueError("script has no sentences to build")
+        keys = [self._key(sentence) for sentence in sentences]
+        missing = {}
+        for key, sentence in zip(keys, sentences):
+            if key not in missing and not self._exists(key):
+                missing[key] = sentence
+        with ThreadPoolExecutor(max_workers=self.workers) as executor:
+            list(executor.map(self._synthesize, missing, missing.values()))
+        synthesized = time.perf_counter()
+
+        infos = concat_audio(
+            [self._audio_file(key) for key in keys], voice_file, self.output_format
+        )
+        timelines, offsets, entries, segments = [], [], [], []
+        offset = 0
+        for key, sentence, info in zip(keys, sentences, infos):
+            timeline = WordTimeline.from_dict(_read_json(self._timeline_file(key)))
+            timelines.append(timeline)
+            offsets.append(offset)
+            entries.extend(
+                (offset + start, offset + end, line)
+                for start, end, line in _subtitle_lines(sentence, timeline)
+            )
+            if info.sample_rate:
+                duration = round(info.samples * 10000000 / info.sample_rate)
+            else:
+                # 音频中没有可识别的帧，按时间轴的结束时间计
+                duration = timeline.duration
+            segments.append({"key": key, "text": sentence, "duration": duration})
+            offset += duration
+        timeline = WordTimeline.concatenate(timelines, offsets)
+        if subtitle_file:
+            with FileSink(subtitle_file) as sink:
+                sink.write(_format_srt(entries).encode("utf-8"))
+
+        _write_json(
+            self.manifest_file,
+            {
+                "engine": self.client.engine,
+                "voice_name": self.client.voice_name,
+                "voice_rate": self.voice_rate,
+                "output_format": self.output_format,
+                "segments": segments,
+            },
+        )
+        removed = self._prune(set(keys)) if prune else 0
+        reused = len(set(keys) - set(missing))
+        logger.info(
+            f"project built: {len(keys)} sentences, reused {reused}, "
+            f"synthesized {len(missing)}, removed {removed}"
+        )
+        result = TTSResult.create(
+            voice_file,
+            timeline,
+            self.output_format,
+            subtitle_file,
+            {
+                "synthesis": synthesized - started,
+                "stitch": time.perf_counter() - synthesized,
+            },
+        )
+        return ProjectBuild(result, reused, len(missing), removed)
+
+    def _prune(self, keep: set) -> int:
+        removed = set()
+        for entry in os.scandir(self.segment_dir):
+            key = entry.name.split(".", 1)[0]
+            if key not in keep and not entry.name.startswith("."):
+                try:
+                    os.remove(entry.path)
+                    removed.add(key)
+                except OSError:
+                    pass
+        return len(removed)
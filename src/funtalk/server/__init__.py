@@ -0,0 +1,3 @@
+from ._app import HTTPError, SpeechServer
+
+__all__ = ["HTTPError", "SpeechServer"]
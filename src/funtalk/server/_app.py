@@ -0,0 +1,353 @@
+import asyncio
+import base64
+import json
+import os
+import tempfile
+import threading
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager
+from urllib.parse import parse_qsl, urlsplit
+
+from funutil import getLogger
+
+from funtalk.asr import create_asr
+from funtalk.audio import MemorySink, get_output_format
+from funtalk.tts import DEFAULT_VOICES, EnginePool, create_engine
+from funtalk.tts._edge_session import default_edge_session_pool
+from funtalk.tts._scheduler import default_scheduler
+
+logger = getLogger("funtalk")
+
+_REASONS = {
+    200: "OK",
+    400: "Bad Request",
+    404: "Not Found",
+    413: "Payload Too Large",
+    429: "Too Many Requests",
+    500: "Internal Server Error",
+}
+
+
+class HTTPError(Exception):
+    def __init__(self, status: int, message: str):
+        super().__init__(message)
+        self.status = status
+        self.message = message
+
+
+class SpeechServer:
+    """
+    基于 asyncio 的本地语音服务
+    POST /tts         合成，返回音频（response=json 时返回音频、字幕与时长）
+    POST /tts/stream  流式合成，chunked 返回音频
+    POST /asr         识别，请求体为音频数据
+    GET  /health      服务状态
+    同时处理 workers 个请求，最多排队 max_queue 个，超出直接返回 429
+    """
+
+    def __init__(
+        self,
+        host: str = "127.0.0.1",
+        port: int = 8000,
+        engine: str = "edge",
+        voice_name: str = None,
+        asr_engine: str = "whisper",
+        asr_model: str = "turbo",
+        workers: int = 4,
+        max_queue: int = 64,
+        pool_size: int = 4,
+        max_body: int = 64 * 1024 * 1024,
+    ):
+        self.host = host
+        self.port = port
+        self.engine = engine
+        self.voice_name = voice_name
+        self.asr_engine = asr_engine
+        self.asr_model = asr_model
+        self.workers = workers
+        self.max_queue = max_queue
+        self.max_body = max_body
+        # tts 实例无状态，可被并发请求共用
+        self.tts_pool = EnginePool(create_engine, size=pool_size, shared=True)
+        self.asr_pool = EnginePool(create_asr, size=1)
+        self.stats = {"accepted": 0, "rejected": 0, "completed": 0, "failed": 0}
+        self._executor = ThreadPoolExecutor(max_workers=workers)
+        self._pending = 0
+        self._slots = None
+        self._routes = {
+            ("GET", "/health"): self._health,
+            ("POST", "/tts"): self._tts,
+            ("POST", "/tts/stream"): self._tts_stream,
+            ("POST", "/asr"): self._asr,
+        }
+
+    async def start(self):
+        self._slots = asyncio.Semaphore(self.workers)
+        server = await asyncio.start_server(self._handle, self.host, self.port)
+        self.port = server.sockets[0].getsockname()[1]
+        logger.info(f"serving on http://{self.host}:{self.port}, engine: {self.engine}")
+        return server
+
+    async def serve_forever(self):
+        server = await self.start()
+        async with server:
+            await server.serve_forever()
+
+    def run(self):
+        asyncio.run(self.serve_forever())
+
+    @asynccontextmanager
+    async def _admit(self):
+        if self._pending >= self.workers + self.max_queue:
+            self.stats["rejected"] += 1
+            raise HTTPError(429, "queue is full")
+        self._pending += 1
+        self.stats["accepted"] += 1
+        try:
+            async with self._slots:
+                yield
+            self.stats["completed"] += 1
+        except Exception:
+            self.stats["failed"] += 1
+            raise
+        finally:
+            self._pending -= 1
+
+    async def _run(self, func, *args):
+        loop = asyncio.get_running_loop()
+        return await loop.run_in_executor(self._executor, func, *args)
+
+    async def _handle(self, reader, writer):
+        try:
+            method, path, params, body = await self._read_request(reader)
+            route = self._routes.get((method, path))
+            if route is None:
+                raise HTTPError(404, f"not found: {method} {path}")
+            await route(writer, params, body)
+        except HTTPError as e:
+            await self._send_json(writer, e.status, {"error": e.message})
+        except (asyncio.IncompleteReadError, ConnectionError):
+            pass
+        except Exception as e:
+            logger.error(f"failed, error: {str(e)}")
+            await self._send_json(writer, 500, {"error": str(e)})
+        finally:
+            writer.close()
+
+    async def _read_request(self, reader):
+        try:
+            head = await reader.readuntil(b"\r\n\r\n")
+        except asyncio.LimitOverrunError:
+            raise HTTPError(413, "header too large")
+        lines = head.decode("latin-1").split("\r\n")
+        try:
+            method, target, _ = lines[0].split(" ", 2)
+        except ValueError:
+            raise HTTPError(400, "invalid request line")
+        headers = {}
+        for line in lines[1:]:
+            if ":" in line:
+                key, value = line.split(":", 1)
+                headers[key.strip().lower()] = value.strip()
+        length = int(headers.get("content-length") or 0)
+        if length > self.max_body:
+            raise HTTPError(413, f"body too large: {length}")
+        body = await reader.readexactly(length) if length else b""
+        url = urlsplit(target)
+        params = dict(parse_qsl(url.query))
+        if body and headers.get("content-type", "").startswith("application/json"):
+            try:
+                params.update(json.loads(body))
+            except ValueError:
+                raise HTTPError(400, "invalid json body")
+        return method.upper(), url.path, params, body
+
+    async def _send(
+        self, writer, status: int, body: bytes, content_type: str, headers=None
+    ):
+        lines = [
+            f"HTTP/1.1 {status} {_REASONS.get(status, '')}",
+            f"Content-Type: {content_type}",
+            f"Content-Length: {len(body)}",
+            "Connection: close",
+        ]
+        if status == 429:
+            lines.append("Retry-After: 1")
+        for key, value in (headers or {}).items():
+            lines.append(f"{key}: {value}")
+        writer.write(("\r\n".join(lines) + "\r\n\r\n").encode("latin-1") + body)
+        try:
+            await writer.drain()
+        except ConnectionError:
+            pass
+
+    async def _send_json(self, writer, status: int, data: dict):
+        body = json.dumps(data, ensure_ascii=False, default=str).encode("utf-8")
+        await self._send(writer, status, body, "application/json; charset=utf-8")
+
+    def _tts_params(self, params: dict):
+        text = params.get("text")
+        if not text:
+            raise HTTPError(400, "text is required")
+        engine = params.get("engine") or self.engine
+        voice_name = (
+            params.get("voice_name") or self.voice_name or DEFAULT_VOICES.get(engine)
+        )
+        try:
+            voice_rate = float(params.get("voice_rate", 1.0))
+        except ValueError:
+            raise HTTPError(400, "invalid voice_rate")
+        output_format = params.get("output_format") or None
+        try:
+            mime = get_output_format(output_format).mime if output_format else None
+        except ValueError as e:
+            raise HTTPError(400, str(e))
+        return engine, voice_name, text, voice_rate, output_format, mime or "audio/mpeg"
+
+    async def _health(self, writer, params, body):
+        await self._send_json(
+            writer,
+            200,
+            {
+                "status": "ok",
+                "pending": self._pending,
+                "workers": self.workers,
+                "max_queue": self.max_queue,
+                "stats": self.stats,
+                "tts_pool": self.tts_pool.stats(),
+                "asr_pool": self.asr_pool.stats(),
+                "edge_sessions": default_edge_session_pool.stats(),
+                "scheduler": default_scheduler.stats(),
+            },
+        )
+
+    def _synthesize(
+        self, engine, voice_name, text, voice_rate, output_format, tenant=None
+    ):
+        # 音频直接写入内存，不经过临时文件
+        sink = MemorySink()
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            subtitle_file = os.path.join(tmp_dir, "voice.srt")
+            with self.tts_pool.acquire(engine, voice_name) as client:
+                result = client.create_tts(
+                    text=text,
+                    voice_rate=voice_rate,
+                    voice_file=sink,
+                    subtitle_file=subtitle_file,
+                    output_format=output_format,
+                    tenant=tenant,
+                )
+            if result is None:
+                raise Exception(f"failed, voice_name: {voice_name}")
+            duration = result.duration
+            audio = sink.getvalue()
+            subtitle = ""
+            if os.path.exists(subtitle_file):
+                with open(subtitle_file, "r", encoding="utf-8") as file:
+                    subtitle = file.read()
+        return audio, subtitle, duration
+
+    async def _tts(self, writer, params, body):
+        engine, voice_name, text, voice_rate, output_format, mime = self._tts_params(
+            params
+        )
+        async with self._admit():
+            audio, subtitle, duration = await self._run(
+                self._synthesize,
+                engine,
+                voice_name,
+                text,
+                voice_rate,
+                output_format,
+                params.get("tenant"),
+            )
+        if params.get("response") == "json":
+            await self._send_json(
+                writer,
+                200,
+                {
+                    "audio": base64.b64encode(audio).decode("ascii"),
+                    "subtitle": subtitle,
+                    "duration": duration,
+                },
+            )
+        else:
+            await self._send(writer, 200, audio, mime, {"X-Audio-Duration": duration})
+
+    async def _tts_stream(self, writer, params, body):
+        engine, voice_name, text, voice_rate, output_format, mime = self._tts_params(
+            params
+        )
+        loop = asyncio.get_running_loop()
+        queue = asyncio.Queue(maxsize=16)
+        stop = threading.Event()
+
+        def produce():
+            # 队列满时阻塞生产线程，客户端读得慢时合成也随之放慢
+            def put(item):
+                asyncio.run_coroutine_threadsafe(queue.put(item), loop).result()
+
+            try:
+                with self.tts_pool.acquire(engine, voice_name) as client:
+                    for chunk in client.stream_tts(
+                        text=text,
+                        voice_rate=voice_rate,
+                        output_format=output_format,
+                        tenant=params.get("tenant"),
+                    ):
+                        if stop.is_set():
+                            return
+                        put(chunk)
+                put(None)
+            except Exception as e:
+                put(e)
+
+        async with self._admit():
+            task = loop.run_in_executor(self._executor, produce)
+            try:
+                chunk = await queue.get()
+                if isinstance(chunk, Exception):
+                    raise chunk
+                writer.write(
+                    (
+                        "HTTP/1.1 200 OK\r\n"
+                        f"Content-Type: {mime}\r\n"
+                        "Transfer-Encoding: chunked\r\n"
+                        "Connection: close\r\n\r\n"
+                    ).encode("latin-1")
+                )
+                while chunk is not None:
+                    if isinstance(chunk, Exception):
+                        logger.error(f"failed, error: {str(chunk)}")
+                        return
+                    writer.write(b"%x\r\n%s\r\n" % (len(chunk), chunk))
+                    await writer.drain()
+                    chunk = await queue.get()
+                writer.write(b"0\r\n\r\n")
+                await writer.drain()
+            finally:
+                stop.set()
+                while not task.done():
+                    if queue.empty():
+                        await asyncio.sleep(0.01)
+                    else:
+                        queue.get_nowait()
+                await task
+
+    def _transcribe(self, audio: bytes, suffix: str, model: str, language: str):
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            audio_file = os.path.join(tmp_dir, f"audio{suffix}")
+            with open(audio_file, "wb") as file:
+                file.write(audio)
+            with self.asr_pool.acquire(self.asr_engine, model) as asr:
+                return asr.transcribe(audio_file, language=language)
+
+    async def _asr(self, writer, params, body):
+        if not body:
+            raise HTTPError(400, "audio body is required")
+        suffix = "." + params.get("format", "mp3").lstrip(".")
+        model = params.get("model") or self.asr_model
+        language = params.get("language", "ZH")
+        async with self._admit():
+            result = await self._run(self._transcribe, body, suffix, model, language)
+        await self._send_json(writer, 200, result)
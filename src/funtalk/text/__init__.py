@@ -0,0 +1,21 @@
+from ._segment import (
+    PUNCTUATIONS,
+    SentenceSegmenter,
+    chunk_text,
+    iter_paragraphs,
+    iter_sentences,
+    normalize_text,
+    split_full_sentences,
+    split_sentences,
+)
+
+__all__ = [
+    "PUNCTUATIONS",
+    "SentenceSegmenter",
+    "chunk_text",
+    "iter_paragraphs",
+    "iter_sentences",
+    "normalize_text",
+    "split_full_sentences",
+    "split_sentences",
+]
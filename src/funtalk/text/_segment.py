@@ -0,0 +1,143 @@
+import os
+import re
+from typing import Iterable, Iterator, List, Union
+
+# 中英文断句标点；数字之间的 "." 视为小数点，不断句
+PUNCTUATIONS = "?,.、;:!…？，。；：！"
+_SPLIT_PATTERN = re.compile(r"\n|(?<!\d)\.|\.(?!\d)|[?,、;:!…？，。；：！]")
+# 句末标点（含紧随其后的引号、括号）与换行，逗号等句中停顿不断句
+_SENTENCE_END_PATTERN = re.compile(
+    r"(?:[?!;…？！；。]|(?<!\d)\.|\.(?!\d))+[\"'”’」』）)]*|\n"
+)
+_PARAGRAPH_PATTERN = re.compile(r"\n[ \t\r]*\n")
+_NORMALIZE_TABLE = str.maketrans({char: " " for char in "[](){}"})
+
+
+def normalize_text(text: str) -> str:
+    """
+    合成前的文本规整，去掉括号类字符
+    """
+    return text.translate(_NORMALIZE_TABLE).strip()
+
+
+def split_sentences(text: str) -> List[str]:
+    """
+    按标点与换行切分文本，结果不含标点，与字幕逐行对齐使用
+    """
+    lines = []
+    for line in _SPLIT_PATTERN.split(text):
+        line = line.strip()
+        if line:
+            lines.append(line)
+    return lines
+
+
+def split_full_sentences(text: str) -> List[str]:
+    """
+    按句末标点与换行切分文本，保留标点，用于逐句合成（语调与停顿依赖标点）；
+    字幕行用 split_sentences
+    """
+    sentences = []
+    start = 0
+    for match in _SENTENCE_END_PATTERN.finditer(text):
+        sentence = text[start : match.end()].strip()
+        start = match.end()
+        if sentence:
+            sentences.append(sentence)
+    if text[start:].strip():
+        sentences.append(text[start:].strip())
+    return sentences
+
+
+def chunk_text(text: str, max_chars: int = 1000) -> List[str]:
+    """
+    长文本分块，保留标点，尽量在断句处切分，每块不超过 max_chars 个字符
+    """
+    chunks = []
+    current = ""
+    start = 0
+    for match in _SPLIT_PATTERN.finditer(text):
+        piece = text[start : match.end()]
+        start = match.end()
+        current = _append_piece(chunks, current, piece, max_chars)
+    current = _append_piece(chunks, current, text[start:], max_chars)
+    if current.strip():
+        chunks.append(current.strip())
+    return chunks
+
+
+def _append_piece(chunks: List[str], current: str, piece: str, max_chars: int) -> str:
+    if len(current) + len(piece) <= max_chars:
+        return current + piece
+    if current.strip():
+        chunks.append(current.strip())
+    while len(piece) > max_chars:
+        chunks.append(piece[:max_chars].strip())
+        piece = piece[max_chars:]
+    return piece
+
+
+class SentenceSegmenter:
+    """
+    增量断句：逐段喂入文本，返回已经完整的句子，结束时调用 flush 取出剩余部分
+    """
+
+    def __init__(self):
+        self._buffer = ""
+
+    def feed(self, chunk: str) -> List[str]:
+        buffer = self._buffer + chunk
+        # 以 "数字." 结尾时无法确定是否为小数点，留到下一段再判断
+        held = ""
+        if len(buffer) >= 2 and buffer[-1] == "." and buffer[-2].isdigit():
+            buffer, held = buffer[:-1], "."
+        pieces = _SPLIT_PATTERN.split(buffer)
+        self._buffer = pieces.pop() + held
+        return [piece.strip() for piece in pieces if piece.strip()]
+
+    def flush(self) -> List[str]:
+        buffer, self._buffer = self._buffer, ""
+        return split_sentences(buffer)
+
+
+def iter_sentences(chunks: Iterable[str]) -> Iterator[str]:
+    segmenter = SentenceSegmenter()
+    for chunk in chunks:
+        yield from segmenter.feed(chunk)
+    yield from segmenter.flush()
+
+
+def _read_chunks(source, chunk_size: int) -> Iterator[str]:
+    if isinstance(source, (str, os.PathLike)):
+        with open(source, "r", encoding="utf-8") as file:
+            while True:
+                chunk = file.read(chunk_size)
+                if not chunk:
+                    break
+                yield chunk
+    else:
+        yield from source
+
+
+def iter_paragraphs(
+    source: Union[str, os.PathLike, Iterable[str]],
+    max_chars: int = 1000,
+    chunk_size: int = 65536,
+) -> Iterator[str]:
+    """
+    惰性读取文件路径或文本迭代器，按段落（空行分隔）产出不超过 max_chars 的文本块，保留标点
+    超长段落在断句处继续切分；内存占用与 chunk_size、max_chars 相关，与全文长度无关
+    """
+    buffer = ""
+    for chunk in _read_chunks(source, chunk_size):
+        buffer += chunk
+        paragraphs = _PARAGRAPH_PATTERN.split(buffer)
+        buffer = paragraphs.pop()
+        for paragraph in paragraphs:
+            yield from chunk_text(paragraph.strip(), max_chars)
+        if len(buffer) > max_chars:
+            # 段落尚未结束，先产出已完整的块，最后一块可能被截断，留待后续内容补齐
+            pieces = chunk_text(buffer, max_chars)
+            yield from pieces[:-1]
+            buffer = buffer[buffer.rindex(pieces[-1]) :] if pieces else ""
+    yield from chunk_text(buffer.strip(), max_chars)
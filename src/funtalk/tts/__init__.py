@@ -1,4 +1,47 @@
 from ._edge import tts_generate as edge_tts_generate
 from ._edge import tts_generate
+from ._edge_session import EdgeSessionPool
+from ._mock import MockTTS
+from ._pool import EnginePool
+from ._reading import PRIORITY_PREFETCH, ReadingSession
+from ._region import AzureEndpoint, RegionRouter
+from ._registry import DEFAULT_VOICES, create_engine
+from ._render_cache import RenderCache
+from ._result import TTSResult, probe_audio
+from ._scheduler import (
+    PRIORITY_BULK,
+    PRIORITY_INTERACTIVE,
+    Quota,
+    Scheduler,
+    TokenBucket,
+    unmetered,
+)
+from ._subtitle import SubtitleAligner, SubtitleCue, parse_srt
+from ._timeline import WordTimeline
 
-__all__ = ["edge_tts_generate", "tts_generate"]
+__all__ = [
+    "AzureEndpoint",
+    "DEFAULT_VOICES",
+    "EdgeSessionPool",
+    "EnginePool",
+    "MockTTS",
+    "PRIORITY_BULK",
+    "PRIORITY_INTERACTIVE",
+    "PRIORITY_PREFETCH",
+    "Quota",
+    "ReadingSession",
+    "RegionRouter",
+    "RenderCache",
+    "Scheduler",
+    "SubtitleAligner",
+    "SubtitleCue",
+    "TTSResult",
+    "TokenBucket",
+    "WordTimeline",
+    "create_engine",
+    "edge_tts_generate",
+    "parse_srt",
+    "probe_audio",
+    "tts_generate",
+    "unmetered",
+]
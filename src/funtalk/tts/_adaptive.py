@@ -0,0 +1,75 @@
+import time
+
+# 延迟按文本长度归一：每次调用约有 100 字的固定开销
+_OVERHEAD_CHARS = 100
+
+
+class AdaptiveConcurrency:
+    """
+    AIMD 并发控制：成功时加性增加、失败/限流/延迟明显升高时乘性减少在途请求数上限
+    起步阶段（慢启动）每次成功加 1，窗口每轮翻倍，直到第一次减少；之后每轮窗口只加 1
+    延迟按字数归一后与基线比较，超过 latency_factor 倍视为拥塞；一轮往返内最多减少一次，
+    同一批并发请求同时失败只算一次
+    非线程安全，由 Scheduler 在锁内调用
+    """
+
+    def __init__(
+        self,
+        initial: int = 4,
+        minimum: int = 1,
+        maximum: int = 64,
+        decrease: float = 0.5,
+        latency_factor: float = 2.0,
+        smoothing: float = 0.05,
+    ):
+        self.minimum = minimum
+        self.maximum = max(minimum, maximum)
+        self.decrease = decrease
+        self.latency_factor = latency_factor
+        self.smoothing = smoothing
+        self._limit = float(min(max(initial, minimum), self.maximum))
+        self._slow_start = True
+        self._baseline = None
+        self._rtt = None
+        self._decreased_at = 0.0
+        self.stats = {"increased": 0, "decreased": 0}
+
+    @property
+    def limit(self) -> int:
+        return int(self._limit)
+
+    def success(self, latency: float, chars: int = 0):
+        unit = latency / (1 + chars / _OVERHEAD_CHARS)
+        if self._baseline is None:
+            self._baseline = unit
+        else:
+            # 取最小值并缓慢上漂，服务整体变慢时基线随之调整，不会一直收缩
+            drifted = self._baseline + self.smoothing * (unit - self._baseline)
+            self._baseline = min(unit, drifted)
+        if self._rtt is None:
+            self._rtt = latency
+        else:
+            self._rtt += self.smoothing * (latency - self._rtt)
+        if self.latency_factor and unit > self.latency_factor * self._baseline:
+            self._decrease()
+            return
+        before = self.limit
+        step = 1.0 if self._slow_start else 1.0 / self._limit
+        self._limit = min(float(self.maximum), self._limit + step)
+        if self.limit > before:
+            self.stats["increased"] += 1
+
+    def failure(self):
+        """
+        请求失败或被限流
+        """
+        self._decrease()
+
+    def _decrease(self):
+        now = time.monotonic()
+        if now - self._decreased_at < max(0.1, self._rtt or 0.0):
+            return
+        self._decreased_at = now
+        self._slow_start = False
+        self._limit = max(float(self.minimum), self._limit * self.decrease)
+        self.stats["decreased"] += 1
@@ -1,17 +1,165 @@
-from datetime import datetime
+import asyncio
+import bisect
+from contextlib import asynccontextmanager, contextmanager
+from contextvars import ContextVar
+from datetime import datetime, timedelta
+from functools import lru_cache
+from typing import List, Optional
+from xml.sax.saxutils import escape
 
-from edge_tts import SubMaker
 from funutil import getLogger
 from funvideo.app.config import config
 
+from funtalk.audio import get_output_format, iter_frames, open_sink
+
+from ._edge import convert_rate_to_percent
+from ._region import AzureEndpoint, RegionRouter
+from ._result import TTSResult
+from ._scheduler import PRIORITY_BULK
+from ._timeline import WordTimeline
 from .base import BaseTTS
 
 logger = getLogger("funtalk")
 
+AZURE_OUTPUT_FORMAT = "mp3-48k-192kbps"
+
+# 使用路由时本次调用的 (text, priority, tenant)：由 _slot/_aslot 记录，
+# 同一线程（或任务）内的 _tts/_atts/_batch_speak 每次尝试按实际使用的区域申请配额
+_current_request: ContextVar = ContextVar("azure_request", default=None)
+
+
+@lru_cache(maxsize=None)
+def default_region_router() -> Optional[RegionRouter]:
+    """
+    由 config.azure 中的 speech_endpoints（[{key, region, host}]）创建的共享路由，未配置时为 None
+    """
+    endpoints = config.azure.get("speech_endpoints") or []
+    if not endpoints:
+        return None
+    return RegionRouter(
+        AzureEndpoint(item["key"], item["region"], item.get("host"))
+        for item in endpoints
+    ).start()
+
+
+def _format_duration_to_offset(duration) -> int:
+    if isinstance(duration, timedelta):
+        seconds = duration.days * 86400 + duration.seconds
+        return seconds * 10000000 + duration.microseconds * 10
+
+    if isinstance(duration, str):
+        time_obj = datetime.strptime(duration, "%H:%M:%S.%f")
+        milliseconds = (
+            (time_obj.hour * 3600000)
+            + (time_obj.minute * 60000)
+            + (time_obj.second * 1000)
+            + (time_obj.microsecond // 1000)
+        )
+        return milliseconds * 10000
+
+    if isinstance(duration, int):
+        return duration
+
+    return 0
+
 
 class AzureTTS(BaseTTS):
-    def __init__(self, *args, **kwargs):
+    engine = "azure"
+    default_output_format = AZURE_OUTPUT_FORMAT
+
+    def __init__(self, *args, sentence_boundary: bool = True, router=True, **kwargs):
+        """
+        sentence_boundary: 需要字幕时同时请求句子边界事件，字幕直接按句生成，不再逐词匹配脚本
+        router: True 使用按 config.azure.speech_endpoints 创建的共享多区域路由（未配置时只用 speech_region），
+            False 关闭，也可传入 RegionRouter 实例
+        """
         super().__init__(*args, **kwargs)
+        self.sentence_boundary = sentence_boundary
+        if router is True:
+            router = default_region_router()
+        self.router: Optional[RegionRouter] = router or None
+
+    @property
+    def region(self) -> Optional[str]:
+        return config.azure.get("speech_region", "") or None
+
+    @contextmanager
+    def _slot(
+        self, text: str, priority: int = None, tenant: str = None, region: str = None
+    ):
+        # 使用路由时区域在每次尝试时才选定（见 _attempt），配额也按实际使用的区域逐次申请，
+        # 这里只记录本次调用的参数
+        if self.router is None:
+            with super()._slot(text, priority, tenant, region):
+                yield
+            return
+        token = _current_request.set((text, priority, tenant))
+        try:
+            yield
+        finally:
+            _current_request.reset(token)
+
+    @asynccontextmanager
+    async def _aslot(
+        self, text: str, priority: int = None, tenant: str = None, region: str = None
+    ):
+        # 与 _slot 相同，调用参数记录在当前任务的上下文中
+        if self.router is None:
+            async with super()._aslot(text, priority, tenant, region):
+                yield
+            return
+        token = _current_request.set((text, priority, tenant))
+        try:
+            yield
+        finally:
+            _current_request.reset(token)
+
+    @contextmanager
+    def _attempt(self, failed: list):
+        """
+        一次尝试：选定尚未失败的终结点并占用该区域的配额，重试切换区域时先归还上一区域的配额；
+        未使用路由时配额已由 _slot 占用，返回 None
+        """
+        if self.router is None:
+            yield None
+            return
+        endpoint = self.router.choose(exclude=failed)
+        request = _current_request.get()
+        if request is None:
+            yield endpoint
+            return
+        text, priority, tenant = request
+        with BaseTTS._slot(self, text, priority, tenant, endpoint.region):
+            yield endpoint
+
+    @asynccontextmanager
+    async def _aattempt(self, failed: list):
+        """
+        _attempt 的异步版本
+        """
+        if self.router is None:
+            yield None
+            return
+        endpoint = self.router.choose(exclude=failed)
+        request = _current_request.get()
+        if request is None:
+            yield endpoint
+            return
+        text, priority, tenant = request
+        async with BaseTTS._aslot(self, text, priority, tenant, endpoint.region):
+            yield endpoint
+
+    def _report(self, endpoint: Optional[AzureEndpoint], failed: Optional[list]):
+        # 请求耗时随文本长度变化，只计成败，延迟以探测结果为准
+        if failed is not None:
+            self._failed(region=endpoint.region if endpoint else None)
+        if endpoint is None:
+            return
+        if failed is None:
+            self.router.report(endpoint)
+        else:
+            self.router.report(endpoint, ok=False)
+            failed.append(endpoint)
 
     def get_all_voice_name(self, filter_locals=None) -> list[str]:
         if filter_locals is None:
@@ -1018,112 +1166,452 @@ class AzureTTS(BaseTTS):
             return voice_name.replace("-V2", "").strip()
         return voice_name
 
-    def _tts(
-        self, text: str, voice_rate: float, voice_file: str, *args, **kwargs
-    ) -> [SubMaker, None]:
+    def _check_throttled(
+        self, cancellation_details, endpoint: Optional[AzureEndpoint] = None
+    ):
+        # 配额用尽（429）或服务暂时不可用（503）时，通知调度器暂停该区域的请求
+        import azure.cognitiveservices.speech as speechsdk
+
+        if cancellation_details.error_code in (
+            speechsdk.CancellationErrorCode.TooManyRequests,
+            speechsdk.CancellationErrorCode.ServiceUnavailable,
+        ):
+            self._throttled(region=endpoint.region if endpoint else None)
+
+    @staticmethod
+    def _speech_config(
+        voice_name: str,
+        output_format: str = None,
+        sentence_boundary: bool = False,
+        endpoint: AzureEndpoint = None,
+    ):
+        import azure.cognitiveservices.speech as speechsdk
+
+        # Creates an instance of a speech config with specified subscription key and service region.
+        if endpoint is None:
+            speech_key = config.azure.get("speech_key", "")
+            service_region = config.azure.get("speech_region", "")
+            speech_config = speechsdk.SpeechConfig(
+                subscription=speech_key, region=service_region
+            )
+        elif endpoint.host:
+            speech_config = speechsdk.SpeechConfig(
+                subscription=endpoint.key, host=endpoint.host
+            )
+        else:
+            speech_config = speechsdk.SpeechConfig(
+                subscription=endpoint.key, region=endpoint.region
+            )
+        speech_config.speech_synthesis_voice_name = voice_name
+        if sentence_boundary:
+            speech_config.set_property(
+                property_id=speechsdk.PropertyId.SpeechServiceResponse_RequestSentenceBoundary,
+                value="true",
+            )
+        speech_config.set_property(
+            property_id=speechsdk.PropertyId.SpeechServiceResponse_RequestWordBoundary,
+            value="true",
+        )
+
+        output_format = get_output_format(output_format or AZURE_OUTPUT_FORMAT)
+        speech_config.set_speech_synthesis_output_format(
+            getattr(speechsdk.SpeechSynthesisOutputFormat, output_format.azure)
+        )
+        return speech_config
+
+    def _synthesizer(
+        self,
+        voice_name: str,
+        sink,
+        output_format: str,
+        endpoint: Optional[AzureEndpoint],
+        timeline: WordTimeline,
+        on_word=None,
+        on_sentence=None,
+    ):
+        """
+        创建 SpeechSynthesizer：音频经 PushAudioOutputStream 写入 sink，词边界写入 timeline
+        传入 on_sentence 且开启 sentence_boundary 时同时请求句子边界
+        """
+        import azure.cognitiveservices.speech as speechsdk
+
+        sentence_boundary = self.sentence_boundary and on_sentence is not None
+
+        def speech_synthesizer_word_boundary_cb(evt: speechsdk.SessionEventArgs):
+            duration = _format_duration_to_offset(evt.duration)
+            offset = _format_duration_to_offset(evt.audio_offset)
+            if evt.boundary_type == speechsdk.SpeechSynthesisBoundaryType.Sentence:
+                if sentence_boundary:
+                    on_sentence(offset, offset + duration, evt.text)
+                return
+            timeline.append(offset, offset + duration, evt.text)
+            if on_word is not None:
+                on_word(offset, offset + duration, evt.text)
+
+        class SinkCallback(speechsdk.audio.PushAudioOutputStreamCallback):
+            # SDK 直接以 memoryview 回调音频数据，原样交给输出目标
+            def write(self, audio_buffer: memoryview) -> int:
+                sink.write(audio_buffer)
+                return audio_buffer.nbytes
+
+        audio_config = speechsdk.audio.AudioOutputConfig(
+            stream=speechsdk.audio.PushAudioOutputStream(SinkCallback())
+        )
+        speech_config = self._speech_config(
+            voice_name, output_format, sentence_boundary, endpoint
+        )
+        speech_synthesizer = speechsdk.SpeechSynthesizer(
+            audio_config=audio_config, speech_config=speech_config
+        )
+        speech_synthesizer.synthesis_word_boundary.connect(
+            speech_synthesizer_word_boundary_cb
+        )
+        return speech_synthesizer
+
+    def _finish(
+        self, result, sink, endpoint: Optional[AzureEndpoint], failed: list, voice_file
+    ) -> bool:
+        """
+        处理一次合成的结果：成功时提交输出，失败时丢弃并记录区域的失败与限流
+        """
+        import azure.cognitiveservices.speech as speechsdk
+
+        if result.reason == speechsdk.ResultReason.SynthesizingAudioCompleted:
+            sink.commit()
+            self._report(endpoint, None)
+            logger.success(f"azure v2 speech synthesis succeeded: {voice_file}")
+            return True
+        sink.abort()
+        self._report(endpoint, failed)
+        if result.reason == speechsdk.ResultReason.Canceled:
+            cancellation_details = result.cancellation_details
+            logger.error(
+                f"azure v2 speech synthesis canceled: {cancellation_details.reason}"
+            )
+            if cancellation_details.reason == speechsdk.CancellationReason.Error:
+                logger.error(
+                    f"azure v2 speech synthesis error: {cancellation_details.error_details}"
+                )
+                self._check_throttled(cancellation_details, endpoint)
+        logger.info(f"completed, output file: {voice_file}")
+        return False
+
+    def _voice_name(self) -> str:
         voice_name = self.check(self.voice_name)
         if not voice_name:
             logger.error(f"invalid voice name: {voice_name}")
             raise ValueError(f"invalid voice name: {voice_name}")
+        return voice_name
+
+    def _tts(
+        self,
+        text: str,
+        voice_rate: float,
+        voice_file,
+        output_format: str = None,
+        *args,
+        on_word=None,
+        on_sentence=None,
+        **kwargs,
+    ) -> Optional[WordTimeline]:
+        voice_name = self._voice_name()
         text = text.strip()
+        failed = []
 
-        def _format_duration_to_offset(duration) -> int:
-            if isinstance(duration, str):
-                time_obj = datetime.strptime(duration, "%H:%M:%S.%f")
-                milliseconds = (
-                    (time_obj.hour * 3600000)
-                    + (time_obj.minute * 60000)
-                    + (time_obj.second * 1000)
-                    + (time_obj.microsecond // 1000)
-                )
-                return milliseconds * 10000
+        for i in range(3):
+            sink = None
+            with self._attempt(failed) as endpoint:
+                try:
+                    logger.info(f"start, voice name: {voice_name}, try: {i + 1}")
+                    timeline = WordTimeline()
+                    sink = open_sink(voice_file)
+                    speech_synthesizer = self._synthesizer(
+                        voice_name,
+                        sink,
+                        output_format,
+                        endpoint,
+                        timeline,
+                        on_word,
+                        on_sentence,
+                    )
+                    result = speech_synthesizer.speak_text_async(text).get()
+                    if self._finish(result, sink, endpoint, failed, voice_file):
+                        return timeline
+                except Exception as e:
+                    if sink is not None:
+                        sink.abort()
+                    self._report(endpoint, failed)
+                    logger.error(f"failed, error: {str(e)}")
+        return None
 
-            if isinstance(duration, int):
-                return duration
+    @staticmethod
+    async def _speak(speech_synthesizer, text: str):
+        """
+        发起合成但不等待 SDK 的 ResultFuture：合成结束（完成或取消）的事件在 SDK 线程中回调，
+        转交给当前事件循环中的 future；等待被取消时通知 SDK 停止合成
+        """
+        loop = asyncio.get_running_loop()
+        future = loop.create_future()
 
-            return 0
+        def resolve(result):
+            if not future.done():
+                future.set_result(result)
+
+        def done_cb(evt):
+            loop.call_soon_threadsafe(resolve, evt.result)
+
+        speech_synthesizer.synthesis_completed.connect(done_cb)
+        speech_synthesizer.synthesis_canceled.connect(done_cb)
+        # 保留 SDK 返回的 future，合成结束前不被回收
+        pending = speech_synthesizer.speak_text_async(text)
+        try:
+            return await future
+        except asyncio.CancelledError:
+            speech_synthesizer.stop_speaking_async()
+            raise
+        finally:
+            del pending
+
+    async def _atts(
+        self,
+        text: str,
+        voice_rate: float,
+        voice_file,
+        output_format: str = None,
+        *args,
+        on_word=None,
+        on_sentence=None,
+        **kwargs,
+    ) -> Optional[WordTimeline]:
+        """
+        与 _tts 相同的重试与区域切换，等待合成结果时不占用线程
+        """
+        voice_name = self._voice_name()
+        text = text.strip()
+        failed = []
 
         for i in range(3):
-            try:
-                logger.info(f"start, voice name: {voice_name}, try: {i + 1}")
-
-                import azure.cognitiveservices.speech as speechsdk
-
-                sub_maker = SubMaker()
-
-                def speech_synthesizer_word_boundary_cb(
-                    evt: speechsdk.SessionEventArgs,
-                ):
-                    # print('WordBoundary event:')
-                    # print('\tBoundaryType: {}'.format(evt.boundary_type))
-                    # print('\tAudioOffset: {}ms'.format((evt.audio_offset + 5000)))
-                    # print('\tDuration: {}'.format(evt.duration))
-                    # print('\tText: {}'.format(evt.text))
-                    # print('\tTextOffset: {}'.format(evt.text_offset))
-                    # print('\tWordLength: {}'.format(evt.word_length))
-
-                    duration = _format_duration_to_offset(str(evt.duration))
-                    offset = _format_duration_to_offset(evt.audio_offset)
-                    sub_maker.subs.append(evt.text)
-                    sub_maker.offset.append((offset, offset + duration))
-
-                # Creates an instance of a speech config with specified subscription key and service region.
-                speech_key = config.azure.get("speech_key", "")
-                service_region = config.azure.get("speech_region", "")
-                audio_config = speechsdk.audio.AudioOutputConfig(
-                    filename=voice_file, use_default_speaker=True
-                )
-                speech_config = speechsdk.SpeechConfig(
-                    subscription=speech_key, region=service_region
-                )
-                speech_config.speech_synthesis_voice_name = voice_name
-                # speech_config.set_property(property_id=speechsdk.PropertyId.SpeechServiceResponse_RequestSentenceBoundary,
-                #                            value='true')
-                speech_config.set_property(
-                    property_id=speechsdk.PropertyId.SpeechServiceResponse_RequestWordBoundary,
-                    value="true",
-                )
+            sink = None
+            async with self._aattempt(failed) as endpoint:
+                try:
+                    logger.info(f"start, voice name: {voice_name}, try: {i + 1}")
+                    timeline = WordTimeline()
+                    sink = open_sink(voice_file)
+                    speech_synthesizer = self._synthesizer(
+                        voice_name,
+                        sink,
+                        output_format,
+                        endpoint,
+                        timeline,
+                        on_word,
+                        on_sentence,
+                    )
+                    result = await self._speak(speech_synthesizer, text)
+                    if self._finish(result, sink, endpoint, failed, voice_file):
+                        return timeline
+                except asyncio.CancelledError:
+                    if sink is not None:
+                        sink.abort()
+                    raise
+                except Exception as e:
+                    if sink is not None:
+                        sink.abort()
+                    self._report(endpoint, failed)
+                    logger.error(f"failed, error: {str(e)}")
+        return None
 
-                speech_config.set_speech_synthesis_output_format(
-                    speechsdk.SpeechSynthesisOutputFormat.Audio48Khz192KBitRateMonoMp3
-                )
-                speech_synthesizer = speechsdk.SpeechSynthesizer(
-                    audio_config=audio_config, speech_config=speech_config
-                )
-                speech_synthesizer.synthesis_word_boundary.connect(
-                    speech_synthesizer_word_boundary_cb
+    def batch_tts(
+        self,
+        texts: List[str],
+        voice_rate: float,
+        voice_files: list,
+        subtitle_files: List[str] = None,
+        output_format: str = None,
+        batch_chars: int = 2000,
+        gap: int = 300,
+        *args,
+        priority: int = PRIORITY_BULK,
+        tenant: str = "default",
+        **kwargs,
+    ) -> List[TTSResult]:
+        """
+        批量合成短文本：多条文本打包进一个 SSML 请求，每条文本前插入 bookmark，
+        合成一次后按 bookmark 位置在 mp3 帧边界切分出各自的音频与时间轴
+        batch_chars: 单个请求的最大字符数
+        gap: 文本之间插入的停顿（毫秒），切分点落在停顿中间
+        output_format: 仅支持 mp3 格式，切分依赖 mp3 帧边界
+        """
+        if get_output_format(output_format or AZURE_OUTPUT_FORMAT).container != "mp3":
+            raise ValueError(f"batch synthesis requires mp3 output: {output_format}")
+        voice_name = self._voice_name()
+        subtitle_files = subtitle_files or [None] * len(texts)
+        texts = [self._format_text(text) for text in texts]
+        results = [None] * len(texts)
+
+        groups, group, size = [], [], 0
+        for index, text in enumerate(texts):
+            if group and size + len(text) > batch_chars:
+                groups.append(group)
+                group, size = [], 0
+            group.append(index)
+            size += len(text)
+        if group:
+            groups.append(group)
+
+        for group in groups:
+            ssml = self._batch_ssml(
+                voice_name, [texts[index] for index in group], voice_rate, gap
+            )
+            with self._slot("".join(texts[index] for index in group), priority, tenant):
+                pieces = self._batch_speak(voice_name, ssml, len(group), output_format)
+            if pieces is None:
+                continue
+            for index, (audio, timeline) in zip(group, pieces):
+                with open_sink(voice_files[index]) as sink:
+                    sink.write(audio)
+                results[index] = timeline
+            logger.success(
+                f"azure batch speech synthesis succeeded: {len(group)} texts"
+            )
+
+        for index, timeline in enumerate(results):
+            if timeline is None:
+                continue
+            if subtitle_files[index]:
+                self.create_subtitle(
+                    text=texts[index],
+                    subtitle_file=subtitle_files[index],
+                    timeline=timeline,
                 )
+            results[index] = TTSResult.create(
+                voice_files[index], timeline, output_format, subtitle_files[index]
+            )
+        return results
+
+    @staticmethod
+    def _batch_ssml(voice_name: str, texts: List[str], voice_rate: float, gap: int):
+        body = ""
+        for index, text in enumerate(texts):
+            if index:
+                body += f'<break time="{gap}ms"/>'
+            body += f'<bookmark mark="{index}"/>{escape(text)}'
+        if voice_rate != 1.0:
+            body = f'<prosody rate="{convert_rate_to_percent(voice_rate)}">{body}</prosody>'
+        return (
+            '<speak version="1.0" xmlns="http://www.w3.org/2001/10/synthesis" '
+            f'xml:lang="{voice_name[:5]}"><voice name="{voice_name}">{body}</voice></speak>'
+        )
+
+    def _batch_speak(
+        self, voice_name: str, ssml: str, count: int, output_format: str = None
+    ):
+        failed = []
+        for i in range(3):
+            with self._attempt(failed) as endpoint:
+                try:
+                    logger.info(f"start batch, voice name: {voice_name}, try: {i + 1}")
+
+                    import azure.cognitiveservices.speech as speechsdk
+
+                    marks = {}
+                    words = []
 
-                result = speech_synthesizer.speak_text_async(text).get()
-                if result.reason == speechsdk.ResultReason.SynthesizingAudioCompleted:
-                    logger.success(f"azure v2 speech synthesis succeeded: {voice_file}")
-                    return sub_maker
-                elif result.reason == speechsdk.ResultReason.Canceled:
-                    cancellation_details = result.cancellation_details
-                    logger.error(
-                        f"azure v2 speech synthesis canceled: {cancellation_details.reason}"
+                    def bookmark_cb(evt):
+                        marks[int(evt.text)] = evt.audio_offset
+
+                    def word_boundary_cb(evt):
+                        duration = _format_duration_to_offset(evt.duration)
+                        offset = _format_duration_to_offset(evt.audio_offset)
+                        words.append((offset, offset + duration, evt.text))
+
+                    speech_synthesizer = speechsdk.SpeechSynthesizer(
+                        speech_config=self._speech_config(
+                            voice_name, output_format, endpoint=endpoint
+                        ),
+                        audio_config=None,
                     )
+                    speech_synthesizer.bookmark_reached.connect(bookmark_cb)
+                    speech_synthesizer.synthesis_word_boundary.connect(word_boundary_cb)
+
+                    result = speech_synthesizer.speak_ssml_async(ssml).get()
                     if (
-                        cancellation_details.reason
-                        == speechsdk.CancellationReason.Error
+                        result.reason
+                        == speechsdk.ResultReason.SynthesizingAudioCompleted
                     ):
+                        self._report(endpoint, None)
+                        if len(marks) == count:
+                            return self._split_batch(
+                                result.audio_data, marks, words, count
+                            )
+                        logger.error(f"failed, bookmarks: {len(marks)}, texts: {count}")
+                    elif result.reason == speechsdk.ResultReason.Canceled:
+                        self._report(endpoint, failed)
+                        cancellation_details = result.cancellation_details
                         logger.error(
-                            f"azure v2 speech synthesis error: {cancellation_details.error_details}"
+                            f"azure batch speech synthesis canceled: {cancellation_details.reason}, "
+                            f"{cancellation_details.error_details}"
                         )
-                logger.info(f"completed, output file: {voice_file}")
-            except Exception as e:
-                logger.error(f"failed, error: {str(e)}")
+                        self._check_throttled(cancellation_details, endpoint)
+                except Exception as e:
+                    self._report(endpoint, failed)
+                    logger.error(f"failed, error: {str(e)}")
         return None
 
+    @staticmethod
+    def _split_batch(audio: bytes, marks: dict, words: list, count: int):
+        frames = list(iter_frames(audio))
+        starts = []
+        tick = 0
+        for _, header in frames:
+            starts.append(tick)
+            tick += header.samples * 10000000 // header.sample_rate
+        words.sort()
+
+        # 切分点取上一条文本最后一个词的结束与下一个 bookmark 的中点，再对齐到帧边界
+        cuts = [0]
+        cursor = 0
+        for index in range(1, count):
+            last_end = None
+            while cursor < len(words) and words[cursor][0] < marks[index]:
+                last_end = words[cursor][1]
+                cursor += 1
+            cut = marks[index] if last_end is None else (last_end + marks[index]) // 2
+            cuts.append(max(cuts[-1], bisect.bisect_left(starts, cut)))
+        cuts.append(len(frames))
+
+        view = memoryview(audio)
+        positions = [pos for pos, _ in frames]
+        if frames:
+            positions.append(frames[-1][0] + frames[-1][1].size)
+        else:
+            positions.append(0)
+        pieces = []
+        cursor = 0
+        for index in range(count):
+            begin, end = cuts[index], cuts[index + 1]
+            base = starts[begin] if begin < len(starts) else tick
+            limit = starts[end] if end < len(starts) else float("inf")
+            timeline = WordTimeline()
+            while cursor < len(words) and words[cursor][0] < limit:
+                start, stop, text = words[cursor]
+                timeline.append(start - base, stop - base, text)
+                cursor += 1
+            pieces.append((view[positions[begin] : positions[end]], timeline))
+        return pieces
+
+
+@lru_cache(maxsize=None)
+def _shared_client(voice_name: str) -> AzureTTS:
+    # 实例无状态，同一音色的调用共用一个实例
+    return AzureTTS(voice_name=voice_name)
+
 
 def tts_generate(
     text: str, voice_name: str, voice_rate: float, voice_file: str, subtitle_file: str
-) -> [BaseTTS, None]:
-    client = AzureTTS(voice_name=voice_name)
-    client.create_tts(
+) -> Optional[TTSResult]:
+    return _shared_client(voice_name).create_tts(
         text=text,
         voice_rate=voice_rate,
         voice_file=voice_file,
         subtitle_file=subtitle_file,
     )
-    return client
@@ -1,14 +1,22 @@
 import asyncio
-from typing import List
+from functools import lru_cache
+from typing import List, Optional
 
 from edge_tts import Communicate, list_voices
-from edge_tts import SubMaker
+from funtalk.audio import get_output_format, open_sink
+from funtalk.tts._edge_session import EdgeSessionPool, default_edge_session_pool
+from funtalk.tts._result import TTSResult
+from funtalk.tts._scheduler import unmetered
+from funtalk.tts._subtitle import SubtitleAligner
+from funtalk.tts._timeline import WordTimeline
 from funtalk.tts.base import BaseTTS
 from funutil import getLogger, deep_get
 from funutil.util.retrying import retry
 
 logger = getLogger("funtalk")
 
+EDGE_OUTPUT_FORMAT = "mp3-24k-48kbps"
+
 
 def convert_rate_to_percent(rate: float) -> str:
     if rate == 1.0:
@@ -21,8 +29,55 @@ def convert_rate_to_percent(rate: float) -> str:
 
 
 class EdgeTTS(BaseTTS):
-    def __init__(self, *args, **kwargs):
+    engine = "edge"
+    default_output_format = EDGE_OUTPUT_FORMAT
+
+    def __init__(self, *args, session_pool=True, **kwargs):
+        """
+        session_pool: True 使用进程内共享的长连接池，False 每次请求新建连接，也可传入 EdgeSessionPool 实例
+        """
         super().__init__(*args, **kwargs)
+        if session_pool is True:
+            session_pool = default_edge_session_pool
+        self.session_pool: Optional[EdgeSessionPool] = session_pool or None
+
+    def _stream(self, text: str, rate: str):
+        if self.session_pool is None:
+            messages = Communicate(text, self.voice_name, rate=rate).stream_sync()
+        else:
+            messages = self.session_pool.stream_sync(text, self.voice_name, rate=rate)
+        try:
+            yield from messages
+        except Exception as e:
+            self._report_error(e)
+            raise
+
+    async def _astream(self, text: str, rate: str):
+        try:
+            async for message in self.session_pool.stream_async(
+                text, self.voice_name, rate=rate
+            ):
+                yield message
+        except Exception as e:
+            self._report_error(e)
+            raise
+
+    def _report_error(self, e: Exception):
+        if getattr(e, "status", None) == 429:
+            self._throttled()
+        else:
+            self._failed()
+
+    @staticmethod
+    def _consume(chunk: dict, writer, timeline: WordTimeline, on_word=None):
+        if chunk["type"] == "audio":
+            writer.write(memoryview(chunk["data"]))
+        elif chunk["type"] == "WordBoundary":
+            start = chunk["offset"]
+            end = start + chunk["duration"]
+            timeline.append(start, end, chunk["text"])
+            if on_word is not None:
+                on_word(start, end, chunk["text"])
 
     @staticmethod
     def list_voices(gender=None, locale="zh-CN") -> List[str]:
@@ -41,37 +96,130 @@ class EdgeTTS(BaseTTS):
 
     @retry(4)
     def _tts(
-        self, text: str, voice_rate: float, voice_file: str, *args, **kwargs
-    ) -> [SubMaker, None]:
+        self,
+        text: str,
+        voice_rate: float,
+        voice_file,
+        output_format: str = None,
+        *args,
+        on_word=None,
+        **kwargs,
+    ) -> Optional[WordTimeline]:
         text = text.strip()
         rate_str = convert_rate_to_percent(voice_rate)
-        communicate = Communicate(text, self.voice_name, rate=rate_str)
-        sub_maker = SubMaker()
+        output_format = get_output_format(output_format or EDGE_OUTPUT_FORMAT)
+        timeline = WordTimeline()
 
-        with open(voice_file, "wb") as file:
-            for chunk in communicate.stream_sync():
-                if chunk["type"] == "audio":
-                    file.write(chunk["data"])
-                elif chunk["type"] == "WordBoundary":
-                    sub_maker.create_sub(
-                        (chunk["offset"], chunk["duration"]), chunk["text"]
-                    )
-        if not sub_maker or not sub_maker.subs:
-            raise Exception(f"failed, sub_maker is None or sub_maker.subs is None")
+        # 每次重试都重新打开输出，失败时丢弃临时内容，不会留下半截文件
+        with open_sink(voice_file) as sink, self._audio_writer(
+            sink, output_format, native=output_format.edge is not None
+        ) as writer:
+            for chunk in self._stream(text, rate_str):
+                self._consume(chunk, writer, timeline, on_word)
+        if not timeline:
+            raise Exception(f"failed, no word boundary received")
         logger.info(
             f"completed with voice_name:{self.voice_name}, output file: {voice_file}"
         )
-        return sub_maker
+        return timeline
+
+    async def _atts(
+        self,
+        text: str,
+        voice_rate: float,
+        voice_file,
+        output_format: str = None,
+        *args,
+        on_word=None,
+        **kwargs,
+    ) -> Optional[WordTimeline]:
+        """
+        经长连接池非阻塞合成，与 _tts 一样最多尝试 4 次；未使用连接池或需要转码时退回线程池
+        """
+        output_format = get_output_format(output_format or EDGE_OUTPUT_FORMAT)
+        if self.session_pool is None or output_format.edge is None:
+            return await super()._atts(
+                text,
+                voice_rate,
+                voice_file,
+                output_format.name,
+                *args,
+                on_word=on_word,
+                **kwargs,
+            )
+        text = text.strip()
+        rate_str = convert_rate_to_percent(voice_rate)
+        for attempt in range(4):
+            timeline = WordTimeline()
+            try:
+                with open_sink(voice_file) as sink:
+                    async for chunk in self._astream(text, rate_str):
+                        self._consume(chunk, sink, timeline, on_word)
+                    if not timeline:
+                        raise Exception(f"failed, no word boundary received")
+            except Exception as e:
+                logger.error(f"failed, try: {attempt + 1}, error: {str(e)}")
+                if attempt == 3:
+                    raise
+                continue
+            logger.info(
+                f"completed with voice_name:{self.voice_name}, output file: {voice_file}"
+            )
+            return timeline
+
+    def stream_tts(
+        self,
+        text: str,
+        voice_rate: float,
+        output_format: str = None,
+        *args,
+        priority: int = None,
+        tenant: str = None,
+        subtitle_stream=None,
+        subtitle_format: str = "srt",
+        **kwargs,
+    ):
+        if get_output_format(output_format or EDGE_OUTPUT_FORMAT).edge is None:
+            yield from super().stream_tts(
+                text,
+                voice_rate,
+                output_format,
+                *args,
+                priority=priority,
+                tenant=tenant,
+                subtitle_stream=subtitle_stream,
+                subtitle_format=subtitle_format,
+                **kwargs,
+            )
+            return
+        text = self._format_text(text).strip()
+        rate_str = convert_rate_to_percent(voice_rate)
+        aligner = None
+        if subtitle_stream is not None:
+            aligner = SubtitleAligner(text, subtitle_stream, subtitle_format)
+        with self._slot(text, priority, tenant):
+            for chunk in self._stream(text, rate_str):
+                if chunk["type"] == "audio":
+                    # 调用方读取的快慢不计入服务延迟
+                    with unmetered():
+                        yield chunk["data"]
+                elif chunk["type"] == "WordBoundary" and aligner is not None:
+                    start = chunk["offset"]
+                    aligner.feed(start, start + chunk["duration"], chunk["text"])
+
+
+@lru_cache(maxsize=None)
+def _shared_client(voice_name: str) -> EdgeTTS:
+    # 实例无状态，同一音色的调用共用一个实例
+    return EdgeTTS(voice_name)
 
 
 def tts_generate(
     text: str, voice_name: str, voice_rate: float, voice_file: str, subtitle_file: str
-) -> [BaseTTS, None]:
-    client = EdgeTTS(voice_name)
-    client.create_tts(
+) -> Optional[TTSResult]:
+    return _shared_client(voice_name).create_tts(
         text=text,
         voice_rate=voice_rate,
         voice_file=voice_file,
         subtitle_file=subtitle_file,
     )
-    return client
@@ -0,0 +1,406 @@
+import asyncio
+import atexit
+import json
+import ssl
+import threading
+import time
+from queue import Queue
+from typing import Generator, Optional
+from xml.sax.saxutils import escape
+
+import aiohttp
+import certifi
+from edge_tts.communicate import (
+    calc_max_mesg_size,
+    connect_id,
+    date_to_string,
+    get_headers_and_data,
+    mkssml,
+    remove_incompatible_characters,
+    split_text_by_byte_length,
+    ssml_headers_plus_data,
+)
+from edge_tts.constants import SEC_MS_GEC_VERSION, WSS_HEADERS, WSS_URL
+from edge_tts.drm import DRM
+from edge_tts.models import TTSConfig
+from funutil import getLogger
+
+from ._scheduler import _current_turn, unmetered
+
+logger = getLogger("funtalk")
+
+EDGE_AUDIO_FORMAT = "audio-24khz-48kbitrate-mono-mp3"
+
+# 与 edge_tts 一致：分段合成时，下一段的时间轴在上一段最后一个词之后再补偿服务端尾部静音
+_TURN_PADDING = 8_750_000
+
+
+class _SessionClosed(ConnectionError):
+    pass
+
+
+class _EdgeSession:
+    """
+    一条 edge websocket 长连接，speech.config 只在建立连接时发送一次，之后逐轮发送 ssml
+    """
+
+    def __init__(self, pool: "EdgeSessionPool", output_format: str):
+        self.pool = pool
+        self.output_format = output_format
+        self.turns = 0
+        self.last_used = time.monotonic()
+        self._http = None
+        self._ws = None
+
+    @property
+    def closed(self) -> bool:
+        return self._ws is None or self._ws.closed
+
+    async def connect(self):
+        await self.close()
+        self._http = aiohttp.ClientSession(trust_env=True, timeout=self.pool.timeout)
+        try:
+            try:
+                self._ws = await self._ws_connect()
+            except aiohttp.ClientResponseError as e:
+                if e.status != 403:
+                    raise
+                DRM.handle_client_response_error(e)
+                self._ws = await self._ws_connect()
+            await self._ws.send_str(
+                f"X-Timestamp:{date_to_string()}\r\n"
+                "Content-Type:application/json; charset=utf-8\r\n"
+                "Path:speech.config\r\n\r\n"
+                '{"context":{"synthesis":{"audio":{"metadataoptions":{'
+                '"sentenceBoundaryEnabled":false,"wordBoundaryEnabled":true},'
+                f'"outputFormat":"{self.output_format}"'
+                "}}}}\r\n"
+            )
+        except BaseException:
+            await self.close()
+            raise
+        self.turns = 0
+        self.pool._count("connects")
+
+    async def _ws_connect(self):
+        url = self.pool.url
+        if url is None:
+            url = (
+                f"{WSS_URL}&Sec-MS-GEC={DRM.generate_sec_ms_gec()}"
+                f"&Sec-MS-GEC-Version={SEC_MS_GEC_VERSION}"
+                f"&ConnectionId={connect_id()}"
+            )
+        return await self._http.ws_connect(
+            url,
+            compress=15,
+            proxy=self.pool.proxy,
+            headers=WSS_HEADERS,
+            ssl=self.pool.ssl_context if url.startswith("wss:") else None,
+        )
+
+    async def close(self):
+        ws, http = self._ws, self._http
+        self._ws = self._http = None
+        try:
+            if ws is not None:
+                await ws.close()
+        finally:
+            if http is not None:
+                await http.close()
+
+    async def turn(self, tts_config: TTSConfig, text: str):
+        """
+        发送一段 ssml，逐条返回 audio 与 WordBoundary 消息，收到 turn.end 时结束
+        """
+        await self._ws.send_str(
+            ssml_headers_plus_data(
+                connect_id(), date_to_string(), mkssml(tts_config, text)
+            )
+        )
+        audio_received = False
+        while True:
+            received = await self._ws.receive()
+            if received.type == aiohttp.WSMsgType.TEXT:
+                encoded = received.data.encode("utf-8")
+                parameters, data = get_headers_and_data(
+                    encoded, encoded.find(b"\r\n\r\n")
+                )
+                path = parameters.get(b"Path")
+                if path == b"audio.metadata":
+                    message = _parse_metadata(data)
+                    if message is not None:
+                        yield message
+                elif path == b"turn.end":
+                    break
+            elif received.type == aiohttp.WSMsgType.BINARY:
+                if len(received.data) < 2:
+                    raise Exception("failed, binary message without header length")
+                header_length = int.from_bytes(received.data[:2], "big")
+                parameters, data = get_headers_and_data(received.data, header_length)
+                if parameters.get(b"Path") != b"audio" or not data:
+                    continue
+                audio_received = True
+                yield {"type": "audio", "data": data}
+            elif received.type == aiohttp.WSMsgType.ERROR:
+                raise _SessionClosed(f"edge session error: {received.data}")
+            else:
+                raise _SessionClosed(f"edge session closed: {received.type}")
+        self.turns += 1
+        self.last_used = time.monotonic()
+        if not audio_received:
+            raise Exception("failed, no audio received")
+
+
+def _parse_metadata(data: bytes) -> Optional[dict]:
+    for meta in json.loads(data)["Metadata"]:
+        if meta["Type"] == "WordBoundary":
+            return {
+                "type": "WordBoundary",
+                "offset": meta["Data"]["Offset"],
+                "duration": meta["Data"]["Duration"],
+                "text": meta["Data"]["text"]["Text"],
+            }
+    return None
+
+
+class EdgeSessionPool:
+    """
+    进程内共享的 edge 长连接池，连接建立（TLS 握手、speech.config）后保持打开，
+    后续合成复用空闲连接，省去每次请求的握手；每条连接同时只处理一个请求
+    连接在发出请求后、收到任何数据前断开时透明重连并重发，空闲超过 max_idle 秒的连接直接丢弃
+    所有连接运行在池自己的事件循环线程上，调用方通过 stream_sync 在任意线程中同步读取
+    size: 同时进行的请求（即打开的连接）上限，默认 None 不限制，并发由调用方或调度器控制
+    url: 默认连接 edge 服务，测试时可指向本地协议模拟（tests/edge_mock.py）
+    """
+
+    def __init__(
+        self,
+        size: int = None,
+        max_idle: float = 60.0,
+        url: str = None,
+        proxy: str = None,
+        connect_timeout: int = 10,
+        receive_timeout: int = 60,
+    ):
+        self.size = size
+        self.max_idle = max_idle
+        self.url = url
+        self.proxy = proxy
+        self.timeout = aiohttp.ClientTimeout(
+            total=None,
+            connect=None,
+            sock_connect=connect_timeout,
+            sock_read=receive_timeout,
+        )
+        self.ssl_context = ssl.create_default_context(cafile=certifi.where())
+        self._lock = threading.Lock()
+        self._loop = None
+        self._slots = None
+        self._idle = []
+        self._active = 0
+        self._stats = {
+            "requests": 0,
+            "connects": 0,
+            "reuses": 0,
+            "reconnects": 0,
+            "expired": 0,
+            "failures": 0,
+        }
+
+    def _count(self, name: str, value: int = 1):
+        self._stats[name] += value
+
+    def stats(self) -> dict:
+        return dict(self._stats, idle=len(self._idle), active=self._active)
+
+    def _start(self) -> asyncio.AbstractEventLoop:
+        with self._lock:
+            if self._loop is None:
+                loop = asyncio.new_event_loop()
+                threading.Thread(
+                    target=loop.run_forever, name="edge-session-pool", daemon=True
+                ).start()
+                self._slots = asyncio.run_coroutine_threadsafe(
+                    self._create_slots(), loop
+                ).result()
+                self._loop = loop
+                atexit.register(self.close)
+            return self._loop
+
+    async def _create_slots(self):
+        return asyncio.Semaphore(self.size) if self.size else None
+
+    async def _take(self, output_format: str) -> _EdgeSession:
+        now = time.monotonic()
+        expired, reused = [], None
+        for session in reversed(self._idle):
+            if session.output_format != output_format:
+                continue
+            if session.closed or now - session.last_used > self.max_idle:
+                expired.append(session)
+                continue
+            reused = session
+            break
+        for session in expired + [reused]:
+            if session is not None:
+                self._idle.remove(session)
+        for session in expired:
+            self._count("expired")
+            await session.close()
+        if reused is not None:
+            self._count("reuses")
+            return reused
+        session = _EdgeSession(self, output_format)
+        await session.connect()
+        return session
+
+    async def _turn(self, session: _EdgeSession, tts_config: TTSConfig, text: str):
+        for attempt in range(2):
+            received = False
+            try:
+                if session.closed:
+                    await session.connect()
+                async for message in session.turn(tts_config, text):
+                    received = True
+                    yield message
+                return
+            except (_SessionClosed, aiohttp.ClientError, ConnectionError) as e:
+                await session.close()
+                if received or attempt:
+                    raise
+                logger.warning(f"edge session dropped, reconnecting: {str(e)}")
+                self._count("reconnects")
+
+    async def stream(
+        self,
+        text: str,
+        voice: str,
+        rate: str = "+0%",
+        volume: str = "+0%",
+        pitch: str = "+0Hz",
+        output_format: str = EDGE_AUDIO_FORMAT,
+    ):
+        """
+        在池的事件循环上运行的异步生成器，消息格式与 edge_tts.Communicate.stream 相同
+        """
+        tts_config = TTSConfig(voice, rate, volume, pitch)
+        texts = split_text_by_byte_length(
+            escape(remove_incompatible_characters(text)),
+            calc_max_mesg_size(tts_config),
+        )
+        self._count("requests")
+        if self._slots is not None:
+            # 池内排队不计入调度器统计的服务延迟
+            with unmetered():
+                await self._slots.acquire()
+        try:
+            session = await self._take(output_format)
+            self._active += 1
+            try:
+                compensation = 0
+                for partial in texts:
+                    last = compensation
+                    async for message in self._turn(session, tts_config, partial):
+                        if message["type"] == "WordBoundary":
+                            message["offset"] += compensation
+                            last = message["offset"] + message["duration"]
+                        yield message
+                    compensation = last + _TURN_PADDING
+            except BaseException:
+                # 中途失败或被取消时连接上可能还有未读完的数据，不能再复用
+                self._count("failures")
+                await session.close()
+                raise
+            else:
+                self._idle.append(session)
+            finally:
+                self._active -= 1
+        finally:
+            if self._slots is not None:
+                self._slots.release()
+
+    def stream_sync(self, text: str, voice: str, *args, **kwargs) -> Generator:
+        """
+        同步读取 stream 的结果，可在任意线程中调用；提前结束迭代时取消请求并丢弃该连接
+        """
+        loop = self._start()
+        queue = Queue()
+        done = object()
+
+        turn = _current_turn.get()
+
+        async def pump():
+            # 在池的事件循环上沿用调用方占用的调度配额
+            _current_turn.set(turn)
+            try:
+                async for message in self.stream(text, voice, *args, **kwargs):
+                    queue.put(message)
+            except BaseException as e:
+                queue.put(e)
+                raise
+            queue.put(done)
+
+        future = asyncio.run_coroutine_threadsafe(pump(), loop)
+        try:
+            while True:
+                item = queue.get()
+                if item is done:
+                    return
+                if isinstance(item, BaseException):
+                    raise item
+                yield item
+        finally:
+            future.cancel()
+
+    async def stream_async(self, text: str, voice: str, *args, **kwargs):
+        """
+        在调用方自己的事件循环中异步读取 stream 的结果；提前结束或被取消时同样取消请求并丢弃该连接
+        """
+        loop = self._start()
+        caller = asyncio.get_running_loop()
+        queue = asyncio.Queue()
+        done = object()
+
+        turn = _current_turn.get()
+
+        async def pump():
+            # 在池的事件循环上沿用调用方占用的调度配额
+            _current_turn.set(turn)
+            try:
+                async for message in self.stream(text, voice, *args, **kwargs):
+                    caller.call_soon_threadsafe(queue.put_nowait, message)
+            except BaseException as e:
+                caller.call_soon_threadsafe(queue.put_nowait, e)
+                raise
+            caller.call_soon_threadsafe(queue.put_nowait, done)
+
+        future = asyncio.run_coroutine_threadsafe(pump(), loop)
+        try:
+            while True:
+                item = await queue.get()
+                if item is done:
+                    return
+                if isinstance(item, BaseException):
+                    raise item
+                yield item
+        finally:
+            future.cancel()
+
+    def close(self):
+        """
+        关闭所有空闲连接
+        """
+        if self._loop is None:
+            return
+
+        async def close_all():
+            while self._idle:
+                await self._idle.pop().close()
+
+        try:
+            asyncio.run_coroutine_threadsafe(close_all(), self._loop).result(5)
+        except Exception as e:
+            logger.warning(f"failed to close edge sessions: {str(e)}")
+
+
+default_edge_session_pool = EdgeSessionPool()
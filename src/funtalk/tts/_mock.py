@@ -0,0 +1,92 @@
+import math
+import re
+import time
+from functools import lru_cache
+from typing import Optional
+
+from funutil import getLogger
+
+from funtalk.audio import get_output_format, open_sink, wav_header
+
+from ._result import TTSResult
+from ._timeline import WordTimeline
+from .base import BaseTTS
+
+logger = getLogger("funtalk")
+
+# MPEG-2 Layer III, 48kbps, 24kHz, mono: 与 edge 输出同规格的静音帧，每帧 576 个采样（24ms）
+_SILENT_FRAME = b"\xff\xf3\x64\xc4" + b"\x00" * 140
+_FRAME_TICKS = 240000
+
+_WORD_PATTERN = re.compile(r"\w+")
+
+
+class MockTTS(BaseTTS):
+    """
+    本地模拟引擎，不访问网络，生成静音 mp3 与按字数估算的字幕时间轴，用于测试与压测
+    """
+
+    engine = "mock"
+
+    def __init__(
+        self, voice_name="mock", latency=0.0, char_duration=0.06, *args, **kwargs
+    ):
+        super().__init__(voice_name, *args, **kwargs)
+        self.latency = latency
+        self.char_duration = char_duration
+
+    def _tts(
+        self,
+        text: str,
+        voice_rate: float,
+        voice_file,
+        output_format: str = None,
+        *args,
+        on_word=None,
+        **kwargs,
+    ) -> Optional[WordTimeline]:
+        if self.latency:
+            time.sleep(self.latency)
+        timeline = WordTimeline()
+        tick = int(self.char_duration * 10000000 / (voice_rate or 1.0))
+        offset = 0
+        for word in _WORD_PATTERN.findall(text.strip()):
+            duration = tick * len(word)
+            timeline.append(offset, offset + duration, word)
+            if on_word is not None:
+                on_word(offset, offset + duration, word)
+            offset += duration + tick
+        frames = max(1, math.ceil(offset / _FRAME_TICKS))
+        output_format = get_output_format(output_format or "mp3-24k-48kbps")
+        with open_sink(voice_file) as file:
+            if output_format.container in ("pcm", "wav"):
+                samples = frames * 576 * output_format.sample_rate // 24000
+                if output_format.container == "wav":
+                    file.write(wav_header(output_format.sample_rate, samples * 2))
+                file.write(b"\x00\x00" * samples)
+            else:
+                with self._audio_writer(
+                    file, output_format, native=output_format.name == "mp3-24k-48kbps"
+                ) as writer:
+                    writer.write(_SILENT_FRAME * frames)
+        logger.info(
+            f"completed with voice_name:{self.voice_name}, output file: {voice_file}"
+        )
+        return timeline
+
+
+@lru_cache(maxsize=None)
+def _shared_client(voice_name: str) -> MockTTS:
+    # 实例无状态，同一音色的调用共用一个实例
+    return MockTTS(voice_name)
+
+
+def tts_generate(
+    text: str, voice_name: str, voice_rate: float, voice_file: str, subtitle_file: str
+) -> Optional[TTSResult]:
+    return _shared_client(voice_name).create_tts(
+        text=text,
+        voice_rate=voice_rate,
+        voice_file=voice_file,
+        subtitle_file=subtitle_file,
+    )
@@ -0,0 +1,78 @@
+import threading
+from contextlib import contextmanager
+
+from funutil import getLogger
+
+logger = getLogger("funtalk")
+
+
+class EnginePool:
+    """
+    引擎实例池，按 key（如 engine + voice_name）复用客户端，跨请求共享
+    每个 key 最多创建 size 个实例，全部占用时 acquire 阻塞等待
+    shared: 实例无状态、可并发调用时设为 True，acquire 不再独占实例，
+        按轮询分配给 size 个实例，永不阻塞
+    """
+
+    def __init__(self, factory, size: int = 4, shared: bool = False):
+        self.factory = factory
+        self.size = size
+        self.shared = shared
+        self._lock = threading.Condition()
+        self._idle = {}
+        self._created = {}
+        self._turns = {}
+
+    @contextmanager
+    def acquire(self, *key):
+        if self.shared:
+            yield self._next(key)
+            return
+        client = self._take(key)
+        try:
+            yield client
+        finally:
+            with self._lock:
+                self._idle[key].append(client)
+                self._lock.notify()
+
+    def _take(self, key):
+        with self._lock:
+            idle = self._idle.setdefault(key, [])
+            while not idle and self._created.get(key, 0) >= self.size:
+                self._lock.wait()
+            if idle:
+                return idle.pop()
+            self._created[key] = self._created.get(key, 0) + 1
+        try:
+            client = self.factory(*key)
+        except Exception:
+            with self._lock:
+                self._created[key] -= 1
+                self._lock.notify()
+            raise
+        logger.info(f"engine created, key: {key}")
+        return client
+
+    def _next(self, key):
+        with self._lock:
+            clients = self._idle.setdefault(key, [])
+            turn = self._turns.get(key, 0)
+            self._turns[key] = turn + 1
+            if len(clients) >= self.size:
+                return clients[turn % len(clients)]
+            client = self.factory(*key)
+            clients.append(client)
+            self._created[key] = len(clients)
+        logger.info(f"engine created, key: {key}")
+        return client
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "/".join(map(str, key)): {
+                    "created": created,
+                    "idle": len(self._idle.get(key, [])),
+                }
+                for key, created in self._created.items()
+            }
@@ -0,0 +1,161 @@
+import threading
+from concurrent.futures import Future, ThreadPoolExecutor
+from typing import Dict, List, Optional, Union
+
+from funutil import getLogger
+
+from funtalk.audio import MemorySink
+from funtalk.text import split_full_sentences
+
+from ._result import TTSResult
+from ._scheduler import PRIORITY_INTERACTIVE
+
+logger = getLogger("funtalk")
+
+# 预取排在交互请求之后、批量任务之前
+PRIORITY_PREFETCH = PRIORITY_INTERACTIVE + 1
+
+
+class ReadingSession:
+    """
+    顺序朗读会话：按句子朗读整篇文档，播放当前句时在后台预先合成之后的 lookahead 句，
+    轮到下一句时直接从缓冲区取出，句间几乎没有等待
+    跳转（seek）时取消窗口之外尚未开始的预取，已在合成的结果丢弃；更换引擎或语速（update）时清空缓冲区
+    当前句未命中缓冲时在调用线程内直接合成，不会排在过期的预取之后
+    音频保存在内存中（TTSResult.voice_file 为 MemorySink，通过 result.audio 读取）
+    """
+
+    def __init__(
+        self,
+        client,
+        text: Union[str, List[str]],
+        voice_rate: float = 1.0,
+        output_format: str = None,
+        lookahead: int = 3,
+        workers: int = 2,
+        tenant: str = "default",
+    ):
+        """
+        client: BaseTTS 实例
+        text: 整篇文本（按句末标点切分为句子，保留标点），或已经切分好的句子列表
+        """
+        self.client = client
+        self.sentences = (
+            split_full_sentences(text) if isinstance(text, str) else list(text)
+        )
+        self.voice_rate = voice_rate
+        self.output_format = output_format
+        self.lookahead = lookahead
+        self.tenant = tenant
+        self.position = -1
+        self.stats = {"hits": 0, "waits": 0, "misses": 0, "cancelled": 0}
+        self._lock = threading.Lock()
+        self._futures: Dict[int, Future] = {}
+        self._executor = ThreadPoolExecutor(
+            max_workers=max(1, workers), thread_name_prefix="funtalk-prefetch"
+        )
+
+    def __len__(self) -> int:
+        return len(self.sentences)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_val, exc_tb):
+        self.close()
+
+    def __iter__(self):
+        return self
+
+    def __next__(self) -> Optional[TTSResult]:
+        if self.position + 1 >= len(self.sentences):
+            raise StopIteration
+        return self.get(self.position + 1)
+
+    def _synthesize(
+        self, client, voice_rate: float, index: int, priority: int
+    ) -> Optional[TTSResult]:
+        return client.create_tts(
+            text=self.sentences[index],
+            voice_rate=voice_rate,
+            voice_file=MemorySink(),
+            output_format=self.output_format,
+            priority=priority,
+            tenant=self.tenant,
+        )
+
+    def _schedule(self, first: int):
+        # 调用方持有锁：保留 [first, first + lookahead) 内的预取，取消其余的，补齐缺少的
+        window = range(first, min(first + self.lookahead, len(self.sentences)))
+        for index in list(self._futures):
+            if index not in window:
+                if self._futures.pop(index).cancel():
+                    self.stats["cancelled"] += 1
+        for index in window:
+            if index not in self._futures:
+                self._futures[index] = self._executor.submit(
+                    self._synthesize,
+                    self.client,
+                    self.voice_rate,
+                    index,
+                    PRIORITY_PREFETCH,
+                )
+
+    def _count(self, name: str):
+        with self._lock:
+            self.stats[name] += 1
+
+    def get(self, index: int) -> Optional[TTSResult]:
+        """
+        取第 index 句的合成结果并将其设为当前句，同时预取之后的句子；失败时返回 None
+        """
+        if not 0 <= index < len(self.sentences):
+            raise IndexError(f"sentence index out of range: {index}")
+        with self._lock:
+            self.position = index
+            future = self._futures.pop(index, None)
+            client, voice_rate = self.client, self.voice_rate
+            self._schedule(index + 1)
+        if future is not None and not future.cancel():
+            self._count("hits" if future.done() else "waits")
+            try:
+                result = future.result()
+            except Exception as e:
+                result = None
+                logger.warning(f"prefetch failed, error: {str(e)}")
+            if result is not None:
+                return result
+            logger.warning(f"prefetch failed, retry sentence {index}")
+        self._count("misses")
+        return self._synthesize(client, voice_rate, index, PRIORITY_INTERACTIVE)
+
+    def seek(self, index: int):
+        """
+        跳转到第 index 句：下一次迭代从该句开始，预取窗口随之移动
+        """
+        index = max(0, min(index, len(self.sentences)))
+        with self._lock:
+            self.position = index - 1
+            self._schedule(index)
+
+    def update(self, client=None, voice_rate: float = None):
+        """
+        更换引擎实例（音色）或语速，丢弃所有已缓冲与进行中的预取，从下一句重新预取
+        """
+        with self._lock:
+            if client is not None:
+                self.client = client
+            if voice_rate is not None:
+                self.voice_rate = voice_rate
+            for future in self._futures.values():
+                if future.cancel():
+                    self.stats["cancelled"] += 1
+            self._futures.clear()
+            self._schedule(self.position + 1)
+
+    def close(self):
+        with self._lock:
+            for future in self._futures.values():
+                future.cancel()
+            self._futures.clear()
+        self._executor.shutdown(wait=False)
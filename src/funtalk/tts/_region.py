@@ -0,0 +1,194 @@
+import random
+import threading
+import time
+import urllib.request
+from typing import Iterable, List, NamedTuple, Optional
+
+from funutil import getLogger
+
+logger = getLogger("funtalk")
+
+
+class AzureEndpoint(NamedTuple):
+    """
+    一个 Azure 语音服务终结点
+    host: 服务根地址，默认 https://{region}.tts.speech.microsoft.com，测试时可指向本地模拟服务
+    """
+
+    key: str
+    region: str
+    host: Optional[str] = None
+
+    @property
+    def probe_url(self) -> str:
+        host = self.host or f"https://{self.region}.tts.speech.microsoft.com"
+        return f"{host.rstrip('/')}/cognitiveservices/voices/list"
+
+
+class _Route:
+    def __init__(self, endpoint: AzureEndpoint):
+        self.endpoint = endpoint
+        self.latency = None
+        self.errors = 0
+        self.drained_until = 0.0
+        self.stats = {"chosen": 0, "succeeded": 0, "failed": 0, "drained": 0}
+
+    def healthy(self, now: float) -> bool:
+        return now >= self.drained_until
+
+
+class RegionRouter:
+    """
+    多区域路由：后台线程定时探测各终结点的延迟与错误，请求按延迟加权随机分配到健康的区域
+    实际请求的成败同样计入（report）；连续失败 max_errors 次，或延迟超过最快区域的 slow_factor 倍时，
+    该区域暂停分配 drain 秒，期间仍继续探测，到期后重新参与分配
+    所有区域都不可用时退回到最早恢复的区域，不会无处可发
+    """
+
+    def __init__(
+        self,
+        endpoints: Iterable[AzureEndpoint],
+        probe_interval: float = 30.0,
+        probe_timeout: float = 5.0,
+        max_errors: int = 3,
+        slow_factor: float = 3.0,
+        drain: float = 60.0,
+        smoothing: float = 0.3,
+    ):
+        self._routes = [_Route(endpoint) for endpoint in endpoints]
+        if not self._routes:
+            raise ValueError("at least one endpoint is required")
+        self.probe_interval = probe_interval
+        self.probe_timeout = probe_timeout
+        self.max_errors = max_errors
+        self.slow_factor = slow_factor
+        self.drain = drain
+        self.smoothing = smoothing
+        self._lock = threading.Lock()
+        self._stop = threading.Event()
+        self._thread = None
+
+    @property
+    def endpoints(self) -> List[AzureEndpoint]:
+        return [route.endpoint for route in self._routes]
+
+    def start(self) -> "RegionRouter":
+        """
+        启动后台探测线程（守护线程），重复调用无副作用
+        """
+        with self._lock:
+            if self._thread is None:
+                self._stop.clear()
+                self._thread = threading.Thread(
+                    target=self._probe_loop, name="funtalk-region-probe", daemon=True
+                )
+                self._thread.start()
+        return self
+
+    def stop(self):
+        self._stop.set()
+        with self._lock:
+            thread, self._thread = self._thread, None
+        if thread is not None:
+            thread.join()
+
+    def _probe_loop(self):
+        while not self._stop.is_set():
+            self.probe()
+            self._stop.wait(self.probe_interval)
+
+    def probe(self):
+        """
+        探测所有终结点一次：请求音色列表，记录延迟或失败
+        """
+        for endpoint in self.endpoints:
+            request = urllib.request.Request(
+                endpoint.probe_url, headers={"Ocp-Apim-Subscription-Key": endpoint.key}
+            )
+            started = time.monotonic()
+            try:
+                with urllib.request.urlopen(
+                    request, timeout=self.probe_timeout
+                ) as response:
+                    response.read()
+            except Exception as e:
+                logger.warning(f"region probe failed: {endpoint.region}, {str(e)}")
+                self.report(endpoint, ok=False)
+            else:
+                self.report(endpoint, time.monotonic() - started)
+
+    def _route(self, endpoint: AzureEndpoint) -> _Route:
+        for route in self._routes:
+            if route.endpoint == endpoint:
+                return route
+        raise ValueError(f"unknown endpoint: {endpoint.region}")
+
+    def report(self, endpoint: AzureEndpoint, latency: float = None, ok: bool = True):
+        """
+        记录一次请求或探测的结果，latency 为秒
+        """
+        now = time.monotonic()
+        with self._lock:
+            route = self._route(endpoint)
+            if not ok:
+                route.errors += 1
+                route.stats["failed"] += 1
+                if route.errors >= self.max_errors:
+                    self._drain(route, now, f"{route.errors} consecutive errors")
+                return
+            route.errors = 0
+            route.stats["succeeded"] += 1
+            if latency is None:
+                return
+            if route.latency is None:
+                route.latency = latency
+            else:
+                route.latency += self.smoothing * (latency - route.latency)
+            others = [
+                other.latency
+                for other in self._routes
+                if other is not route
+                and other.latency is not None
+                and other.healthy(now)
+            ]
+            if others and route.latency > self.slow_factor * min(others):
+                self._drain(route, now, f"latency {route.latency:.3f}s")
+
+    def _drain(self, route: _Route, now: float, reason: str):
+        if route.healthy(now):
+            route.stats["drained"] += 1
+            logger.warning(f"region drained: {route.endpoint.region}, {reason}")
+        route.drained_until = now + self.drain
+
+    def choose(self, exclude: Iterable[AzureEndpoint] = ()) -> AzureEndpoint:
+        """
+        按延迟加权随机选择一个健康的终结点，exclude 中的终结点（如本次已失败的）不参与
+        """
+        exclude = set(exclude)
+        now = time.monotonic()
+        with self._lock:
+            routes = [
+                route for route in self._routes if route.endpoint not in exclude
+            ] or self._routes
+            healthy = [route for route in routes if route.healthy(now)]
+            if healthy:
+                known = [route.latency for route in healthy if route.latency]
+                default = max(known) if known else 1.0
+                weights = [1.0 / (route.latency or default) ** 2 for route in healthy]
+                route = random.choices(healthy, weights)[0]
+            else:
+                route = min(routes, key=lambda item: item.drained_until)
+            route.stats["chosen"] += 1
+            return route.endpoint
+
+    def stats(self) -> dict:
+        now = time.monotonic()
+        with self._lock:
+            return {
+                route.endpoint.region: dict(
+                    route.stats,
+                    latency=route.latency,
+                    healthy=route.healthy(now),
+                )
+                for route in self._routes
+            }
@@ -0,0 +1,23 @@
+import importlib
+
+from .base import BaseTTS
+
+TTS_ENGINES = {
+    "edge": "funtalk.tts._edge:EdgeTTS",
+    "azure": "funtalk.tts._azure:AzureTTS",
+    "mock": "funtalk.tts._mock:MockTTS",
+}
+
+DEFAULT_VOICES = {
+    "edge": "zh-CN-XiaoxiaoNeural",
+    "azure": "zh-CN-XiaoxiaoNeural",
+    "mock": "mock",
+}
+
+
+def create_engine(engine: str, voice_name: str, *args, **kwargs) -> BaseTTS:
+    if engine not in TTS_ENGINES:
+        raise ValueError(f"unknown tts engine: {engine}")
+    module_name, class_name = TTS_ENGINES[engine].split(":")
+    cls = getattr(importlib.import_module(module_name), class_name)
+    return cls(voice_name, *args, **kwargs)
@@ -0,0 +1,71 @@
+import hashlib
+import threading
+from collections import OrderedDict
+from typing import Optional
+
+from ._timeline import WordTimeline
+
+
+class RenderCache:
+    """
+    1.0 倍速合成结果的内存缓存：16bit 单声道 PCM 与词边界时间轴
+    其他语速由缓存结果在本地变速得到，不再请求服务；按 PCM 总字节数做 LRU 淘汰
+    只输出 mp3 的引擎（如 edge）存入前经 ffmpeg 解码，每次变速后编码为非 pcm/wav 格式也经 ffmpeg
+    """
+
+    def __init__(self, max_bytes: int = 256 * 1024 * 1024):
+        self.max_bytes = max_bytes
+        self._lock = threading.Lock()
+        self._items = OrderedDict()
+        self._size = 0
+        self.hits = 0
+        self.misses = 0
+
+    @staticmethod
+    def key(*parts) -> str:
+        return hashlib.sha1("\x00".join(map(str, parts)).encode("utf-8")).hexdigest()
+
+    def get(self, key: str) -> Optional[tuple]:
+        """
+        返回 (pcm, timeline)，未命中返回 None
+        """
+        with self._lock:
+            item = self._items.get(key)
+            if item is None:
+                self.misses += 1
+                return None
+            self._items.move_to_end(key)
+            self.hits += 1
+            return item
+
+    def put(self, key: str, pcm: bytes, timeline: WordTimeline) -> tuple:
+        item = (pcm, timeline)
+        if len(pcm) > self.max_bytes:
+            return item
+        with self._lock:
+            previous = self._items.pop(key, None)
+            if previous is not None:
+                self._size -= len(previous[0])
+            self._items[key] = item
+            self._size += len(pcm)
+            while self._size > self.max_bytes:
+                _, (old_pcm, _) = self._items.popitem(last=False)
+                self._size -= len(old_pcm)
+        return item
+
+    def clear(self):
+        with self._lock:
+            self._items.clear()
+            self._size = 0
+
+    def stats(self) -> dict:
+        with self._lock:
+            return {
+                "items": len(self._items),
+                "bytes": self._size,
+                "hits": self.hits,
+                "misses": self.misses,
+            }
+
+
+default_render_cache = RenderCache()
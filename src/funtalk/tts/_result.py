@@ -0,0 +1,101 @@
+import os
+from typing import NamedTuple, Optional, Union
+
+from edge_tts import SubMaker
+from funutil import getLogger
+
+from funtalk.audio import (
+    AudioInfo,
+    AudioSink,
+    MemorySink,
+    get_output_format,
+    scan_audio,
+)
+
+from ._timeline import WordTimeline
+
+logger = getLogger("funtalk")
+
+# scan_audio 能按帧头或文件头计算时长的格式，其他格式（如 ogg/opus）以时间轴为准
+_PROBED_CONTAINERS = ("mp3", "wav", "pcm")
+
+
+def probe_audio(
+    voice_file, output_format: str = None, build_index: bool = True
+) -> Optional[AudioInfo]:
+    """
+    扫描文件路径或 AudioSink 中的音频，返回精确时长、码率与帧索引，无法读取时返回 None
+    """
+    source = voice_file
+    if isinstance(source, MemorySink):
+        source = source.buffer
+    else:
+        source = getattr(source, "path", source)
+        if not isinstance(source, str) or not os.path.exists(source):
+            return None
+    return scan_audio(source, build_index=build_index, output_format=output_format)
+
+
+class TTSResult(NamedTuple):
+    """
+    一次合成的结果，不依赖也不修改引擎实例的状态
+    voice_file: 音频文件路径或 AudioSink
+    duration: 音频时长（秒），mp3/wav/pcm 按帧头精确计算，其他格式或无法读取音频时为最后一个词的结束时间
+    timings: 各阶段耗时（秒），如 synthesis、subtitle
+    """
+
+    voice_file: Union[str, AudioSink]
+    timeline: WordTimeline
+    duration: float
+    output_format: Optional[str] = None
+    subtitle_file: Optional[str] = None
+    timings: Optional[dict] = None
+
+    @classmethod
+    def create(
+        cls,
+        voice_file,
+        timeline: WordTimeline,
+        output_format: str = None,
+        subtitle_file: str = None,
+        timings: dict = None,
+    ) -> "TTSResult":
+        duration = None
+        container = (
+            get_output_format(output_format).container if output_format else None
+        )
+        if container is None or container in _PROBED_CONTAINERS:
+            try:
+                info = probe_audio(voice_file, output_format, build_index=False)
+                if info is not None:
+                    duration = info.duration
+            except Exception as e:
+                logger.warning(f"failed to scan audio, error: {str(e)}")
+        if duration is None:
+            duration = timeline.duration / 10000000 if timeline else 0.0
+        return cls(
+            voice_file, timeline, duration, output_format, subtitle_file, timings
+        )
+
+    @property
+    def sub_maker(self) -> SubMaker:
+        return self.timeline.to_submaker()
+
+    @property
+    def audio(self) -> bytes:
+        """
+        音频内容；PipeSink 等不可回读的输出返回空字节
+        """
+        if isinstance(self.voice_file, MemorySink):
+            return self.voice_file.getvalue()
+        path = getattr(self.voice_file, "path", self.voice_file)
+        if not isinstance(path, str) or not os.path.exists(path):
+            return b""
+        with open(path, "rb") as file:
+            return file.read()
+
+    def get_audio_info(self, build_index: bool = True) -> Optional[AudioInfo]:
+        return probe_audio(self.voice_file, self.output_format, build_index)
+
+    def get_audio_duration(self) -> float:
+        return self.duration
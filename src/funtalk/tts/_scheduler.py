@@ -0,0 +1,392 @@
+import asyncio
+import threading
+import time
+from collections import OrderedDict, deque
+from contextlib import asynccontextmanager, contextmanager
+from contextvars import ContextVar
+from typing import NamedTuple, Optional
+
+from funutil import getLogger
+
+from ._adaptive import AdaptiveConcurrency
+
+logger = getLogger("funtalk")
+
+PRIORITY_INTERACTIVE = 0
+PRIORITY_BULK = 10
+
+
+class _Turn:
+    """
+    一次已放行的调用，paused 为不计入延迟的秒数，failed 为调用期间是否报告过失败
+    """
+
+    def __init__(self, limiter=None):
+        self.limiter = limiter
+        self.paused = 0.0
+        self.failed = False
+
+
+# 当前线程（或任务）正在占用的调用，由 slot/aslot 设置
+_current_turn: ContextVar = ContextVar("funtalk_turn", default=None)
+
+
+@contextmanager
+def unmetered():
+    """
+    with 块内的时间不计入当前调用的延迟，用于等待本地资源或等待调用方读取流式数据，
+    避免自适应并发把与服务无关的等待误判为拥塞
+    """
+    turn = _current_turn.get()
+    started = time.monotonic()
+    try:
+        yield
+    finally:
+        if turn is not None:
+            turn.paused += time.monotonic() - started
+
+
+def _wake(waiter: asyncio.Future):
+    if not waiter.done():
+        waiter.set_result(None)
+
+
+class Quota(NamedTuple):
+    """
+    引擎配额，0 表示不限制
+    burst: 令牌桶最多积累多少秒的配额，越小越平滑
+    utilization: 实际使用配额的比例，留出余量使吞吐稳定在配额之下
+    adaptive: 按延迟与失败/限流信号自适应调整并发上限（AIMD），此时 concurrency 为上限的最大值，0 表示 64
+    """
+
+    requests_per_minute: float = 0
+    chars_per_minute: float = 0
+    concurrency: int = 0
+    burst: float = 2.0
+    utilization: float = 0.95
+    adaptive: bool = False
+
+
+class TokenBucket:
+    """
+    令牌桶：按 rate 每秒匀速补充，最多积累 capacity
+    reserve 允许透支并返回需要等待的秒数，后来者排在透支之后，请求被均匀摊开，不会先突发再被限流
+    """
+
+    def __init__(self, rate: float, capacity: float):
+        self.rate = rate
+        self.capacity = capacity
+        self._tokens = capacity
+        self._time = time.monotonic()
+
+    def _refill(self, now: float):
+        self._tokens = min(self.capacity, self._tokens + (now - self._time) * self.rate)
+        self._time = now
+
+    def reserve(self, amount: float, now: float = None) -> float:
+        self._refill(time.monotonic() if now is None else now)
+        self._tokens -= amount
+        return 0.0 if self._tokens >= 0 else -self._tokens / self.rate
+
+    def drain(self, seconds: float):
+        """
+        扣除 seconds 秒的令牌，用于服务端返回限流时暂停
+        """
+        self._refill(time.monotonic())
+        self._tokens = min(self._tokens, 0) - seconds * self.rate
+
+
+class _Limiter:
+    def __init__(self, quota: Quota):
+        self.quota = quota
+        self.buckets = []
+        for per_minute, unit in (
+            (quota.requests_per_minute, "requests"),
+            (quota.chars_per_minute, "chars"),
+        ):
+            if per_minute:
+                rate = per_minute * quota.utilization / 60
+                self.buckets.append((unit, TokenBucket(rate, rate * quota.burst)))
+        self.adaptive = (
+            AdaptiveConcurrency(maximum=quota.concurrency or 64)
+            if quota.adaptive
+            else None
+        )
+        self.active = 0
+        self.lanes = {}
+        self.stats = {"granted": 0, "waited": 0.0, "throttled": 0, "failed": 0}
+
+    def push(self, priority: int, tenant: str, ticket):
+        lane = self.lanes.setdefault(priority, OrderedDict())
+        lane.setdefault(tenant, deque()).append(ticket)
+
+    def remove(self, priority: int, tenant: str, ticket):
+        lane = self.lanes.get(priority, {})
+        tickets = lane.get(tenant)
+        if tickets and ticket in tickets:
+            tickets.remove(ticket)
+            if not tickets:
+                del lane[tenant]
+
+    def head(self):
+        for priority in sorted(self.lanes):
+            lane = self.lanes[priority]
+            if lane:
+                return next(iter(lane.values()))[0]
+        return None
+
+    def pop(self):
+        # 同一优先级内按租户轮转，每个租户每轮只放行一个请求
+        for priority in sorted(self.lanes):
+            lane = self.lanes[priority]
+            if not lane:
+                continue
+            tenant, tickets = next(iter(lane.items()))
+            tickets.popleft()
+            del lane[tenant]
+            if tickets:
+                lane[tenant] = tickets
+            return
+
+    @property
+    def concurrency(self) -> int:
+        if self.adaptive is not None:
+            return self.adaptive.limit
+        return self.quota.concurrency
+
+    def has_capacity(self) -> bool:
+        return not self.concurrency or self.active < self.concurrency
+
+    def reserve(self, chars: int) -> float:
+        now = time.monotonic()
+        delay = 0.0
+        for unit, bucket in self.buckets:
+            delay = max(delay, bucket.reserve(chars if unit == "chars" else 1, now))
+        return delay
+
+    def queued(self) -> dict:
+        return {
+            str(priority): sum(len(tickets) for tickets in lane.values())
+            for priority, lane in self.lanes.items()
+        }
+
+
+class Scheduler:
+    """
+    所有引擎共用的调度器：按 (engine, region) 配置请求数与字符数的令牌桶以及并发上限
+    等待中的请求按优先级分道，高优先级（如交互请求）先于批量任务放行，同一优先级内按租户轮转
+    配额开启 adaptive 时并发上限随调用的延迟、失败与限流自动调整，当前值见 stats 中的 limit
+    未配置配额的引擎直接放行
+    """
+
+    def __init__(self, quotas: dict = None):
+        """
+        quotas: {(engine, region): Quota}，region 为 None 时作用于该引擎未单独配置的所有区域
+        """
+        self._cond = threading.Condition()
+        self._quotas = dict(quotas or {})
+        self._limiters = {}
+        # 异步等待者：(事件循环, future)，与 _cond 一同唤醒
+        self._waiters = []
+
+    def configure(self, engine: str, region: str = None, quota: Quota = None):
+        """
+        设置或移除（quota 为 None）配额，正在排队的请求仍按旧配额放行
+        """
+        with self._cond:
+            if quota is None:
+                self._quotas.pop((engine, region), None)
+            else:
+                self._quotas[(engine, region)] = quota
+            self._limiters.pop((engine, region), None)
+
+    def _limiter(self, engine: str, region: str) -> Optional[_Limiter]:
+        key = (engine, region)
+        limiter = self._limiters.get(key)
+        if limiter is None:
+            quota = self._quotas.get(key) or self._quotas.get((engine, None))
+            if quota is None:
+                return None
+            limiter = self._limiters[key] = _Limiter(quota)
+        return limiter
+
+    def _notify(self):
+        # 调用方持有锁：唤醒同步与异步的等待者，各自重新检查是否轮到自己
+        self._cond.notify_all()
+        waiters, self._waiters = self._waiters, []
+        for loop, waiter in waiters:
+            try:
+                loop.call_soon_threadsafe(_wake, waiter)
+            except RuntimeError:
+                # 事件循环已关闭
+                pass
+
+    @staticmethod
+    def _grant(limiter: _Limiter, chars: int) -> float:
+        # 调用方持有锁：放行队首请求，返回令牌桶需要等待的秒数
+        limiter.pop()
+        limiter.active += 1
+        delay = limiter.reserve(chars)
+        limiter.stats["granted"] += 1
+        limiter.stats["waited"] += delay
+        return delay
+
+    def _release(self, limiter: _Limiter, ok: bool, latency: float, chars: int):
+        # ok 为 None 表示调用方提前放弃（如流式读取中途停止），不计成功也不计失败
+        with self._cond:
+            limiter.active -= 1
+            if limiter.adaptive is not None and ok is not None:
+                if ok:
+                    limiter.adaptive.success(latency, chars)
+                else:
+                    limiter.adaptive.failure()
+            if ok is False:
+                limiter.stats["failed"] += 1
+            self._notify()
+
+    @contextmanager
+    def slot(
+        self,
+        engine: str,
+        region: str = None,
+        chars: int = 0,
+        priority: int = PRIORITY_INTERACTIVE,
+        tenant: str = "default",
+    ):
+        """
+        占用一次调用的配额，with 块内发起实际请求
+        自适应并发按 with 块的耗时（除去 unmetered 内的等待）计算延迟；
+        在生成器中使用时，调用方提前停止迭代既不算成功也不算失败
+        """
+        with self._cond:
+            limiter = self._limiter(engine, region)
+            if limiter is not None:
+                ticket = object()
+                limiter.push(priority, tenant, ticket)
+                while not (limiter.head() is ticket and limiter.has_capacity()):
+                    self._cond.wait()
+                delay = self._grant(limiter, chars)
+                self._notify()
+        if limiter is None:
+            yield
+            return
+        turn, ok = _Turn(limiter), False
+        previous = _current_turn.get()
+        _current_turn.set(turn)
+        started = time.monotonic()
+        try:
+            if delay > 0:
+                time.sleep(delay)
+            started = time.monotonic()
+            yield
+            ok = not turn.failed
+        except GeneratorExit:
+            ok = None
+            raise
+        finally:
+            _current_turn.set(previous)
+            latency = time.monotonic() - started - turn.paused
+            self._release(limiter, ok, latency, chars)
+
+    @asynccontextmanager
+    async def aslot(
+        self,
+        engine: str,
+        region: str = None,
+        chars: int = 0,
+        priority: int = PRIORITY_INTERACTIVE,
+        tenant: str = "default",
+    ):
+        """
+        slot 的异步版本，在事件循环中排队等待，不占用线程，与同步调用共用同一队列与配额
+        """
+        loop = asyncio.get_running_loop()
+        ticket = object()
+        with self._cond:
+            limiter = self._limiter(engine, region)
+            if limiter is not None:
+                limiter.push(priority, tenant, ticket)
+        if limiter is None:
+            yield
+            return
+        try:
+            while True:
+                with self._cond:
+                    if limiter.head() is ticket and limiter.has_capacity():
+                        delay = self._grant(limiter, chars)
+                        self._notify()
+                        break
+                    waiter = loop.create_future()
+                    self._waiters.append((loop, waiter))
+                await waiter
+        except BaseException:
+            # 取消或超时：退出队列，让后面的请求继续
+            with self._cond:
+                limiter.remove(priority, tenant, ticket)
+                self._notify()
+            raise
+        turn, ok = _Turn(limiter), False
+        previous = _current_turn.get()
+        _current_turn.set(turn)
+        started = time.monotonic()
+        try:
+            if delay > 0:
+                await asyncio.sleep(delay)
+            started = time.monotonic()
+            yield
+            ok = not turn.failed
+        except GeneratorExit:
+            ok = None
+            raise
+        finally:
+            _current_turn.set(previous)
+            latency = time.monotonic() - started - turn.paused
+            self._release(limiter, ok, latency, chars)
+
+    def throttled(self, engine: str, region: str = None, retry_after: float = 1.0):
+        """
+        服务端返回限流时调用，暂停该引擎 retry_after 秒的配额
+        """
+        with self._cond:
+            limiter = self._limiter(engine, region)
+            if limiter is None:
+                return
+            limiter.stats["throttled"] += 1
+            for _, bucket in limiter.buckets:
+                bucket.drain(retry_after)
+            if limiter.adaptive is not None:
+                limiter.adaptive.failure()
+        logger.warning(f"throttled by {engine}/{region}, pause {retry_after}s")
+
+    def failed(self, engine: str, region: str = None):
+        """
+        一次服务调用失败时调用（如重试前），自适应并发据此收缩
+        在该配额的 slot 内调用时只标记这次调用失败，slot 结束时按失败计，不计入成功的延迟
+        """
+        with self._cond:
+            limiter = self._limiter(engine, region)
+            if limiter is None:
+                return
+            turn = _current_turn.get()
+            if turn is not None and turn.limiter is limiter:
+                turn.failed = True
+                return
+            limiter.stats["failed"] += 1
+            if limiter.adaptive is not None:
+                limiter.adaptive.failure()
+
+    def stats(self) -> dict:
+        with self._cond:
+            return {
+                f"{engine}/{region}": dict(
+                    limiter.stats,
+                    active=limiter.active,
+                    limit=limiter.concurrency,
+                    queued=limiter.queued(),
+                )
+                for (engine, region), limiter in self._limiters.items()
+            }
+
+
+# edge 的限流阈值未公开且随时变化，默认以自适应并发探测
+default_scheduler = Scheduler({("edge", None): Quota(adaptive=True)})
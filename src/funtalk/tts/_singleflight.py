@@ -0,0 +1,178 @@
+import hashlib
+import json
+import os
+import shutil
+import threading
+import time
+from typing import Optional
+
+from funutil import getLogger
+
+from funtalk.audio import FileSink
+
+from ._timeline import WordTimeline
+
+try:
+    import fcntl
+except ImportError:  # windows
+    fcntl = None
+
+logger = getLogger("funtalk")
+
+
+def _copy(source: str, target: str):
+    # 经同目录临时文件原子替换，崩溃或并发读取时不会看到半截文件
+    with open(source, "rb") as file, FileSink(target) as sink:
+        shutil.copyfileobj(file, sink)
+
+
+class _Call:
+    def __init__(self):
+        self.event = threading.Event()
+        self.followers = []
+        self.timeline = None
+        self.error = None
+        # 替等待者复制音频时的错误，按等待者序号记录，只影响对应的调用
+        self.copy_errors = {}
+
+
+class SingleFlight:
+    """
+    相同 key 的并发合成只执行一次，其余调用等待并拿到同一份音频与时间轴
+    进程内通过内存登记协调；指定 lock_dir 时再通过文件锁协调多个进程，
+    ttl 秒内已由其他进程完成的结果直接复用
+    """
+
+    def __init__(self, lock_dir: str = None, ttl: float = 10.0):
+        self.lock_dir = lock_dir
+        self.ttl = ttl
+        self._lock = threading.Lock()
+        self._calls = {}
+
+    @staticmethod
+    def key(*parts) -> str:
+        return hashlib.sha1("\x00".join(map(str, parts)).encode("utf-8")).hexdigest()
+
+    def do(self, key: str, voice_file: str, func) -> Optional[WordTimeline]:
+        """
+        func(voice_file) 执行实际合成并返回 WordTimeline
+        """
+        with self._lock:
+            call = self._calls.get(key)
+            if call is None:
+                call = self._calls[key] = _Call()
+                leader = True
+            else:
+                follower = len(call.followers)
+                call.followers.append(voice_file)
+                leader = False
+
+        if not leader:
+            call.event.wait()
+            error = call.error or call.copy_errors.get(follower)
+            if error is not None:
+                raise error
+            return None if call.timeline is None else call.timeline.copy()
+
+        try:
+            if self.lock_dir and fcntl is not None:
+                call.timeline = self._do_across_processes(key, voice_file, func)
+            else:
+                call.timeline = func(voice_file)
+        except Exception as e:
+            call.error = e
+            raise
+        finally:
+            with self._lock:
+                del self._calls[key]
+            # 在唤醒前替等待者复制音频，避免调用方随后清理 voice_file
+            if call.error is None and call.timeline is not None:
+                for follower, follower_file in enumerate(call.followers):
+                    if os.path.abspath(follower_file) != os.path.abspath(voice_file):
+                        try:
+                            _copy(voice_file, follower_file)
+                        except Exception as e:
+                            call.copy_errors[follower] = e
+            if call.followers:
+                logger.info(f"coalesced {len(call.followers)} duplicate request(s)")
+            call.event.set()
+        return call.timeline
+
+    def _do_across_processes(self, key: str, voice_file: str, func):
+        os.makedirs(self.lock_dir, exist_ok=True)
+        base = os.path.join(self.lock_dir, key)
+        with self._acquire(base + ".lock") as lock_file:
+            try:
+                timeline = self._load(base, voice_file)
+                if timeline is not None:
+                    return timeline
+                timeline = func(voice_file)
+                if timeline is not None:
+                    self._save(base, voice_file, timeline)
+                return timeline
+            finally:
+                fcntl.flock(lock_file, fcntl.LOCK_UN)
+
+    @staticmethod
+    def _acquire(path: str):
+        """
+        对锁文件加排他锁；锁文件可能在等待期间被 _prune 删除，加锁后确认仍是同一个文件，否则重新打开
+        """
+        while True:
+            lock_file = open(path, "a")
+            fcntl.flock(lock_file, fcntl.LOCK_EX)
+            try:
+                if os.fstat(lock_file.fileno()).st_ino == os.stat(path).st_ino:
+                    # 更新修改时间，使用中的锁文件不会被当作过期清理
+                    os.utime(path)
+                    return lock_file
+            except FileNotFoundError:
+                pass
+            lock_file.close()
+
+    def _load(self, base: str, voice_file: str) -> Optional[WordTimeline]:
+        try:
+            if time.time() - os.path.getmtime(base + ".json") > self.ttl:
+                return None
+            with open(base + ".json", "r", encoding="utf-8") as file:
+                data = json.load(file)
+            _copy(base + ".audio", voice_file)
+        except (OSError, ValueError):
+            return None
+        return WordTimeline.from_dict(data)
+
+    def _save(self, base: str, voice_file: str, timeline: WordTimeline):
+        self._prune()
+        _copy(voice_file, base + ".audio")
+        with open(base + ".json.tmp", "w", encoding="utf-8") as file:
+            json.dump(timeline.to_dict(), file)
+        os.replace(base + ".json.tmp", base + ".json")
+
+    def _prune(self):
+        expire = time.time() - self.ttl
+        for entry in os.scandir(self.lock_dir):
+            if not entry.name.endswith((".audio", ".json", ".lock")):
+                continue
+            try:
+                if entry.stat().st_mtime >= expire:
+                    continue
+                if entry.name.endswith(".lock"):
+                    self._remove_lock(entry.path)
+                else:
+                    os.remove(entry.path)
+            except OSError:
+                pass
+
+    @staticmethod
+    def _remove_lock(path: str):
+        # 只删除没有进程持有的锁文件；等待中的进程加锁后会发现文件已被替换并重新打开
+        with open(path, "a") as lock_file:
+            try:
+                fcntl.flock(lock_file, fcntl.LOCK_EX | fcntl.LOCK_NB)
+            except OSError:
+                return
+            if os.fstat(lock_file.fileno()).st_ino == os.stat(path).st_ino:
+                os.remove(path)
+
+
+default_single_flight = SingleFlight(lock_dir=os.environ.get("FUNTALK_LOCK_DIR"))
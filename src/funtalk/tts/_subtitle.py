@@ -0,0 +1,170 @@
+import re
+from typing import Callable, Iterator, List, NamedTuple, Union
+from xml.sax.saxutils import unescape
+
+from edge_tts.submaker import mktimestamp
+
+from funtalk.text import split_sentences
+
+_NON_WORD_SPACE = re.compile(r"[^\w\s]")
+_NON_WORD = re.compile(r"\W+")
+
+SRT = "srt"
+VTT = "vtt"
+
+_TIMESTAMP = re.compile(
+    r"(\d+):(\d{2}):(\d{2})[,.](\d{3})\s*-->\s*(\d+):(\d{2}):(\d{2})[,.](\d{3})"
+)
+
+
+class SubtitleCue(NamedTuple):
+    index: int
+    start: int
+    end: int
+    text: str
+
+    def format(self, subtitle_format: str = SRT) -> str:
+        """
+        格式化为一条 SRT/VTT 字幕，时间单位 100ns
+        """
+        start_t = mktimestamp(self.start)
+        end_t = mktimestamp(self.end)
+        if subtitle_format == VTT:
+            return f"{start_t} --> {end_t}\n{self.text}\n"
+        start_t, end_t = start_t.replace(".", ","), end_t.replace(".", ",")
+        return f"{self.index}\n{start_t} --> {end_t}\n{self.text}\n"
+
+
+def _ticks(hours: str, minutes: str, seconds: str, millis: str) -> int:
+    total = (int(hours) * 3600 + int(minutes) * 60 + int(seconds)) * 1000 + int(millis)
+    return total * 10000
+
+
+def parse_srt(content: str) -> Iterator[SubtitleCue]:
+    """
+    解析 SRT/VTT 文本，逐条返回 SubtitleCue，时间单位 100ns
+    """
+    index = 0
+    for block in re.split(r"\n\s*\n", content.replace("\r\n", "\n")):
+        lines = block.strip().split("\n")
+        for number, line in enumerate(lines):
+            match = _TIMESTAMP.search(line)
+            if match is None:
+                continue
+            text = "\n".join(lines[number + 1 :]).strip()
+            index += 1
+            groups = match.groups()
+            yield SubtitleCue(index, _ticks(*groups[:4]), _ticks(*groups[4:]), text)
+            break
+
+
+def _match_line(sub_line: str, line: str) -> str:
+    if sub_line == line:
+        return line.strip()
+
+    sub_line_ = _NON_WORD_SPACE.sub("", sub_line)
+    line_ = _NON_WORD_SPACE.sub("", line)
+    if sub_line_ == line_:
+        return line_.strip()
+
+    if _NON_WORD.sub("", sub_line) == _NON_WORD.sub("", line):
+        return line.strip()
+
+    return ""
+
+
+class SubtitleAligner:
+    """
+    流式字幕对齐：按引擎产生词边界的顺序逐个喂入，当前累积的词与脚本的下一行匹配时立即输出一条字幕，
+    只保留当前行的内容，不必等整段合成结束
+    output: 回调函数（参数为 SubtitleCue）或带 write 方法的对象（写入格式化后的文本），None 时只收集到 cues
+    引擎提供句子边界（feed_sentence）时每个句子直接输出一条字幕，之后的词边界不再参与匹配，
+    线性时间且不会因文本不一致而失败；句子连起来未覆盖整个脚本时 complete 为 False
+    引擎重试时边界事件会从头再来，已经输出过的行不会重复输出
+    """
+
+    def __init__(
+        self,
+        text: str,
+        output: Union[Callable[[SubtitleCue], None], object, None] = None,
+        subtitle_format: str = SRT,
+    ):
+        if subtitle_format not in (SRT, VTT):
+            raise ValueError(f"unknown subtitle format: {subtitle_format}")
+        self.lines = split_sentences(text)
+        self.output = output
+        self.subtitle_format = subtitle_format
+        self.cues: List[SubtitleCue] = [] if output is None else None
+        self.emitted = 0
+        self.fed = 0
+        self._index = 0
+        self._start = -1
+        self._line = ""
+        self._last = -1
+        self._sentences = 0
+        self._sentence_last = -1
+        self._script = _NON_WORD.sub("", text)
+        self._covered = ""
+        if subtitle_format == VTT and self._write_text:
+            self._write_text("WEBVTT\n\n")
+
+    @property
+    def _write_text(self):
+        return getattr(self.output, "write", None)
+
+    @property
+    def sentence_mode(self) -> bool:
+        return self._sentence_last >= 0
+
+    @property
+    def complete(self) -> bool:
+        if self.sentence_mode:
+            # 句子边界可能中途断开（如合成被截断），输出的句子连起来覆盖整个脚本才算完整
+            return bool(self._script) and self._covered == self._script
+        return self.emitted == len(self.lines)
+
+    def feed_sentence(self, start: int, end: int, sentence: str):
+        if start < self._sentence_last:
+            self._sentences = 0
+        self._sentence_last = start
+        self._sentences += 1
+        text = unescape(sentence).strip()
+        if self._sentences > self.emitted and text:
+            self.emitted = self._sentences
+            self._covered += _NON_WORD.sub("", text)
+            self._emit(SubtitleCue(self.emitted, start, end, text))
+
+    def feed(self, start: int, end: int, word: str):
+        if self.sentence_mode:
+            self.fed += 1
+            return
+        if start < self._last:
+            # 时间倒退说明引擎重试并从头输出，重新对齐但跳过已输出的行
+            self._index, self._start, self._line = 0, -1, ""
+        self._last = start
+        self.fed += 1
+        if self._index >= len(self.lines):
+            return
+        if self._start < 0:
+            self._start = start
+        self._line += unescape(word)
+        text = _match_line(self._line, self.lines[self._index])
+        if not text:
+            return
+        self._index += 1
+        if self._index > self.emitted:
+            self.emitted = self._index
+            self._emit(SubtitleCue(self._index, self._start, end, text))
+        self._start, self._line = -1, ""
+
+    def feed_timeline(self, timeline):
+        for start, end, word in timeline:
+            self.feed(start, end, word)
+
+    def _emit(self, cue: SubtitleCue):
+        if self.output is None:
+            self.cues.append(cue)
+        elif self._write_text:
+            self._write_text(cue.format(self.subtitle_format) + "\n")
+        else:
+            self.output(cue)
@@ -0,0 +1,233 @@
+import bisect
+from array import array
+from typing import Iterable, Iterator, List, Tuple
+
+from edge_tts import SubMaker
+
+try:
+    import numpy as np
+except ImportError:
+    np = None
+
+
+def _shifted(values: array, delta: int, minimum: int = None) -> array:
+    result = array("q")
+    if np is not None and len(values):
+        shifted = np.frombuffer(values, dtype=np.int64) + delta
+        if minimum is not None:
+            shifted = np.maximum(shifted, minimum)
+        result.frombytes(shifted.tobytes())
+    elif minimum is not None:
+        result.extend(max(value + delta, minimum) for value in values)
+    else:
+        result.extend(value + delta for value in values)
+    return result
+
+
+def _scaled(values: array, factor: float) -> array:
+    result = array("q")
+    if np is not None and len(values):
+        scaled = np.rint(np.frombuffer(values, dtype=np.int64) * factor)
+        result.frombytes(scaled.astype(np.int64).tobytes())
+    else:
+        result.extend(round(value * factor) for value in values)
+    return result
+
+
+def _maximum(values: array) -> int:
+    if not len(values):
+        return 0
+    if np is not None:
+        return int(np.frombuffer(values, dtype=np.int64).max())
+    return max(values)
+
+
+class WordTimeline:
+    """
+    紧凑的词边界时间轴，替代 SubMaker 的字符串列表与元组列表
+    起止时间存放在 int64 数组中（单位 100ns，与 SubMaker 一致），
+    文本拼接在一个连续缓冲区里，按偏移量切出每个词
+    """
+
+    __slots__ = ("starts", "ends", "_text_ends", "_text", "_pieces", "_length", "_end")
+
+    def __init__(self):
+        self.starts = array("q")
+        self.ends = array("q")
+        self._text_ends = array("q")
+        self._text = ""
+        self._pieces = []
+        self._length = 0
+        self._end = 0
+
+    def append(self, start: int, end: int, text: str):
+        self.starts.append(start)
+        self.ends.append(end)
+        self._pieces.append(text)
+        self._length += len(text)
+        self._text_ends.append(self._length)
+        if end > self._end:
+            self._end = end
+
+    def create_sub(self, timestamp: Tuple[int, int], text: str):
+        """
+        与 SubMaker.create_sub 相同的签名：timestamp 为 (offset, duration)
+        """
+        self.append(timestamp[0], timestamp[0] + timestamp[1], text)
+
+    @property
+    def text(self) -> str:
+        if self._pieces:
+            self._text += "".join(self._pieces)
+            self._pieces = []
+        return self._text
+
+    @property
+    def duration(self) -> int:
+        """
+        最后一个词的结束时间，单位 100ns
+        """
+        return self._end
+
+    def word(self, index: int) -> str:
+        start = self._text_ends[index - 1] if index > 0 else 0
+        return self.text[start : self._text_ends[index]]
+
+    def __len__(self) -> int:
+        return len(self.starts)
+
+    def __bool__(self) -> bool:
+        return len(self.starts) > 0
+
+    def __iter__(self) -> Iterator[Tuple[int, int, str]]:
+        text = self.text
+        previous = 0
+        for start, end, text_end in zip(self.starts, self.ends, self._text_ends):
+            yield start, end, text[previous:text_end]
+            previous = text_end
+
+    @classmethod
+    def _build(cls, starts: array, ends: array, text_ends: array, text: str):
+        timeline = cls()
+        timeline.starts = starts
+        timeline.ends = ends
+        timeline._text_ends = text_ends
+        timeline._text = text
+        timeline._length = len(text)
+        timeline._end = _maximum(ends)
+        return timeline
+
+    def copy(self) -> "WordTimeline":
+        return self._build(
+            array("q", self.starts),
+            array("q", self.ends),
+            array("q", self._text_ends),
+            self.text,
+        )
+
+    def shift(self, delta: int, minimum: int = None) -> "WordTimeline":
+        """
+        整体平移 delta（100ns），返回新的时间轴
+        minimum: 平移后小于该值的时间按该值计，如向前平移时不出现负数
+        """
+        return self._build(
+            _shifted(self.starts, delta, minimum),
+            _shifted(self.ends, delta, minimum),
+            array("q", self._text_ends),
+            self.text,
+        )
+
+    def scale(self, factor: float) -> "WordTimeline":
+        """
+        所有时间乘以 factor，返回新的时间轴；音频变速 rate 倍时 factor 为 1 / rate
+        """
+        return self._build(
+            _scaled(self.starts, factor),
+            _scaled(self.ends, factor),
+            array("q", self._text_ends),
+            self.text,
+        )
+
+    def slice(self, start: int = 0, stop: int = None) -> "WordTimeline":
+        """
+        按词的下标切片，时间不变
+        """
+        start, stop, _ = slice(start, stop).indices(len(self))
+        stop = max(start, stop)
+        text_start = self._text_ends[start - 1] if start > 0 else 0
+        text_stop = self._text_ends[stop - 1] if stop > 0 else 0
+        return self._build(
+            self.starts[start:stop],
+            self.ends[start:stop],
+            _shifted(self._text_ends[start:stop], -text_start),
+            self.text[text_start:text_stop],
+        )
+
+    def between(self, begin: int, end: int) -> "WordTimeline":
+        """
+        取开始时间落在 [begin, end) 内的词，要求时间轴按开始时间有序
+        """
+        return self.slice(
+            bisect.bisect_left(self.starts, begin), bisect.bisect_left(self.starts, end)
+        )
+
+    @classmethod
+    def concatenate(
+        cls, timelines: Iterable["WordTimeline"], offsets: Iterable[int] = None
+    ) -> "WordTimeline":
+        """
+        拼接多个时间轴，offsets 为每段的起始偏移，默认依次接在上一段 duration 之后
+        """
+        timelines = list(timelines)
+        if offsets is None:
+            offsets, position = [], 0
+            for timeline in timelines:
+                offsets.append(position)
+                position += timeline.duration
+        starts, ends, text_ends = array("q"), array("q"), array("q")
+        pieces, length = [], 0
+        for timeline, offset in zip(timelines, offsets):
+            starts.extend(_shifted(timeline.starts, offset))
+            ends.extend(_shifted(timeline.ends, offset))
+            text_ends.extend(_shifted(timeline._text_ends, length))
+            pieces.append(timeline.text)
+            length += len(timeline.text)
+        return cls._build(starts, ends, text_ends, "".join(pieces))
+
+    @property
+    def subs(self) -> List[str]:
+        return [word for _, _, word in self]
+
+    @property
+    def offset(self) -> List[Tuple[int, int]]:
+        return list(zip(self.starts, self.ends))
+
+    def to_submaker(self) -> SubMaker:
+        sub_maker = SubMaker()
+        sub_maker.subs = self.subs
+        sub_maker.offset = self.offset
+        return sub_maker
+
+    @classmethod
+    def from_submaker(cls, sub_maker: SubMaker) -> "WordTimeline":
+        timeline = cls()
+        for (start, end), text in zip(sub_maker.offset, sub_maker.subs):
+            timeline.append(int(start), int(end), text)
+        return timeline
+
+    def to_dict(self) -> dict:
+        return {
+            "starts": self.starts.tolist(),
+            "ends": self.ends.tolist(),
+            "text_ends": self._text_ends.tolist(),
+            "text": self.text,
+        }
+
+    @classmethod
+    def from_dict(cls, data: dict) -> "WordTimeline":
+        return cls._build(
+            array("q", data["starts"]),
+            array("q", data["ends"]),
+            array("q", data["text_ends"]),
+            data["text"],
+        )
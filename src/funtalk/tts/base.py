@@ -1,125 +1,271 @@
+import asyncio
+import functools
 import os
-import re
-from xml.sax.saxutils import unescape
+import shutil
+import tempfile
+import time
+from collections import deque
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import asynccontextmanager, nullcontext
+from typing import Callable, List, Optional
 
-from edge_tts import SubMaker
-from edge_tts.submaker import mktimestamp
 from funutil import getLogger
-from funvideo.app.utils import utils
-from moviepy.video.tools import subtitles
+
+from funtalk.audio import (
+    AudioAppender,
+    FileSink,
+    MemorySink,
+    OutputFormat,
+    PostProcess,
+    Transcoder,
+    get_output_format,
+    open_sink,
+    stretch_pcm,
+    wav_header,
+)
+from funtalk.text import iter_paragraphs, normalize_text
+
+from ._render_cache import RenderCache, default_render_cache
+from ._result import TTSResult
+from ._scheduler import (
+    PRIORITY_BULK,
+    PRIORITY_INTERACTIVE,
+    Scheduler,
+    default_scheduler,
+)
+from ._singleflight import SingleFlight, default_single_flight
+from ._subtitle import SubtitleAligner, SubtitleCue
+from ._timeline import WordTimeline
+
+try:
+    import numpy
+except ImportError:
+    numpy = None
 
 logger = getLogger("funtalk")
 
+# 超出该范围时本地变速音质下降明显，仍交给服务端按语速合成
+_STRETCH_RATES = (0.5, 2.0)
+
+
+def _ordered_map(fn, items, concurrency: int):
+    """
+    有界并发的有序 map：最多 2 * concurrency 个任务在途，让合成与消费重叠，按输入顺序返回结果
+    """
+    with ThreadPoolExecutor(max_workers=concurrency) as executor:
+        pending = deque()
+        try:
+            for item in items:
+                pending.append(executor.submit(fn, item))
+                if len(pending) >= 2 * concurrency:
+                    yield pending.popleft().result()
+            while pending:
+                yield pending.popleft().result()
+        finally:
+            for future in pending:
+                future.cancel()
+
 
 class BaseTTS:
-    def __init__(self, voice_name, *args, **kwargs):
+    """
+    合成结果通过 create_tts 的返回值传递，实例本身不保存每次调用的状态，
+    同一实例可以被多个线程并发使用
+    """
+
+    engine = "base"
+    default_output_format = "mp3-24k-48kbps"
+
+    def __init__(
+        self,
+        voice_name,
+        single_flight=True,
+        time_stretch=False,
+        scheduler=True,
+        post_process=False,
+        *args,
+        **kwargs,
+    ):
+        """
+        single_flight: True 使用进程内共享的合并层，False 关闭，也可传入 SingleFlight 实例
+        time_stretch: True 时只向服务请求 1.0 倍速并缓存，其他语速在本地变速得到（需要 numpy，
+            以及下述 ffmpeg）；也可传入 RenderCache 实例
+        scheduler: True 使用进程内共享的配额调度器，False 关闭，也可传入 Scheduler 实例
+        post_process: True 时对合成结果做默认的后处理（裁剪首尾静音、响度归一、淡入淡出，需要 numpy），
+            也可传入 PostProcess 实例；时间轴随裁剪平移
+        time_stretch 与 post_process 在 PCM 上处理：引擎不能直接输出 PCM 时（如 edge 只有 mp3）
+        先经 ffmpeg 解码，目标格式不是 pcm/wav 时处理后再经 ffmpeg 编码一次，需要安装 ffmpeg；
+        原生输出 PCM 的引擎（如 azure）以 pcm/wav 为目标时不调用 ffmpeg
+        """
         self.voice_name = self.parse_voice_name(voice_name)
-        self.sub_maker: SubMaker = None
+        if single_flight is True:
+            single_flight = default_single_flight
+        self.single_flight: Optional[SingleFlight] = single_flight or None
+        if time_stretch and numpy is None:
+            logger.warning("time_stretch requires numpy, fall back to service rate")
+            time_stretch = False
+        if time_stretch is True:
+            time_stretch = default_render_cache
+        self.render_cache: Optional[RenderCache] = time_stretch or None
+        if scheduler is True:
+            scheduler = default_scheduler
+        self.scheduler: Optional[Scheduler] = scheduler or None
+        if post_process and numpy is None:
+            logger.warning("post_process requires numpy, skipped")
+            post_process = False
+        if post_process is True:
+            post_process = PostProcess()
+        self.post_process: Optional[PostProcess] = post_process or None
+        local = self.render_cache is not None or self.post_process is not None
+        if local and shutil.which("ffmpeg") is None:
+            logger.warning(
+                "ffmpeg not found, time_stretch/post_process only work "
+                "for engines with native pcm output and pcm/wav targets"
+            )
+
+    @property
+    def region(self) -> Optional[str]:
+        """
+        服务区域，配额按 (engine, region) 计算
+        """
+        return None
+
+    def _slot(
+        self, text: str, priority: int = None, tenant: str = None, region: str = None
+    ):
+        """
+        向调度器申请一次服务调用的配额，region 默认为 self.region
+        """
+        if self.scheduler is None:
+            return nullcontext()
+        return self.scheduler.slot(
+            self.engine,
+            region or self.region,
+            chars=len(text),
+            priority=PRIORITY_INTERACTIVE if priority is None else priority,
+            tenant=tenant or "default",
+        )
+
+    @asynccontextmanager
+    async def _aslot(
+        self, text: str, priority: int = None, tenant: str = None, region: str = None
+    ):
+        """
+        _slot 的异步版本：在事件循环中排队等待，不占用线程
+        直接申请调度器的配额，子类对 _slot 的扩展（如选择区域）需要同时重写 _aslot
+        """
+        if self.scheduler is None:
+            yield
+            return
+        async with self.scheduler.aslot(
+            self.engine,
+            region or self.region,
+            chars=len(text),
+            priority=PRIORITY_INTERACTIVE if priority is None else priority,
+            tenant=tenant or "default",
+        ):
+            yield
+
+    def _throttled(self, retry_after: float = 1.0, region: str = None):
+        """
+        引擎收到服务端限流响应时调用
+        """
+        if self.scheduler is not None:
+            self.scheduler.throttled(self.engine, region or self.region, retry_after)
+
+    def _failed(self, region: str = None):
+        """
+        引擎的一次服务调用失败时调用（包括随后会重试的），自适应并发据此收缩
+        """
+        if self.scheduler is not None:
+            self.scheduler.failed(self.engine, region or self.region)
 
     def _tts(
-        self, text: str, voice_rate: float, voice_file: str, *args, **kwargs
-    ) -> [SubMaker, None]:
+        self,
+        text: str,
+        voice_rate: float,
+        voice_file,
+        output_format: str = None,
+        *args,
+        on_word: Callable[[int, int, str], None] = None,
+        on_sentence: Callable[[int, int, str], None] = None,
+        **kwargs,
+    ) -> Optional[WordTimeline]:
+        """
+        voice_file: 文件路径或 AudioSink，引擎通过 funtalk.audio.open_sink 写入
+        on_word: 每收到一个词边界时调用 (开始, 结束, 文本)，用于流式字幕；不支持的引擎可以忽略
+        on_sentence: 同 on_word，针对句子边界，只有服务端提供句子边界的引擎（如 azure）会调用
+        """
         raise NotImplementedError()
 
+    async def _atts(
+        self,
+        text: str,
+        voice_rate: float,
+        voice_file,
+        output_format: str = None,
+        *args,
+        **kwargs,
+    ) -> Optional[WordTimeline]:
+        """
+        _tts 的异步版本，参数与返回值相同；默认在线程池中调用 _tts，
+        支持非阻塞调用的引擎（edge 长连接池、azure SDK 回调）重写为原生实现
+        """
+        return await asyncio.get_running_loop().run_in_executor(
+            None,
+            functools.partial(
+                self._tts, text, voice_rate, voice_file, output_format, *args, **kwargs
+            ),
+        )
+
+    @staticmethod
+    def _audio_writer(file, output_format: OutputFormat, native: bool):
+        """
+        引擎原生支持该格式时直接写文件，否则经流式转码写入
+        """
+        return nullcontext(file) if native else Transcoder(output_format, file)
+
     @staticmethod
     def parse_voice_name(voice_name) -> str:
         return voice_name.replace("-Female", "").replace("-Male", "").strip()
 
     @staticmethod
     def _format_text(text: str) -> str:
-        # text = text.replace("\n", " ")
-        text = text.replace("[", " ")
-        text = text.replace("]", " ")
-        text = text.replace("(", " ")
-        text = text.replace(")", " ")
-        text = text.replace("{", " ")
-        text = text.replace("}", " ")
-        text = text.strip()
-        return text
+        return normalize_text(text)
 
     def create_subtitle(
-        self, text: str, subtitle_file: str, *args, **kwargs
-    ) -> [SubMaker, None]:
+        self,
+        text: str,
+        subtitle_file: str,
+        timeline: WordTimeline,
+        *args,
+        sentences: list = None,
+        **kwargs,
+    ):
         """
-        优化字幕文件
+        由 timeline 生成优化后的字幕文件
         1. 将字幕文件按照标点符号分割成多行
         2. 逐行匹配字幕文件中的文本
         3. 生成新的字幕文件
+        sentences: 引擎给出的句子边界 (开始, 结束, 文本)，有则直接按句生成，逐词匹配只作为兜底
         """
-
-        def formatter(
-            idx: int, start_time: float, end_time: float, sub_text: str
-        ) -> str:
-            start_t = mktimestamp(start_time).replace(".", ",")
-            end_t = mktimestamp(end_time).replace(".", ",")
-            return f"{idx}\n{start_t} --> {end_t}\n{sub_text}\n"
-
-        start_time = -1.0
-        sub_items = []
-        sub_index = 0
-
-        script_lines = utils.split_string_by_punctuations(text)
-
-        def match_line(_sub_line: str, _sub_index: int):
-            if len(script_lines) <= _sub_index:
-                return ""
-
-            _line = script_lines[_sub_index]
-            if _sub_line == _line:
-                return script_lines[_sub_index].strip()
-
-            _sub_line_ = re.sub(r"[^\w\s]", "", _sub_line)
-            _line_ = re.sub(r"[^\w\s]", "", _line)
-            if _sub_line_ == _line_:
-                return _line_.strip()
-
-            _sub_line_ = re.sub(r"\W+", "", _sub_line)
-            _line_ = re.sub(r"\W+", "", _line)
-            if _sub_line_ == _line_:
-                return _line.strip()
-
-            return ""
-
-        sub_line = ""
-
         try:
-            for _, (offset, sub) in enumerate(
-                zip(self.sub_maker.offset, self.sub_maker.subs)
-            ):
-                _start_time, end_time = offset
-                if start_time < 0:
-                    start_time = _start_time
-
-                sub = unescape(sub)
-                sub_line += sub
-                sub_text = match_line(sub_line, sub_index)
-                if sub_text:
-                    sub_index += 1
-                    line = formatter(
-                        idx=sub_index,
-                        start_time=start_time,
-                        end_time=end_time,
-                        sub_text=sub_text,
-                    )
-                    sub_items.append(line)
-                    start_time = -1.0
-                    sub_line = ""
-
-            if len(sub_items) == len(script_lines):
+            aligner = SubtitleAligner(text)
+            if sentences:
+                for sentence in sentences:
+                    aligner.feed_sentence(*sentence)
+            if not aligner.complete:
+                # 句子边界不完整（如合成被截断）时回到逐词匹配
+                aligner = SubtitleAligner(text)
+                aligner.feed_timeline(timeline)
+            if aligner.complete:
                 with open(subtitle_file, "w", encoding="utf-8") as file:
-                    file.write("\n".join(sub_items) + "\n")
-                try:
-                    sbs = subtitles.file_to_subtitles(subtitle_file, encoding="utf-8")
-                    duration = max([tb for ((ta, tb), txt) in sbs])
-                    logger.info(
-                        f"completed, subtitle file created: {subtitle_file}, duration: {duration}"
-                    )
-                except Exception as e:
-                    logger.error(f"failed, error: {str(e)}")
-                    os.remove(subtitle_file)
+                    file.write("\n".join(cue.format() for cue in aligner.cues) + "\n")
+                logger.info(
+                    f"completed, subtitle file created: {subtitle_file}, duration: {timeline.duration / 10000000}"
+                )
             else:
                 logger.warning(
-                    f"failed, sub_items len: {len(sub_items)}, script_lines len: {len(script_lines)}"
+                    f"failed, sub_items len: {aligner.emitted}, script_lines len: {len(aligner.lines)}"
                 )
 
         except Exception as e:
@@ -129,25 +275,421 @@ class BaseTTS:
         self,
         text: str,
         voice_rate: float,
-        voice_file: str,
+        voice_file,
         subtitle_file: str = None,
+        output_format: str = None,
         *args,
+        priority: int = PRIORITY_INTERACTIVE,
+        tenant: str = "default",
+        subtitle_stream=None,
+        subtitle_format: str = "srt",
         **kwargs,
-    ) -> [SubMaker, None]:
+    ) -> Optional[TTSResult]:
+        """
+        voice_file: 文件路径（先写临时文件，成功后原子替换），或 funtalk.audio 中的 AudioSink
+        output_format: 输出格式，见 funtalk.audio.OUTPUT_FORMATS，默认使用引擎的默认格式
+        priority, tenant: 调度器中的优先级（越小越先）与租户，配额紧张时按此排队
+        subtitle_stream: 回调函数或带 write 方法的对象，合成过程中每对齐一行字幕立即输出（srt/vtt），
+            见 SubtitleAligner；此时不与其他相同请求合并
+        返回 TTSResult，失败时返回 None
+        """
         text = self._format_text(text)
-        self.sub_maker = self._tts(
-            text=text, voice_rate=voice_rate, voice_file=voice_file, *args, **kwargs
+        aligner, sentences = None, None
+        if subtitle_stream is not None:
+            aligner = SubtitleAligner(text, subtitle_stream, subtitle_format)
+            kwargs["on_word"] = aligner.feed
+            kwargs["on_sentence"] = aligner.feed_sentence
+        elif subtitle_file:
+            sentences = []
+            kwargs["on_sentence"] = lambda *sentence: sentences.append(sentence)
+        stretch = (
+            self.render_cache is not None
+            and _STRETCH_RATES[0] <= voice_rate <= _STRETCH_RATES[1]
+        )
+
+        def synthesize(_voice_file):
+            if stretch or self.post_process is not None:
+                return self._pcm_tts(
+                    text=text,
+                    voice_rate=voice_rate,
+                    voice_file=_voice_file,
+                    output_format=output_format,
+                    stretch=stretch,
+                    priority=priority,
+                    tenant=tenant,
+                    *args,
+                    **kwargs,
+                )
+            with self._slot(text, priority, tenant):
+                return self._tts(
+                    text=text,
+                    voice_rate=voice_rate,
+                    voice_file=_voice_file,
+                    output_format=output_format,
+                    *args,
+                    **kwargs,
+                )
+
+        started = time.perf_counter()
+        if (
+            self.single_flight is None
+            or not isinstance(voice_file, str)
+            or aligner is not None
+        ):
+            timeline = synthesize(voice_file)
+        else:
+            key = self.single_flight.key(
+                type(self).__name__,
+                self.voice_name,
+                voice_rate,
+                output_format,
+                self.post_process,
+                # 本地变速与服务端变速的结果不同，不能互相复用
+                self.render_cache is not None,
+                text,
+            )
+            timeline = self.single_flight.do(key, voice_file, synthesize)
+        if timeline is None:
+            return None
+        if aligner is not None and not aligner.fed:
+            # 引擎未逐词回调（如本地变速、后处理），合成完成后一次性输出
+            aligner.feed_timeline(timeline)
+        timings = {"synthesis": time.perf_counter() - started}
+        if subtitle_file:
+            started = time.perf_counter()
+            self.create_subtitle(
+                text=text,
+                subtitle_file=subtitle_file,
+                timeline=timeline,
+                sentences=sentences,
+                *args,
+                **kwargs,
+            )
+            timings["subtitle"] = time.perf_counter() - started
+        return TTSResult.create(
+            voice_file, timeline, output_format, subtitle_file, timings
         )
+
+    async def acreate_tts(
+        self,
+        text: str,
+        voice_rate: float,
+        voice_file,
+        subtitle_file: str = None,
+        output_format: str = None,
+        *args,
+        priority: int = PRIORITY_INTERACTIVE,
+        tenant: str = "default",
+        timeout: float = None,
+        **kwargs,
+    ) -> Optional[TTSResult]:
+        """
+        create_tts 的异步版本，在事件循环中调用：引擎支持时（见 _atts）合成期间不占用线程，
+        单个事件循环即可同时进行大量合成
+        timeout: 超时秒数，超时后取消请求并返回 None；外部取消（task.cancel）同样会取消服务端请求
+        本地变速与后处理需要在线程中完成，开启时整体交给线程池中的 create_tts
+        """
+        if self.render_cache is not None or self.post_process is not None:
+            call = functools.partial(
+                self.create_tts,
+                text,
+                voice_rate,
+                voice_file,
+                subtitle_file,
+                output_format,
+                *args,
+                priority=priority,
+                tenant=tenant,
+                **kwargs,
+            )
+            synthesis = asyncio.get_running_loop().run_in_executor(None, call)
+            try:
+                return await asyncio.wait_for(synthesis, timeout)
+            except asyncio.TimeoutError:
+                logger.error(f"failed, timed out after {timeout}s")
+                return None
+
+        text = self._format_text(text)
+        sentences = None
         if subtitle_file:
+            sentences = []
+            kwargs["on_sentence"] = lambda *sentence: sentences.append(sentence)
+
+        async def synthesize():
+            async with self._aslot(text, priority, tenant):
+                return await self._atts(
+                    text=text,
+                    voice_rate=voice_rate,
+                    voice_file=voice_file,
+                    output_format=output_format,
+                    *args,
+                    **kwargs,
+                )
+
+        started = time.perf_counter()
+        try:
+            timeline = await asyncio.wait_for(synthesize(), timeout)
+        except asyncio.TimeoutError:
+            logger.error(f"failed, timed out after {timeout}s")
+            return None
+        if timeline is None:
+            return None
+        timings = {"synthesis": time.perf_counter() - started}
+        if subtitle_file:
+            started = time.perf_counter()
             self.create_subtitle(
-                text=text, subtitle_file=subtitle_file, *args, **kwargs
+                text=text,
+                subtitle_file=subtitle_file,
+                timeline=timeline,
+                sentences=sentences,
+            )
+            timings["subtitle"] = time.perf_counter() - started
+        return TTSResult.create(
+            voice_file, timeline, output_format, subtitle_file, timings
+        )
+
+    def _pcm_tts(
+        self,
+        text: str,
+        voice_rate: float,
+        voice_file,
+        output_format: str = None,
+        *args,
+        stretch: bool = False,
+        priority: int = None,
+        tenant: str = None,
+        **kwargs,
+    ) -> Optional[WordTimeline]:
+        """
+        以 PCM 为中间格式合成，目标为 pcm/wav 时直接写出，其他格式经 ffmpeg 编码一次；
+        引擎不能直接输出 PCM 时 _tts 内部先经 ffmpeg 解码
+        stretch: 以缓存的 1.0 倍速 PCM 为底本，WSOLA 本地变速，时间轴按比例缩放
+        配置了 post_process 时对 PCM 做后处理，时间轴随首部裁剪平移
+        """
+        # 服务端返回的时间在变速、裁剪之后不再准确，逐词回调由 create_tts 在处理完成后补发；
+        # 句子边界同理，字幕回到逐词匹配
+        kwargs.pop("on_word", None)
+        kwargs.pop("on_sentence", None)
+        output_format = get_output_format(output_format or self.default_output_format)
+        sample_rate = output_format.sample_rate
+        pcm_format = f"pcm-{sample_rate // 1000}k"
+        cached, key = None, None
+        if stretch:
+            key = self.render_cache.key(
+                type(self).__name__, self.voice_name, pcm_format, text
+            )
+            cached = self.render_cache.get(key)
+        if cached is None:
+            buffer = MemorySink()
+            with self._slot(text, priority, tenant):
+                timeline = self._tts(
+                    text=text,
+                    voice_rate=1.0 if stretch else voice_rate,
+                    voice_file=buffer,
+                    output_format=pcm_format,
+                    *args,
+                    **kwargs,
+                )
+            if timeline is None:
+                return None
+            cached = (buffer.getvalue(), timeline)
+            if stretch:
+                cached = self.render_cache.put(key, *cached)
+        pcm, timeline = cached
+        if not stretch or voice_rate == 1.0:
+            timeline = timeline.copy()
+        else:
+            pcm = stretch_pcm(pcm, voice_rate, sample_rate)
+            timeline = timeline.scale(1 / voice_rate)
+        if self.post_process is not None:
+            pcm, trimmed = self.post_process.process(pcm, sample_rate)
+            if trimmed:
+                # 被裁掉的静音里可能有词的开头，平移后不早于 0
+                timeline = timeline.shift(
+                    -round(trimmed * 10000000 / sample_rate), minimum=0
+                )
+
+        with open_sink(voice_file) as sink:
+            if output_format.container == "pcm":
+                sink.write(pcm)
+            elif output_format.container == "wav":
+                sink.write(wav_header(sample_rate, len(pcm)))
+                sink.write(pcm)
+            else:
+                with Transcoder(
+                    output_format,
+                    sink,
+                    input_format="s16le",
+                    input_sample_rate=sample_rate,
+                ) as writer:
+                    writer.write(pcm)
+        return timeline
+
+    def batch_tts(
+        self,
+        texts: List[str],
+        voice_rate: float,
+        voice_files: List[str],
+        subtitle_files: List[str] = None,
+        output_format: str = None,
+        *args,
+        priority: int = PRIORITY_BULK,
+        tenant: str = "default",
+        **kwargs,
+    ) -> List[TTSResult]:
+        """
+        批量合成，默认逐条调用 create_tts，引擎可覆盖为合并请求；失败的条目为 None
+        默认以批量优先级排队，让位于交互请求
+        """
+        subtitle_files = subtitle_files or [None] * len(texts)
+        return [
+            self.create_tts(
+                text=text,
+                voice_rate=voice_rate,
+                voice_file=voice_file,
+                subtitle_file=subtitle_file,
+                output_format=output_format,
+                priority=priority,
+                tenant=tenant,
+            )
+            for text, voice_file, subtitle_file in zip(
+                texts, voice_files, subtitle_files
+            )
+        ]
+
+    def book_tts(
+        self,
+        source,
+        voice_rate: float,
+        voice_file,
+        subtitle_file: str = None,
+        output_format: str = None,
+        *args,
+        max_chars: int = 1000,
+        concurrency: int = 4,
+        priority: int = PRIORITY_BULK,
+        tenant: str = "default",
+        subtitle_format: str = "srt",
+        **kwargs,
+    ) -> Optional[TTSResult]:
+        """
+        整本书合成：source 为文件路径或文本迭代器，按段落惰性读取并切分为不超过 max_chars 的片段，
+        最多 concurrency 段同时合成，按顺序逐段追加到同一个输出（mp3/wav/pcm，不重新编码），
+        字幕按每段在整体中的起点平移后逐条写入 subtitle_file
+        内存中只保留正在合成与等待追加的片段，峰值与全书长度无关；
+        因此返回的 TTSResult 不含词边界（timeline 为空），duration 为各段时长之和
+        任一段失败时放弃整个输出并返回 None
+        """
+        output_format = output_format or self.default_output_format
+        container = get_output_format(output_format).container
+        if container not in ("mp3", "wav", "pcm"):
+            raise ValueError(f"book mode does not support {container} output")
+        started = time.perf_counter()
+
+        def synthesize(text: str):
+            buffer, cues = MemorySink(), []
+            result = self.create_tts(
+                text=text,
+                voice_rate=voice_rate,
+                voice_file=buffer,
+                output_format=output_format,
+                priority=priority,
+                tenant=tenant,
+                subtitle_stream=cues.append if subtitle_file else None,
+                *args,
+                **kwargs,
             )
-        return self.sub_maker
+            if result is None:
+                raise Exception(f"failed to synthesize segment: {text[:50]}")
+            return buffer.buffer, cues
+
+        concurrency = max(1, concurrency)
+        texts = filter(None, map(self._format_text, iter_paragraphs(source, max_chars)))
+        segments = _ordered_map(synthesize, texts, concurrency)
+        appender = AudioAppender(voice_file, output_format)
+        subtitles = FileSink(subtitle_file) if subtitle_file else None
+        count, index, position = 0, 0, 0
+        try:
+            if subtitles is not None and subtitle_format == "vtt":
+                subtitles.write(b"WEBVTT\n\n")
+            for data, cues in segments:
+                info = appender.append(data)
+                for cue in cues:
+                    index += 1
+                    cue = SubtitleCue(
+                        index, cue.start + position, cue.end + position, cue.text
+                    )
+                    subtitles.write(
+                        (cue.format(subtitle_format) + "\n").encode("utf-8")
+                    )
+                if info.sample_rate:
+                    position += round(info.samples * 10000000 / info.sample_rate)
+                count += 1
+        except Exception as e:
+            logger.error(f"book synthesis failed after {count} segments: {str(e)}")
+            segments.close()
+            appender.abort()
+            if subtitles is not None:
+                subtitles.abort()
+            return None
+        appender.commit()
+        if subtitles is not None:
+            subtitles.commit()
+        elapsed = time.perf_counter() - started
+        logger.info(
+            f"book completed: {count} segments, duration: {appender.duration:.1f}s, "
+            f"cost: {elapsed:.1f}s, output file: {voice_file}"
+        )
+        return TTSResult(
+            voice_file,
+            WordTimeline(),
+            appender.duration,
+            output_format,
+            subtitle_file,
+            {"synthesis": elapsed},
+        )
 
-    def get_audio_duration(self):
+    def stream_tts(
+        self,
+        text: str,
+        voice_rate: float,
+        output_format: str = None,
+        chunk_size: int = 65536,
+        *args,
+        priority: int = PRIORITY_INTERACTIVE,
+        tenant: str = "default",
+        subtitle_stream=None,
+        subtitle_format: str = "srt",
+        **kwargs,
+    ):
         """
-        获取音频时长
+        流式合成，逐块返回音频数据；默认实现先合成到临时文件再分块读取
+        subtitle_stream: 同 create_tts，字幕随词边界逐行输出
         """
-        if not self.sub_maker.offset:
-            return 0.0
-        return self.sub_maker.offset[-1][1] / 10000000
+        text = self._format_text(text)
+        aligner = None
+        if subtitle_stream is not None:
+            aligner = SubtitleAligner(text, subtitle_stream, subtitle_format)
+            kwargs["on_word"] = aligner.feed
+            kwargs["on_sentence"] = aligner.feed_sentence
+        with tempfile.TemporaryDirectory() as tmp_dir:
+            voice_file = os.path.join(tmp_dir, "voice")
+            with self._slot(text, priority, tenant):
+                timeline = self._tts(
+                    text=text,
+                    voice_rate=voice_rate,
+                    voice_file=voice_file,
+                    output_format=output_format,
+                    *args,
+                    **kwargs,
+                )
+            if timeline is None:
+                raise Exception(f"failed, voice_name: {self.voice_name}")
+            if aligner is not None and not aligner.fed:
+                aligner.feed_timeline(timeline)
+            with open(voice_file, "rb") as file:
+                while True:
+                    chunk = file.read(chunk_size)
+                    if not chunk:
+                        break
+                    yield chunk
@@ -0,0 +1,152 @@
+import asyncio
+import json
+import math
+import re
+import threading
+from xml.sax.saxutils import unescape
+
+from aiohttp import WSMsgType, web
+from funutil import getLogger
+
+from funtalk.tts._mock import _FRAME_TICKS, _SILENT_FRAME, _WORD_PATTERN
+
+logger = getLogger("funtalk")
+
+_PROSODY_PATTERN = re.compile(r"<prosody[^>]*>(.*?)</prosody>", re.S)
+
+
+class EdgeProtocolMock:
+    """
+    本地 edge 协议模拟：websocket 服务按 edge 的消息格式返回静音 mp3 与词边界，不访问网络
+    handshake_delay: 每次建立连接的额外耗时（秒），模拟 TLS 握手与服务端鉴权
+    turn_delay: 每轮合成的首包耗时（秒）
+    max_turns: 每条连接处理多少轮后由服务端主动断开，模拟连接被回收
+    """
+
+    def __init__(
+        self,
+        handshake_delay: float = 0.1,
+        turn_delay: float = 0.0,
+        max_turns: int = None,
+        char_duration: float = 0.06,
+    ):
+        self.handshake_delay = handshake_delay
+        self.turn_delay = turn_delay
+        self.max_turns = max_turns
+        self.char_duration = char_duration
+        self.connections = 0
+        self.turns = 0
+        self.url = None
+        self._loop = None
+        self._runner = None
+        self._sockets = set()
+
+    def start(self, host: str = "127.0.0.1", port: int = 0) -> str:
+        """
+        在后台线程中启动服务，返回 websocket 地址
+        """
+        self._loop = asyncio.new_event_loop()
+        threading.Thread(
+            target=self._loop.run_forever, name="edge-protocol-mock", daemon=True
+        ).start()
+        self.url = asyncio.run_coroutine_threadsafe(
+            self._start(host, port), self._loop
+        ).result()
+        return self.url
+
+    async def _start(self, host: str, port: int) -> str:
+        app = web.Application()
+        app.router.add_get("/edge/v1", self._handle)
+        app.on_shutdown.append(self._close_sockets)
+        self._runner = web.AppRunner(app)
+        await self._runner.setup()
+        site = web.TCPSite(self._runner, host, port)
+        await site.start()
+        port = site._server.sockets[0].getsockname()[1]
+        return f"ws://{host}:{port}/edge/v1"
+
+    async def _close_sockets(self, app):
+        # 客户端连接池会一直保持连接，不主动关闭时 cleanup 会一直等待
+        for ws in list(self._sockets):
+            await ws.close()
+
+    def stop(self):
+        if self._loop is None:
+            return
+        asyncio.run_coroutine_threadsafe(self._runner.cleanup(), self._loop).result()
+        self._loop.call_soon_threadsafe(self._loop.stop)
+        self._loop = None
+
+    async def _handle(self, request):
+        if self.handshake_delay:
+            await asyncio.sleep(self.handshake_delay)
+        ws = web.WebSocketResponse()
+        await ws.prepare(request)
+        self.connections += 1
+        self._sockets.add(ws)
+        turns = 0
+        try:
+            async for message in ws:
+                if message.type != WSMsgType.TEXT:
+                    continue
+                headers, _, body = message.data.partition("\r\n\r\n")
+                if "Path:ssml" not in headers:
+                    continue
+                request_id = headers.split("\r\n", 1)[0].partition(":")[2]
+                await self._turn(ws, request_id, body)
+                turns += 1
+                self.turns += 1
+                if self.max_turns and turns >= self.max_turns:
+                    await ws.close()
+                    break
+        except ConnectionResetError:
+            # 客户端提前停止读取并关闭连接
+            pass
+        finally:
+            self._sockets.discard(ws)
+        return ws
+
+    async def _turn(self, ws, request_id: str, ssml: str):
+        if self.turn_delay:
+            await asyncio.sleep(self.turn_delay)
+        match = _PROSODY_PATTERN.search(ssml)
+        text = unescape(match.group(1)) if match else ""
+        await ws.send_str(_text_message(request_id, "turn.start", "{}"))
+        tick = int(self.char_duration * 10000000)
+        offset = 0
+        for word in _WORD_PATTERN.findall(text):
+            duration = tick * len(word)
+            metadata = {
+                "Metadata": [
+                    {
+                        "Type": "WordBoundary",
+                        "Data": {
+                            "Offset": offset,
+                            "Duration": duration,
+                            "text": {"Text": word, "Length": len(word)},
+                        },
+                    }
+                ]
+            }
+            await ws.send_str(
+                _text_message(request_id, "audio.metadata", json.dumps(metadata))
+            )
+            frames = max(1, math.ceil((duration + tick) / _FRAME_TICKS))
+            await ws.send_bytes(_audio_message(request_id, _SILENT_FRAME * frames))
+            offset += duration + tick
+        await ws.send_str(_text_message(request_id, "turn.end", "{}"))
+
+
+def _text_message(request_id: str, path: str, body: str) -> str:
+    return (
+        f"X-RequestId:{request_id}\r\n"
+        "Content-Type:application/json; charset=utf-8\r\n"
+        f"Path:{path}\r\n\r\n{body}"
+    )
+
+
+def _audio_message(request_id: str, audio: bytes) -> bytes:
+    header = f"X-RequestId:{request_id}\r\nContent-Type:audio/mpeg\r\nPath:audio"
+    header = header.encode("utf-8")
+    # 与 edge 一致：前两个字节为头部长度，头部与音频之间以 \r\n 分隔
+    return (len(header) + 2).to_bytes(2, "big") + header + b"\r\n" + audio
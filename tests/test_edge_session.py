@@ -0,0 +1,49 @@
+import pytest
+
+from funtalk.audio import MemorySink, scan_audio
+from funtalk.tts import EdgeSessionPool
+from funtalk.tts._edge import EdgeTTS
+
+from edge_mock import EdgeProtocolMock
+
+
+@pytest.fixture
+def mock():
+    mock = EdgeProtocolMock(handshake_delay=0.0)
+    mock.start()
+    yield mock
+    mock.stop()
+
+
+def _synthesize(pool, text):
+    engine = EdgeTTS("zh-CN-XiaoxiaoNeural", single_flight=False, session_pool=pool)
+    sink = MemorySink()
+    result = engine.create_tts(text, 1.0, sink)
+    return result, sink
+
+
+def test_pool_reuses_connection(mock):
+    pool = EdgeSessionPool(url=mock.url)
+    try:
+        for i in range(3):
+            result, sink = _synthesize(pool, f"你好 世界 {i}")
+            assert len(result.timeline) == 3
+            assert scan_audio(sink.buffer).duration > 0
+        assert mock.connections == 1
+        assert pool.stats()["reuses"] == 2
+    finally:
+        pool.close()
+
+
+def test_pool_reconnects_after_server_close():
+    mock = EdgeProtocolMock(handshake_delay=0.0, max_turns=1)
+    mock.start()
+    pool = EdgeSessionPool(url=mock.url)
+    try:
+        for _ in range(3):
+            result, _ = _synthesize(pool, "a b")
+            assert len(result.timeline) == 2
+        assert mock.turns == 3
+    finally:
+        pool.close()
+        mock.stop()
@@ -0,0 +1,69 @@
+import os
+import random
+
+from funtalk.audio import MemorySink, scan_audio, wav_header
+from funtalk.tts import probe_audio
+
+# MPEG-2 layer 3，24kHz 48kbps 单声道，每帧 576 个采样（24ms）
+_FRAME = b"\xff\xf3\x64\xc4" + bytes(140)
+
+
+def test_mp3_duration_from_frames():
+    info = scan_audio(_FRAME * 50)
+    assert info.container == "mp3"
+    assert info.sample_rate == 24000
+    assert info.samples == 50 * 576
+    assert abs(info.duration - 1.2) < 1e-9
+    assert len(info.index) == 50
+    assert info.index.seek(0.5) == info.index.offsets[20]
+
+
+def test_mp3_skips_leading_garbage():
+    prefix = b"\x00\xff\xe0\x12" * 10
+    info = scan_audio(prefix + _FRAME * 50)
+    assert info.samples == 50 * 576
+    assert info.data_start == len(prefix)
+
+
+def test_wav_duration_from_header():
+    data = wav_header(16000, 32000) + bytes(32000)
+    info = scan_audio(data)
+    assert info.container == "wav"
+    assert info.sample_rate == 16000
+    assert info.duration == 1.0
+
+
+def test_wav_streamed_without_size():
+    # 流式写出时 data 长度为 0，时长按实际数据计算
+    data = wav_header(16000, 0) + bytes(16000)
+    assert scan_audio(data).duration == 0.5
+
+
+def test_pcm_by_declared_format():
+    info = scan_audio(bytes(48000), output_format="pcm-24k")
+    assert info.container == "pcm"
+    assert info.duration == 1.0
+
+
+def test_unscanned_formats_return_none():
+    assert scan_audio(b"OggS" + bytes(400), output_format="opus-24k") is None
+    assert scan_audio(b"OggS" + bytes(400)) is None
+    assert scan_audio(_FRAME * 10, output_format="wav-16k") is None
+
+
+def test_random_data_is_not_mp3():
+    rng = random.Random(0)
+    for _ in range(100):
+        data = bytes(rng.getrandbits(8) for _ in range(2000))
+        assert scan_audio(data) is None
+
+
+def test_probe_file_and_memory_sink(tmp_path):
+    path = os.path.join(tmp_path, "a.mp3")
+    with open(path, "wb") as file:
+        file.write(_FRAME * 25)
+    assert abs(probe_audio(path).duration - 0.6) < 1e-9
+    sink = MemorySink()
+    sink.write(_FRAME * 25)
+    assert probe_audio(sink).samples == 25 * 576
+    assert probe_audio(os.path.join(tmp_path, "missing.mp3")) is None
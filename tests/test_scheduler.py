@@ -0,0 +1,113 @@
+import asyncio
+import threading
+import time
+
+import pytest
+
+from funtalk.tts import PRIORITY_BULK, PRIORITY_INTERACTIVE, Quota, Scheduler
+
+
+def _wait_queued(scheduler, count):
+    limiter = scheduler._limiter("test", None)
+    deadline = time.monotonic() + 5
+    while sum(limiter.queued().values()) < count:
+        assert time.monotonic() < deadline
+        time.sleep(0.005)
+
+
+def test_priority_then_tenant_round_robin():
+    scheduler = Scheduler({("test", None): Quota(concurrency=1)})
+    order = []
+
+    def run(label, priority, tenant):
+        with scheduler.slot("test", priority=priority, tenant=tenant):
+            order.append(label)
+
+    requests = [
+        ("bulk-1", PRIORITY_BULK, "a"),
+        ("bulk-2", PRIORITY_BULK, "a"),
+        ("a-1", PRIORITY_INTERACTIVE, "a"),
+        ("a-2", PRIORITY_INTERACTIVE, "a"),
+        ("a-3", PRIORITY_INTERACTIVE, "a"),
+        ("b-1", PRIORITY_INTERACTIVE, "b"),
+        ("c-1", PRIORITY_INTERACTIVE, "c"),
+    ]
+    threads = []
+    # 占住唯一的并发槽位，让请求按提交顺序排队
+    with scheduler.slot("test"):
+        for i, request in enumerate(requests):
+            threads.append(threading.Thread(target=run, args=request))
+            threads[-1].start()
+            _wait_queued(scheduler, i + 1)
+    for thread in threads:
+        thread.join(5)
+
+    # 交互请求先于批量请求，同一优先级内每个租户轮流放行一个
+    assert order == ["a-1", "b-1", "c-1", "a-2", "a-3", "bulk-1", "bulk-2"]
+    stats = scheduler.stats()["test/None"]
+    assert stats["granted"] == len(requests) + 1
+    assert stats["active"] == 0
+
+
+def test_async_slot_shares_queue_and_cancels():
+    scheduler = Scheduler({("test", None): Quota(concurrency=1)})
+    order = []
+
+    async def run(label, priority, tenant="default"):
+        async with scheduler.aslot("test", priority=priority, tenant=tenant):
+            order.append(label)
+
+    async def main():
+        async with scheduler.aslot("test"):
+            bulk = asyncio.ensure_future(run("bulk", PRIORITY_BULK))
+            await asyncio.sleep(0.01)
+            cancelled = asyncio.ensure_future(run("cancelled", PRIORITY_INTERACTIVE))
+            await asyncio.sleep(0.01)
+            interactive = asyncio.ensure_future(
+                run("interactive", PRIORITY_INTERACTIVE)
+            )
+            await asyncio.sleep(0.01)
+            cancelled.cancel()
+            await asyncio.sleep(0.01)
+            assert scheduler.stats()["test/None"]["queued"] == {
+                str(PRIORITY_INTERACTIVE): 1,
+                str(PRIORITY_BULK): 1,
+            }
+        await asyncio.wait_for(asyncio.gather(bulk, interactive), 5)
+
+    asyncio.run(main())
+    assert order == ["interactive", "bulk"]
+
+
+def test_unconfigured_engine_is_not_limited():
+    scheduler = Scheduler()
+    with scheduler.slot("other"):
+        with scheduler.slot("other"):
+            pass
+    assert scheduler.stats() == {}
+
+
+def test_failures_shrink_adaptive_limit():
+    scheduler = Scheduler({("test", None): Quota(adaptive=True, concurrency=16)})
+    with scheduler.slot("test"):
+        pass
+    limit = scheduler.stats()["test/None"]["limit"]
+    with pytest.raises(RuntimeError):
+        with scheduler.slot("test"):
+            raise RuntimeError("failed")
+    stats = scheduler.stats()["test/None"]
+    assert stats["limit"] < limit
+    assert stats["failed"] == 1
+
+
+def test_failure_reported_inside_slot_is_not_a_success():
+    scheduler = Scheduler({("test", None): Quota(adaptive=True, concurrency=16)})
+    limiter = scheduler._limiter("test", None)
+    # 引擎重试耗尽后返回 None，slot 正常退出
+    with scheduler.slot("test"):
+        scheduler.failed("test")
+    assert limiter.adaptive._baseline is None
+    assert limiter.stats["failed"] == 1
+    # slot 之外报告的失败直接计数
+    scheduler.failed("test")
+    assert limiter.stats["failed"] == 2
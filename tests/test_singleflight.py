@@ -0,0 +1,125 @@
+import os
+import threading
+
+import pytest
+
+from funtalk.tts import WordTimeline
+from funtalk.tts._singleflight import SingleFlight
+
+
+def _timeline():
+    timeline = WordTimeline()
+    timeline.append(0, 5000000, "hello")
+    return timeline
+
+
+def _read(path):
+    with open(path, "rb") as file:
+        return file.read()
+
+
+def test_concurrent_calls_share_one_synthesis(tmp_path):
+    single_flight = SingleFlight()
+    started, release = threading.Event(), threading.Event()
+    calls = []
+
+    def synthesize(voice_file):
+        calls.append(voice_file)
+        started.set()
+        release.wait(5)
+        with open(voice_file, "wb") as file:
+            file.write(b"audio")
+        return _timeline()
+
+    files = [os.path.join(tmp_path, f"{i}.mp3") for i in range(4)]
+    results = [None] * len(files)
+
+    def run(i):
+        results[i] = single_flight.do("key", files[i], synthesize)
+
+    threads = [threading.Thread(target=run, args=(0,))]
+    threads[0].start()
+    started.wait(5)
+    for i in range(1, len(files)):
+        threads.append(threading.Thread(target=run, args=(i,)))
+        threads[-1].start()
+    # 等待者全部登记后再放行
+    while len(single_flight._calls["key"].followers) < len(files) - 1:
+        threading.Event().wait(0.01)
+    release.set()
+    for thread in threads:
+        thread.join(5)
+
+    assert calls == [files[0]]
+    for path, timeline in zip(files, results):
+        assert _read(path) == b"audio"
+        assert timeline.subs == ["hello"]
+    # 每个调用拿到独立的时间轴
+    assert len({id(timeline) for timeline in results}) == len(files)
+    assert [name for name in os.listdir(tmp_path) if name.endswith(".tmp")] == []
+
+
+def test_different_keys_do_not_merge(tmp_path):
+    single_flight = SingleFlight()
+    calls = []
+
+    def synthesize(voice_file):
+        calls.append(voice_file)
+        return _timeline()
+
+    single_flight.do("a", os.path.join(tmp_path, "a.mp3"), synthesize)
+    single_flight.do("b", os.path.join(tmp_path, "b.mp3"), synthesize)
+    single_flight.do("a", os.path.join(tmp_path, "c.mp3"), synthesize)
+    assert len(calls) == 3
+
+
+def test_error_reaches_followers(tmp_path):
+    single_flight = SingleFlight()
+    started, release = threading.Event(), threading.Event()
+
+    def synthesize(voice_file):
+        started.set()
+        release.wait(5)
+        raise RuntimeError("failed")
+
+    errors = []
+
+    def run(name):
+        try:
+            single_flight.do("key", os.path.join(tmp_path, name), synthesize)
+        except RuntimeError as e:
+            errors.append(e)
+
+    leader = threading.Thread(target=run, args=("a.mp3",))
+    leader.start()
+    started.wait(5)
+    follower = threading.Thread(target=run, args=("b.mp3",))
+    follower.start()
+    while not single_flight._calls["key"].followers:
+        threading.Event().wait(0.01)
+    release.set()
+    leader.join(5)
+    follower.join(5)
+    assert len(errors) == 2
+    assert not os.path.exists(os.path.join(tmp_path, "b.mp3"))
+
+
+@pytest.mark.skipif(os.name != "posix", reason="requires fcntl")
+def test_reuses_result_across_processes(tmp_path):
+    lock_dir = os.path.join(tmp_path, "locks")
+    calls = []
+
+    def synthesize(voice_file):
+        calls.append(voice_file)
+        with open(voice_file, "wb") as file:
+            file.write(b"audio")
+        return _timeline()
+
+    first = os.path.join(tmp_path, "a.mp3")
+    second = os.path.join(tmp_path, "b.mp3")
+    # 两个实例模拟两个进程，只通过 lock_dir 共享结果
+    SingleFlight(lock_dir=lock_dir).do("key", first, synthesize)
+    timeline = SingleFlight(lock_dir=lock_dir).do("key", second, synthesize)
+    assert calls == [first]
+    assert _read(second) == b"audio"
+    assert timeline.subs == ["hello"]
@@ -0,0 +1,58 @@
+import os
+
+import pytest
+
+from funtalk.audio import FileSink, MemorySink, open_sink
+
+
+def _listdir(path):
+    return sorted(os.listdir(path))
+
+
+def test_file_sink_commit_replaces_target(tmp_path):
+    target = os.path.join(tmp_path, "a.mp3")
+    with open(target, "wb") as file:
+        file.write(b"old")
+    sink = FileSink(target)
+    sink.write(b"new ")
+    # 提交前目标文件保持原内容
+    with open(target, "rb") as file:
+        assert file.read() == b"old"
+    sink.write(memoryview(b"data"))
+    sink.commit()
+    with open(target, "rb") as file:
+        assert file.read() == b"new data"
+    assert _listdir(tmp_path) == ["a.mp3"]
+
+
+def test_file_sink_abort_keeps_target(tmp_path):
+    target = os.path.join(tmp_path, "a.mp3")
+    with open(target, "wb") as file:
+        file.write(b"old")
+    with pytest.raises(RuntimeError):
+        with FileSink(target) as sink:
+            sink.write(b"partial")
+            raise RuntimeError("failed")
+    with open(target, "rb") as file:
+        assert file.read() == b"old"
+    assert _listdir(tmp_path) == ["a.mp3"]
+
+
+def test_file_sink_creates_directory_and_empty_file(tmp_path):
+    target = os.path.join(tmp_path, "sub", "empty.wav")
+    FileSink(target, fsync="commit").commit()
+    assert os.path.getsize(target) == 0
+
+
+def test_memory_sink_abort_clears():
+    sink = MemorySink()
+    sink.write(b"abc")
+    sink.abort()
+    sink.write(b"d")
+    assert sink.getvalue() == b"d"
+
+
+def test_open_sink(tmp_path):
+    sink = MemorySink()
+    assert open_sink(sink) is sink
+    assert isinstance(open_sink(os.path.join(tmp_path, "a.mp3")), FileSink)